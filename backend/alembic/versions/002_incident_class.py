@@ -0,0 +1,19 @@
+"""Add decisions.incident_class
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 09:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('decisions', sa.Column('incident_class', sa.Text(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('decisions', 'incident_class')
@@ -0,0 +1,21 @@
+"""Add decisions.idempotency_key
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('decisions', sa.Column('idempotency_key', sa.Text(), nullable=True))
+    op.create_index('ix_decisions_idempotency_key', 'decisions', ['idempotency_key'], unique=True)
+
+def downgrade() -> None:
+    op.drop_index('ix_decisions_idempotency_key', table_name='decisions')
+    op.drop_column('decisions', 'idempotency_key')
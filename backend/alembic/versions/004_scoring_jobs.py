@@ -0,0 +1,44 @@
+"""Add scoring_jobs table for background batch scoring
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'scoring_jobs',
+        sa.Column('job_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('status', sa.Text(), nullable=False),
+        sa.Column('input_format', sa.Text(), nullable=False),
+        sa.Column('input_path', sa.Text(), nullable=False),
+        sa.Column('output_path', sa.Text(), nullable=False),
+        sa.Column('model_version', sa.Text(), nullable=False),
+        sa.Column('policy_version', sa.Text(), nullable=False),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('processed_rows', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('scored_rows', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('error_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('output_offset', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('errors', postgresql.JSONB(astext_type=sa.Text()), server_default='[]', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index('ix_scoring_jobs_status', 'scoring_jobs', ['status'])
+
+def downgrade() -> None:
+    op.drop_index('ix_scoring_jobs_status', table_name='scoring_jobs')
+    op.drop_table('scoring_jobs')
@@ -0,0 +1,27 @@
+"""Add (created_at, decision_id) index on decisions for keyset pagination
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from alembic import op
+
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # CONCURRENTLY so the build does not block writes on a large decisions table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_decisions_created_at_decision_id', 'decisions', ['created_at', 'decision_id'],
+            postgresql_concurrently=True
+        )
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_decisions_created_at_decision_id', table_name='decisions',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,27 @@
+"""Add (decision_id, created_at) index on audit_log for decision detail lookups
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from alembic import op
+
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # CONCURRENTLY so the build does not block writes on a large audit_log table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_audit_log_decision_id_created_at', 'audit_log', ['decision_id', 'created_at'],
+            postgresql_concurrently=True
+        )
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_audit_log_decision_id_created_at', table_name='audit_log',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,50 @@
+"""Add decision_rollups_hourly table
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+RISK_BUCKETS = 10
+
+def upgrade() -> None:
+    op.create_table(
+        'decision_rollups_hourly',
+        sa.Column('bucket_start', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('model_version', sa.Text(), nullable=False),
+        sa.Column('policy_version', sa.Text(), nullable=False),
+        sa.Column('incident_class', sa.Text(), nullable=False),
+        sa.Column('decision', sa.Text(), nullable=False),
+        sa.Column('decision_count', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('risk_score_sum', sa.Float(), server_default='0', nullable=False),
+        sa.Column('fraud_probability_sum', sa.Float(), server_default='0', nullable=False),
+        *(
+            sa.Column(f'risk_hist_{i}', sa.BigInteger(), server_default='0', nullable=False)
+            for i in range(RISK_BUCKETS)
+        ),
+        sa.PrimaryKeyConstraint('bucket_start', 'model_version', 'policy_version', 'incident_class', 'decision')
+    )
+    # Backfill from existing decisions; afterwards the write path keeps it current.
+    # Bucketing matches app.rollups: UTC hour, 10-point risk buckets capped at the last.
+    op.execute(f"""
+        INSERT INTO decision_rollups_hourly
+        SELECT date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+               model_version, policy_version, COALESCE(incident_class, 'unclassified'), decision,
+               count(*), sum(risk_score), sum(fraud_probability),
+               {", ".join(
+                   f"count(*) FILTER (WHERE LEAST(GREATEST(floor(risk_score / 10), 0), {RISK_BUCKETS - 1}) = {i})"
+                   for i in range(RISK_BUCKETS)
+               )}
+        FROM decisions
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+def downgrade() -> None:
+    op.drop_table('decision_rollups_hourly')
@@ -0,0 +1,36 @@
+"""Add indexes for filtered decision listings and explanation full-text search
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+# (name, columns, extra create_index kwargs)
+INDEXES = [
+    ('ix_decisions_customer_id_created_at', ['customer_id', 'created_at', 'decision_id'], {}),
+    ('ix_decisions_decision_created_at', ['decision', 'created_at', 'decision_id'], {}),
+    ('ix_decisions_risk_score', ['risk_score'], {}),
+    # Must match app.models.explanation_tsvector for the planner to use it
+    ('ix_decisions_explanation_fts', [sa.text("to_tsvector('english', explanation)")], {'postgresql_using': 'gin'}),
+]
+
+def upgrade() -> None:
+    # CONCURRENTLY so the builds do not block writes on a large decisions table
+    with op.get_context().autocommit_block():
+        for name, columns, kwargs in INDEXES:
+            op.create_index(name, 'decisions', columns, postgresql_concurrently=True, **kwargs)
+        # Superseded by the (customer_id, created_at, decision_id) prefix
+        op.drop_index('ix_decisions_customer_id', table_name='decisions', postgresql_concurrently=True)
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_decisions_customer_id', 'decisions', ['customer_id'], postgresql_concurrently=True)
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='decisions', postgresql_concurrently=True)
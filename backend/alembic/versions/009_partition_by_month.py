@@ -0,0 +1,70 @@
+"""Range-partition decisions and audit_log by month on created_at
+
+Rebuilds both tables as PARTITION BY RANGE (created_at) parents with one
+partition per UTC month (from the oldest existing row through two months
+ahead) plus a DEFAULT partition, and copies the rows across; see
+app.partitions.partition_statements for the schema changes this implies
+(composite primary keys, no audit_log -> decisions foreign key,
+decision_idempotency_keys).
+
+The copy takes both tables offline, and the deploy runs `alembic upgrade
+head` on every boot, so this migration only rebuilds an empty database.
+With existing rows it leaves the tables as they are (the app works
+unpartitioned) and the rebuild is run separately in a maintenance window:
+
+    python -m app.archive partition
+
+Later months are created by app.partitions (on startup and by
+`python -m app.archive maintain`).
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18 12:00:00.000000
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.partitions import IS_PARTITIONED, PARTITION_KEYS, PARTITIONED_INDEXES, partition_statements
+
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 2
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.scalar(sa.text("SELECT EXISTS (SELECT 1 FROM decisions) OR EXISTS (SELECT 1 FROM audit_log)")):
+        logging.getLogger("alembic.runtime.migration").warning(
+            "decisions/audit_log have rows; not partitioning them during the deploy. "
+            "Run `python -m app.archive partition` in a maintenance window."
+        )
+        return
+    for statement in partition_statements(MONTHS_AHEAD):
+        op.execute(statement)
+
+def downgrade() -> None:
+    if not op.get_bind().scalar(sa.text(IS_PARTITIONED)):
+        return
+    op.execute("DROP TRIGGER decisions_idempotency_key ON decisions")
+    op.execute("DROP FUNCTION decisions_claim_idempotency_key()")
+    op.execute("DROP TABLE decision_idempotency_keys")
+
+    for table, id_column in PARTITION_KEYS.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        op.execute(f"ALTER TABLE {table}_partitioned RENAME CONSTRAINT {table}_pkey TO {table}_partitioned_pkey")
+        op.execute(f"CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({id_column})")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+        op.execute(f"DROP TABLE {table}_partitioned")
+
+    for statement in PARTITIONED_INDEXES:
+        op.execute(statement)
+    op.execute("CREATE UNIQUE INDEX ix_decisions_idempotency_key ON decisions (idempotency_key)")
+    op.execute(
+        "ALTER TABLE audit_log ADD CONSTRAINT audit_log_decision_id_fkey "
+        "FOREIGN KEY (decision_id) REFERENCES decisions (decision_id)"
+    )
@@ -0,0 +1,55 @@
+"""Add decision_rollup_deltas, the append-only queue in front of the hourly rollups
+
+Decision writes append aggregated increments here instead of upserting
+decision_rollups_hourly directly; app.rollups.RollupMerger merges them.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+RISK_BUCKETS = 10
+
+def upgrade() -> None:
+    op.create_table(
+        'decision_rollup_deltas',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('bucket_start', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('model_version', sa.Text(), nullable=False),
+        sa.Column('policy_version', sa.Text(), nullable=False),
+        sa.Column('incident_class', sa.Text(), nullable=False),
+        sa.Column('decision', sa.Text(), nullable=False),
+        sa.Column('decision_count', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('risk_score_sum', sa.Float(), server_default='0', nullable=False),
+        sa.Column('fraud_probability_sum', sa.Float(), server_default='0', nullable=False),
+        *(
+            sa.Column(f'risk_hist_{i}', sa.BigInteger(), server_default='0', nullable=False)
+            for i in range(RISK_BUCKETS)
+        ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+def downgrade() -> None:
+    # Fold anything still pending into the rollups before dropping the queue
+    op.execute(f"""
+        INSERT INTO decision_rollups_hourly
+        SELECT bucket_start, model_version, policy_version, incident_class, decision,
+               sum(decision_count), sum(risk_score_sum), sum(fraud_probability_sum),
+               {", ".join(f"sum(risk_hist_{i})" for i in range(RISK_BUCKETS))}
+        FROM decision_rollup_deltas
+        GROUP BY 1, 2, 3, 4, 5
+        ON CONFLICT (bucket_start, model_version, policy_version, incident_class, decision) DO UPDATE SET
+            {", ".join(
+                f"{c} = decision_rollups_hourly.{c} + excluded.{c}"
+                for c in ["decision_count", "risk_score_sum", "fraud_probability_sum",
+                          *(f"risk_hist_{i}" for i in range(RISK_BUCKETS))]
+            )}
+    """)
+    op.drop_table('decision_rollup_deltas')
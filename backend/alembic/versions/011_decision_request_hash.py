@@ -0,0 +1,23 @@
+"""Add decisions.request_hash, the payload hash stored next to the idempotency key
+
+Lets a replayed Idempotency-Key be checked against the payload it was first
+used with. Existing rows stay NULL and are not checked.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18 14:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Nullable without a default: metadata-only on the partitioned parent and its partitions
+    op.add_column('decisions', sa.Column('request_hash', sa.Text(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('decisions', 'request_hash')
@@ -0,0 +1,25 @@
+"""Add scoring_jobs.owner and lease_until for claiming jobs across processes
+
+A runner claims a job with a conditional UPDATE (queued, or running with a
+lapsed lease) and renews the lease per chunk, so several app processes can
+share the table without running the same job twice.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18 15:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('scoring_jobs', sa.Column('owner', sa.Text(), nullable=True))
+    op.add_column('scoring_jobs', sa.Column('lease_until', sa.TIMESTAMP(timezone=True), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('scoring_jobs', 'lease_until')
+    op.drop_column('scoring_jobs', 'owner')
@@ -0,0 +1,154 @@
+"""
+Decision statistics computed in the database.
+
+Every figure is a GROUP BY over the decisions in a created_at window, so only
+aggregate rows cross the wire and the cost is one range scan of the
+(created_at, decision_id) index per query, independent of how many rows live
+outside the window.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Integer, and_, case, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Decision
+
+RISK_BUCKET_WIDTH = 10.0
+RISK_BUCKETS = 10  # the last bucket also holds scores at or above 100
+FRAUD_PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+# Resolution of the portable (non-PostgreSQL) percentile estimate
+FRAUD_BUCKETS = 1000
+
+
+def as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def percentile_label(p: float) -> str:
+    return f"p{round(p * 100):d}"
+
+
+def percentiles_from_histogram(counts: dict[int, int], buckets: int, percentiles=FRAUD_PERCENTILES) -> dict:
+    """Estimate percentiles of a [0, 1] value from bucket counts (bucket midpoints)."""
+    total = sum(counts.values())
+    result = {}
+    for p in percentiles:
+        if not total:
+            result[percentile_label(p)] = None
+            continue
+        rank, seen = p * total, 0
+        for bucket in sorted(counts):
+            seen += counts[bucket]
+            if seen >= rank:
+                result[percentile_label(p)] = round((bucket + 0.5) / buckets, 4)
+                break
+    return result
+
+
+def bucket_index(value, dialect: str):
+    """
+    floor(value) as an integer, matching app.rollups.risk_bucket.
+    
+    PostgreSQL's CAST to integer rounds (19.6 -> 20), so floor first; SQLite's
+    truncates, which equals floor for the non-negative values bucketed here
+    and does not need the optional math functions.
+    """
+    if dialect == "postgresql":
+        return cast(func.floor(value), Integer)
+    return cast(value, Integer)
+
+
+async def decision_stats(db: AsyncSession, since: datetime, until: datetime) -> dict:
+    window = and_(Decision.created_at >= since, Decision.created_at < until)
+
+    # Counts and averages per (model, policy, decision); totals derive from these
+    grouped = (await db.execute(
+        select(
+            Decision.model_version, Decision.policy_version, Decision.decision,
+            func.count(), func.sum(Decision.risk_score), func.sum(Decision.fraud_probability)
+        )
+        .where(window)
+        .group_by(Decision.model_version, Decision.policy_version, Decision.decision)
+    )).all()
+
+    by_decision: dict[str, int] = {}
+    versions: dict[tuple[str, str], dict] = {}
+    total, risk_sum, fraud_sum = 0, 0.0, 0.0
+    for model_version, policy_version, decision, count, risk, fraud in grouped:
+        total += count
+        risk_sum += risk
+        fraud_sum += fraud
+        by_decision[decision] = by_decision.get(decision, 0) + count
+        version = versions.setdefault((model_version, policy_version), {
+            "model_version": model_version,
+            "policy_version": policy_version,
+            "total": 0,
+            "by_decision": {},
+            "risk_sum": 0.0,
+            "fraud_sum": 0.0
+        })
+        version["total"] += count
+        version["by_decision"][decision] = count
+        version["risk_sum"] += risk
+        version["fraud_sum"] += fraud
+
+    bucket = case(
+        (Decision.risk_score >= RISK_BUCKET_WIDTH * (RISK_BUCKETS - 1), RISK_BUCKETS - 1),
+        else_=bucket_index(Decision.risk_score / RISK_BUCKET_WIDTH, db.bind.dialect.name)
+    )
+    histogram = dict((await db.execute(
+        select(bucket, func.count()).where(window).group_by(bucket)
+    )).all())
+
+    return {
+        "since": since,
+        "until": until,
+        "total": total,
+        "by_decision": by_decision,
+        "avg_risk_score": round(risk_sum / total, 4) if total else None,
+        "avg_fraud_probability": round(fraud_sum / total, 4) if total else None,
+        "risk_score_histogram": [
+            {
+                "lower": i * RISK_BUCKET_WIDTH,
+                "upper": (i + 1) * RISK_BUCKET_WIDTH,
+                "count": histogram.get(i, 0)
+            }
+            for i in range(RISK_BUCKETS)
+        ],
+        "fraud_probability_percentiles": await _fraud_percentiles(db, window),
+        "by_version": [
+            {
+                "model_version": v["model_version"],
+                "policy_version": v["policy_version"],
+                "total": v["total"],
+                "by_decision": v["by_decision"],
+                "avg_risk_score": round(v["risk_sum"] / v["total"], 4),
+                "avg_fraud_probability": round(v["fraud_sum"] / v["total"], 4)
+            }
+            for v in sorted(versions.values(), key=lambda v: -v["total"])
+        ]
+    }
+
+
+async def _fraud_percentiles(db: AsyncSession, window) -> dict[str, Optional[float]]:
+    if db.bind.dialect.name == "postgresql":
+        row = (await db.execute(
+            select(*(
+                func.percentile_cont(p).within_group(Decision.fraud_probability)
+                for p in FRAUD_PERCENTILES
+            )).where(window)
+        )).one()
+        return {
+            percentile_label(p): None if value is None else round(value, 4)
+            for p, value in zip(FRAUD_PERCENTILES, row)
+        }
+
+    bucket = case(
+        (Decision.fraud_probability >= 1, FRAUD_BUCKETS - 1),
+        else_=bucket_index(Decision.fraud_probability * FRAUD_BUCKETS, db.bind.dialect.name)
+    )
+    counts = dict((await db.execute(
+        select(bucket, func.count()).where(window).group_by(bucket)
+    )).all())
+    return percentiles_from_histogram(counts, FRAUD_BUCKETS)
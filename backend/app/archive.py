@@ -0,0 +1,460 @@
+"""
+Archival of cold months to compressed Parquet.
+
+Months older than PARTITION_HOT_MONTHS (the current month counts as one) are
+moved out of the database one at a time:
+
+1. decisions and audit_log rows of the month are streamed with a server-side
+   cursor into zstd Parquet files under ARCHIVE_DIR
+   (<table>/<YYYY-MM>/part-NNNN.parquet), fsynced, and their row counts
+   checked against the database;
+2. the files are recorded in ARCHIVE_DIR/manifest.json as pending;
+3. one short transaction removes the month and checks that exactly the
+   archived rows went: on PostgreSQL it locks only the month's partitions
+   against writes, re-counts them, deletes the month's stray rows in the
+   default partitions and its expired idempotency keys, and detaches and drops
+   the partitions last (the only step that locks the parent tables, bounded by
+   a lock timeout and retried); elsewhere it DELETEs the month. A changed count
+   aborts the month and discards its files. Writes to other months are never
+   blocked;
+4. the manifest entries are marked complete.
+
+A run interrupted between 2 and 4 is reconciled at the start of the next one:
+pending entries whose month is gone from the database are completed, others
+are discarded and the month is archived again.
+
+Completed decision files are readable through GET /api/decisions/export,
+which reads archived months for the requested window before the live rows.
+Archived audit_log rows have no read path in the API: once a month is
+archived, its audit history (including a decision's detail events) is kept
+only in the Parquet files under ARCHIVE_DIR/audit_log. Hourly rollups are
+kept, so dashboards still cover archived months. ARCHIVE_RETENTION_MONTHS
+(0 = forever) bounds how long archives are kept.
+
+Archival needs the partitioned tables; a database that migration 009 left
+unpartitioned is converted with the `partition` command, which takes both
+tables offline while it copies them (run it in a maintenance window).
+
+    python -m app.archive partition            # one-off offline rebuild into partitions
+    python -m app.archive maintain             # create upcoming partitions
+    python -m app.archive run [--dry-run]      # archive months before the hot cutoff
+    python -m app.archive list                 # partitions and archived months
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import Text, cast, delete, func, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal, async_engine
+from app.export import ExportError, iter_parquet, parquet_schema
+from app.models import AuditLog, Decision, utcnow
+from app.partitions import (
+    PARTITIONED_TABLES, add_months, drop_partition, hot_cutoff, is_lock_timeout, is_partitioned,
+    list_partitions, maintain_partitions, month_label, month_start, partition_name, partition_tables
+)
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST = "manifest.json"
+ARCHIVE_MODELS = {"decisions": Decision, "audit_log": AuditLog}
+# Attempts at the removal transaction when detaching times out on a busy parent
+REMOVE_ATTEMPTS = 5
+
+
+class ArchiveError(Exception):
+    """A month that could not be archived (count mismatch, unreadable output)."""
+
+
+def archive_columns(table: str) -> tuple[list[str], list]:
+    """(column names, SELECT expressions) written for a table; JSON payloads as JSON text."""
+    model = ARCHIVE_MODELS[table]
+    names = [column.name for column in model.__table__.columns]
+    expressions = [
+        cast(column, Text) if column.name == "event_payload" else column
+        for column in model.__table__.columns
+    ]
+    return names, expressions
+
+
+# Manifest
+
+def load_manifest(archive_dir: str) -> dict:
+    try:
+        with open(os.path.join(archive_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"files": []}
+
+
+def save_manifest(archive_dir: str, manifest: dict):
+    path = os.path.join(archive_dir, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def archived_files(
+    archive_dir: str,
+    table: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> list[str]:
+    """Completed archive files of `table` whose month overlaps [since, until), oldest first."""
+    paths = []
+    for entry in sorted(load_manifest(archive_dir)["files"], key=lambda e: (e["month"], e["path"])):
+        if entry["table"] != table or entry["status"] != "complete":
+            continue
+        start = month_start(datetime.fromisoformat(entry["month"] + "-01"))
+        if (until is not None and start >= until) or (since is not None and add_months(start, 1) <= since):
+            continue
+        paths.append(os.path.join(archive_dir, entry["path"]))
+    return paths
+
+
+def archived_through(archive_dir: str) -> Optional[datetime]:
+    """End of the newest completely archived month (rows before it may live only in archives)."""
+    months = [e["month"] for e in load_manifest(archive_dir)["files"] if e["status"] == "complete"]
+    if not months:
+        return None
+    return add_months(month_start(datetime.fromisoformat(max(months) + "-01")), 1)
+
+
+# Archival
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _parquet_rows(path: str) -> int:
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+async def _count(db: AsyncSession, table: str, start: datetime, end: datetime) -> int:
+    model = ARCHIVE_MODELS[table]
+    return await db.scalar(
+        select(func.count()).select_from(model).where(model.created_at >= start, model.created_at < end)
+    )
+
+
+async def _write_table_month(
+    session_factory: Callable[[], AsyncSession],
+    archive_dir: str,
+    table: str,
+    start: datetime,
+    end: datetime,
+    batch_size: int
+) -> str:
+    """Write one month of a table to a new part file; returns its path relative to archive_dir."""
+    model = ARCHIVE_MODELS[table]
+    names, expressions = archive_columns(table)
+    query = (
+        select(*expressions)
+        .where(model.created_at >= start, model.created_at < end)
+        .order_by(model.created_at, *(c for c in model.__table__.primary_key.columns if c.name != "created_at"))
+    )
+    directory = os.path.join(archive_dir, table, month_label(start))
+    os.makedirs(directory, exist_ok=True)
+    part = len([name for name in os.listdir(directory) if name.endswith(".parquet")])
+    relative = os.path.join(table, month_label(start), f"part-{part:04d}.parquet")
+    path = os.path.join(archive_dir, relative)
+
+    with open(path + ".tmp", "wb") as f:
+        async for chunk in iter_parquet(session_factory, names, query, batch_size):
+            await asyncio.to_thread(f.write, chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+    return relative
+
+
+async def _remove_month(db: AsyncSession, start: datetime, end: datetime, counts: dict[str, int]):
+    """Remove the month's rows, raising ArchiveError unless they are exactly the `counts` archived."""
+    partitioned = await is_partitioned(db)
+    detach = []
+    for table, expected in counts.items():
+        model = ARCHIVE_MODELS[table]
+        name = partition_name(table, start)
+        if partitioned and name in await list_partitions(db, table):
+            # Blocks writes to this month only; other partitions stay writable
+            await db.execute(text(f"LOCK TABLE {name} IN SHARE ROW EXCLUSIVE MODE"))
+            removed = await _count(db, table, start, end)
+            detach.append(table)
+        else:
+            # Rows in a default partition or an unpartitioned table
+            removed = (await db.execute(
+                delete(model).where(model.created_at >= start, model.created_at < end)
+            )).rowcount
+        if removed != expected:
+            raise ArchiveError(
+                f"{table} {month_label(start)} changed during archival ({expected} -> {removed} rows); rerun"
+            )
+    if partitioned:
+        # Idempotency keys of archived decisions expire with them
+        await db.execute(text(
+            "DELETE FROM decision_idempotency_keys WHERE created_at >= :start AND created_at < :end"
+        ), {"start": start, "end": end})
+    for table in detach:
+        await drop_partition(db, table, start)
+
+
+async def archive_month(
+    session_factory: Callable[[], AsyncSession],
+    month: datetime,
+    archive_dir: str,
+    batch_size: int = 10000
+) -> dict:
+    """Move one month of decisions and audit_log to Parquet; returns the rows archived per table."""
+    start, end = month, add_months(month, 1)
+    async with session_factory() as db:
+        counts = {table: await _count(db, table, start, end) for table in PARTITIONED_TABLES}
+
+    manifest = load_manifest(archive_dir)
+    entries = []
+    committing = False
+    try:
+        for table, count in counts.items():
+            if not count:
+                continue
+            relative = await _write_table_month(session_factory, archive_dir, table, start, end, batch_size)
+            written = await asyncio.to_thread(_parquet_rows, os.path.join(archive_dir, relative))
+            entries.append({
+                "table": table,
+                "month": month_label(start),
+                "path": relative,
+                "rows": written,
+                "sha256": await asyncio.to_thread(_sha256, os.path.join(archive_dir, relative)),
+                "status": "pending",
+                "archived_at": utcnow().isoformat()
+            })
+            if written != count:
+                raise ArchiveError(f"{table} {month_label(start)}: wrote {written} rows, expected {count}")
+        manifest["files"].extend(entries)
+        save_manifest(archive_dir, manifest)
+
+        for attempt in range(1, REMOVE_ATTEMPTS + 1):
+            try:
+                async with session_factory() as db:
+                    await _remove_month(db, start, end, counts)
+                    committing = True
+                    await db.commit()
+                break
+            except DBAPIError as e:
+                if committing or not is_lock_timeout(e) or attempt == REMOVE_ATTEMPTS:
+                    raise
+                logger.warning(f"Archiving {month_label(start)}: parent tables busy, retrying ({attempt})")
+                await asyncio.sleep(attempt)
+    except BaseException:
+        # If the commit itself failed its outcome is unknown: leave the files
+        # pending for the next run to reconcile against the database
+        if not committing:
+            _discard(archive_dir, manifest, entries)
+        raise
+
+    for entry in entries:
+        entry["status"] = "complete"
+    save_manifest(archive_dir, manifest)
+    return {"month": month_label(start), **counts}
+
+
+def _discard(archive_dir: str, manifest: dict, entries: list[dict]):
+    for entry in entries:
+        path = os.path.join(archive_dir, entry["path"])
+        if os.path.exists(path):
+            os.remove(path)
+    manifest["files"] = [e for e in manifest["files"] if e not in entries]
+    save_manifest(archive_dir, manifest)
+
+
+async def _reconcile_pending(session_factory: Callable[[], AsyncSession], archive_dir: str) -> list[str]:
+    """Finish or roll back months left pending by an interrupted run."""
+    manifest = load_manifest(archive_dir)
+    pending = [e for e in manifest["files"] if e["status"] == "pending"]
+    if not pending:
+        return []
+    reconciled = []
+    async with session_factory() as db:
+        for month in sorted({e["month"] for e in pending}):
+            start = month_start(datetime.fromisoformat(month + "-01"))
+            entries = [e for e in pending if e["month"] == month]
+            remaining = sum([await _count(db, e["table"], start, add_months(start, 1)) for e in entries])
+            if remaining:
+                _discard(archive_dir, manifest, entries)
+            else:
+                for entry in entries:
+                    entry["status"] = "complete"
+            reconciled.append(month)
+    save_manifest(archive_dir, manifest)
+    return reconciled
+
+
+def prune_archives(archive_dir: str, now: datetime, retention_months: int) -> list[str]:
+    """Delete archived months older than retention_months (0 keeps everything)."""
+    if retention_months <= 0:
+        return []
+    oldest_kept = month_label(add_months(month_start(now), -retention_months))
+    manifest = load_manifest(archive_dir)
+    expired = [e for e in manifest["files"] if e["month"] < oldest_kept and e["status"] == "complete"]
+    for entry in expired:
+        path = os.path.join(archive_dir, entry["path"])
+        if os.path.exists(path):
+            os.remove(path)
+    manifest["files"] = [e for e in manifest["files"] if e not in expired]
+    if expired:
+        save_manifest(archive_dir, manifest)
+    return sorted({e["month"] for e in expired})
+
+
+async def cold_months(db: AsyncSession, cutoff: datetime) -> list[datetime]:
+    """Months before cutoff that still have rows in either table, oldest first."""
+    months, after = [], None
+    while True:
+        oldest = [
+            await db.scalar(
+                select(func.min(model.created_at))
+                .where(model.created_at < cutoff, *([model.created_at >= after] if after else []))
+            )
+            for model in ARCHIVE_MODELS.values()
+        ]
+        oldest = [value for value in oldest if value is not None]
+        if not oldest:
+            return months
+        months.append(month_start(min(oldest)))
+        after = add_months(months[-1], 1)
+
+
+async def _drop_empty_partitions(db: AsyncSession, cutoff: datetime) -> list[str]:
+    """Drop month partitions before cutoff that hold no rows (PostgreSQL)."""
+    dropped = []
+    if not await is_partitioned(db):
+        return dropped
+    for table in PARTITIONED_TABLES:
+        for name in await list_partitions(db, table):
+            suffix = name.removeprefix(f"{table}_p")
+            if not suffix.isdigit() or f"{suffix[:4]}-{suffix[4:]}" >= month_label(cutoff):
+                continue
+            if not await db.scalar(text(f"SELECT NOT EXISTS (SELECT 1 FROM {name})")):
+                continue
+            # One short transaction per partition: detaching locks the parent
+            try:
+                await drop_partition(db, table, month_start(datetime.fromisoformat(f"{suffix[:4]}-{suffix[4:]}-01")))
+                await db.commit()
+                dropped.append(name)
+            except DBAPIError as e:
+                await db.rollback()
+                if not is_lock_timeout(e):
+                    raise
+                logger.warning(f"Skipped dropping {name}: {table} busy; the next run retries")
+    return dropped
+
+
+async def archive_cold_months(
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    archive_dir: Optional[str] = None,
+    now: Optional[datetime] = None,
+    hot_months: Optional[int] = None,
+    retention_months: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    dry_run: bool = False
+) -> dict:
+    """Archive every month before the hot cutoff, then apply archive retention."""
+    archive_dir = archive_dir or settings.ARCHIVE_DIR
+    now = now or utcnow()
+    cutoff = hot_cutoff(now, hot_months)
+    try:
+        parquet_schema([])
+    except ExportError:
+        raise ArchiveError("Archival requires pyarrow, which is not installed") from None
+    async with session_factory() as db:
+        if db.bind.dialect.name == "postgresql" and not await is_partitioned(db):
+            raise ArchiveError("decisions and audit_log are not partitioned; run `python -m app.archive partition` first")
+    os.makedirs(archive_dir, exist_ok=True)
+
+    reconciled = [] if dry_run else await _reconcile_pending(session_factory, archive_dir)
+    async with session_factory() as db:
+        months = await cold_months(db, cutoff)
+
+    archived = []
+    for month in months:
+        if dry_run:
+            async with session_factory() as db:
+                archived.append({
+                    "month": month_label(month),
+                    **{table: await _count(db, table, month, add_months(month, 1)) for table in PARTITIONED_TABLES}
+                })
+            continue
+        result = await archive_month(session_factory, month, archive_dir, batch_size or settings.EXPORT_BATCH_SIZE)
+        logger.info(f"Archived {result}")
+        archived.append(result)
+    if not dry_run:
+        async with session_factory() as db:
+            dropped = await _drop_empty_partitions(db, cutoff)
+        if dropped:
+            logger.info(f"Dropped empty partitions: {', '.join(dropped)}")
+
+    retention = settings.ARCHIVE_RETENTION_MONTHS if retention_months is None else retention_months
+    return {
+        "cutoff": cutoff.isoformat(),
+        "dry_run": dry_run,
+        "reconciled": reconciled,
+        "archived": archived,
+        "pruned": [] if dry_run else prune_archives(archive_dir, now, retention)
+    }
+
+
+async def describe(session_factory: Callable[[], AsyncSession] = AsyncSessionLocal, archive_dir: Optional[str] = None) -> dict:
+    archive_dir = archive_dir or settings.ARCHIVE_DIR
+    async with session_factory() as db:
+        partitions = (
+            {table: await list_partitions(db, table) for table in PARTITIONED_TABLES}
+            if await is_partitioned(db) else {}
+        )
+    months: dict[str, dict] = {}
+    for entry in load_manifest(archive_dir)["files"]:
+        month = months.setdefault(entry["month"], {})
+        month[entry["table"]] = month.get(entry["table"], 0) + entry["rows"]
+    return {"partitions": partitions, "hot_cutoff": hot_cutoff().isoformat(), "archived_months": months}
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Manage decision partitions and cold-month archives.")
+    parser.add_argument("command", choices=["partition", "maintain", "run", "list"])
+    parser.add_argument("--dry-run", action="store_true", help="run: report the months that would be archived")
+    parser.add_argument("--hot-months", type=int, help="Override PARTITION_HOT_MONTHS")
+    parser.add_argument("--archive-dir", help="Override ARCHIVE_DIR")
+    args = parser.parse_args(argv)
+
+    async def run():
+        try:
+            if args.command == "partition":
+                return {"partitioned": await partition_tables()}
+            if args.command == "maintain":
+                return {"created": await maintain_partitions()}
+            if args.command == "run":
+                return await archive_cold_months(
+                    archive_dir=args.archive_dir, hot_months=args.hot_months, dry_run=args.dry_run
+                )
+            return await describe(archive_dir=args.archive_dir)
+        finally:
+            await async_engine.dispose()
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Content-addressed cache for LLM explanations.
+
+The prompt is rendered from ExplanationFeatures, which buckets the claim's
+numbers (amount band, history and risk-score deciles, 10% fraud-probability
+band) next to the policy's risk level and the incident type, so similar claims share one
+prompt. Keys are the SHA-256 of that prompt, the LLM model name and the policy
+version. Lookups hit an in-memory LRU first and then an optional SQLite file
+that survives restarts.
+"""
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+AMOUNT_BAND_EDGES = (500, 1000, 2500, 5000, 10000, 20000, 50000, 100000)
+
+
+@dataclass(frozen=True)
+class ExplanationFeatures:
+    """Bucketed explanation inputs; everything the prompt (and so the cache key) depends on."""
+    risk_level: str
+    amount_band: str
+    incident_type: str
+    history_band: str
+    risk_band: str
+    fraud_band: str
+
+
+def _amount_band(amount: float) -> str:
+    lower = 0
+    for edge in AMOUNT_BAND_EDGES:
+        if amount < edge:
+            return f"under ${edge:,}" if lower == 0 else f"${lower:,}-${edge:,}"
+        lower = edge
+    return f"${lower:,} and above"
+
+
+def _band(value: float, width: float, top: float) -> tuple[float, float]:
+    lower = min(max(value, 0.0) // width * width, top - width)
+    return lower, lower + width
+
+
+def explanation_features(
+    amount: float,
+    incident_type: str,
+    history_score: float,
+    risk_score: float,
+    fraud_probability: float,
+    risk_level: str
+) -> ExplanationFeatures:
+    """Bucket the inputs; risk_level comes from the deciding policy's thresholds."""
+    history = _band(history_score, 10.0, 100.0)
+    risk = _band(risk_score, 10.0, 100.0)
+    fraud = _band(fraud_probability * 100, 10.0, 100.0)
+    return ExplanationFeatures(
+        risk_level=risk_level,
+        amount_band=_amount_band(amount),
+        incident_type=" ".join(incident_type.lower().split()),
+        history_band=f"{history[0]:.0f}-{history[1]:.0f}/100",
+        risk_band=f"{risk[0]:.0f}-{risk[1]:.0f}/100",
+        fraud_band=f"{fraud[0]:.0f}-{fraud[1]:.0f}%"
+    )
+
+
+class ExplanationCache:
+    def __init__(self, maxsize: int = 5000, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = path
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if path:
+            self._open(path)
+
+    def _open(self, path: str):
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS explanations ("
+                "key TEXT PRIMARY KEY, model TEXT, policy_version TEXT, "
+                "explanation TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Explanation cache disk tier disabled: {e}")
+            self._db = None
+
+    @staticmethod
+    def key(prompt: str, model: str, policy_version: str) -> str:
+        return hashlib.sha256(f"{model}\x1f{policy_version}\x1f{prompt}".encode()).hexdigest()
+
+    def _remember(self, key: str, explanation: str):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = explanation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            explanation = self._entries.get(key)
+            if explanation is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return explanation
+        if self._db is not None:
+            explanation = await asyncio.to_thread(self._disk_get, key)
+            if explanation is not None:
+                self.disk_hits += 1
+                self._remember(key, explanation)
+                return explanation
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, explanation: str, model: str = "", policy_version: str = ""):
+        self._remember(key, explanation)
+        self.stores += 1
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_put, key, explanation, model, policy_version)
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT explanation FROM explanations WHERE key = ?", (key,)
+                ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.warning(f"Explanation cache read failed: {e}")
+            return None
+
+    def _disk_put(self, key: str, explanation: str, model: str, policy_version: str):
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO explanations VALUES (?, ?, ?, ?, ?)",
+                    (key, model, policy_version, explanation, time.time())
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Explanation cache write failed: {e}")
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_size": len(self._entries),
+            "maxsize": self.maxsize,
+            "disk_enabled": self._db is not None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+        }
+
+
+explanation_cache = ExplanationCache(
+    maxsize=settings.EXPLANATION_CACHE_SIZE,
+    path=settings.EXPLANATION_CACHE_PATH
+)
@@ -1,4 +1,7 @@
+import asyncio
+import time
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 from pymongo.database import Database
 from pymongo.collection import Collection
 from app.config import settings
@@ -45,5 +48,174 @@ class MongoDBClient:
             logger.info(f"Stored claim {claim_id} in MongoDB")
         except Exception as e:
             logger.error(f"Failed to store claim in MongoDB: {e}")
+    
+    def store_claims(self, documents: list[dict]):
+        """Bulk-store raw claims; each dict has claim_id, customer_id, payload and decision_id."""
+        if not self.is_connected():
+            logger.warning("MongoDB not connected, skipping claim storage")
+            return
+        if not documents:
+            return
+        
+        try:
+            received_at = datetime.utcnow()
+            self.collection.insert_many(
+                [{**document, "received_at": received_at} for document in documents],
+                ordered=False
+            )
+            logger.info(f"Stored {len(documents)} claims in MongoDB")
+        except Exception as e:
+            logger.error(f"Failed to store claims in MongoDB: {e}")
+
+
+class RawClaimWriter:
+    """
+    Write-behind queue for raw claims.
+
+    Request handlers enqueue documents and return; a single background task
+    drains the queue with unordered insert_many batches, flushing when a batch
+    fills up or flush_interval elapses. When the queue is full, enqueue waits
+    (backpressure) for up to enqueue_timeout before rejecting the document.
+    """
+    
+    def __init__(
+        self,
+        client: MongoDBClient,
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        enqueue_timeout: float = 1.0
+    ):
+        self.client = client
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.enqueued = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self._total_flush_seconds = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+    
+    async def start(self):
+        if self.running or not self.client.is_connected():
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self, timeout: float = 10.0):
+        """Flush everything still queued (up to timeout), then stop."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Raw claim queue not drained; dropping {self._queue.qsize()} document(s)")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+    
+    async def enqueue(self, claim_id: str, customer_id: str, payload: dict, decision_id: str) -> bool:
+        return await self.enqueue_many([{
+            "claim_id": claim_id,
+            "customer_id": customer_id,
+            "payload": payload,
+            "decision_id": decision_id
+        }]) == 1
+    
+    async def enqueue_many(self, documents: list[dict]) -> int:
+        """Queue raw claims for storage; returns how many were accepted."""
+        if not self.running:
+            # No writer loop (e.g. scripts): store inline without blocking the loop
+            await asyncio.to_thread(self.client.store_claims, documents)
+            return len(documents)
+        
+        received_at = datetime.utcnow()
+        accepted = 0
+        for document in documents:
+            try:
+                await asyncio.wait_for(
+                    self._queue.put({**document, "received_at": received_at}),
+                    self.enqueue_timeout
+                )
+            except asyncio.TimeoutError:
+                self.rejected += len(documents) - accepted
+                logger.error(f"Raw claim queue full; rejected {len(documents) - accepted} document(s)")
+                break
+            accepted += 1
+        self.enqueued += accepted
+        return accepted
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _flush(self, batch: list[dict]):
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.client.collection.insert_many, batch, ordered=False)
+            self.written += len(batch)
+        except BulkWriteError as e:
+            errors = len(e.details.get("writeErrors", []))
+            self.written += e.details.get("nInserted", len(batch) - errors)
+            self.failed += errors
+            logger.error(f"MongoDB bulk insert had {errors} write error(s)")
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to store {len(batch)} claims in MongoDB: {e}")
+        elapsed = time.perf_counter() - started
+        self.flushes += 1
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        self._total_flush_seconds += elapsed
+    
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+            "avg_flush_seconds": self._total_flush_seconds / self.flushes if self.flushes else 0.0
+        }
 
 mongo_client = MongoDBClient()
+raw_claim_writer = RawClaimWriter(
+    mongo_client,
+    queue_size=settings.MONGO_WRITE_QUEUE_SIZE,
+    batch_size=settings.MONGO_WRITE_BATCH_SIZE,
+    flush_interval=settings.MONGO_WRITE_FLUSH_INTERVAL,
+    enqueue_timeout=settings.MONGO_ENQUEUE_TIMEOUT
+)
@@ -1,7 +1,11 @@
+import asyncio
+import json
 import httpx
+from app.clients.explanation_cache import explanation_cache, explanation_features
 from app.config import settings
+from app.scoring.policy import get_policy
 from app.utils.logging import get_logger
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 logger = get_logger(__name__)
 
@@ -10,6 +14,58 @@ class OllamaClient:
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.OLLAMA_MODEL
         self.available = self.base_url is not None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive connection pool, bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=settings.OLLAMA_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OLLAMA_MAX_CONNECTIONS
+                )
+            )
+            self._client_loop = loop
+        return self._client
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+    
+    def build_prompt(
+        self,
+        amount: float,
+        incident_type: str,
+        history_score: float,
+        risk_score: float,
+        fraud_probability: float,
+        policy_version: Optional[str] = None
+    ) -> str:
+        """Prompt rendered from bucketed inputs, so claims in the same buckets share a cache entry."""
+        try:
+            policy = get_policy(policy_version)
+        except KeyError:
+            # Retired policy (e.g. streaming an old decision): use the current thresholds
+            policy = get_policy()
+        features = explanation_features(
+            amount, incident_type, history_score, risk_score, fraud_probability,
+            policy.risk_level(fraud_probability)
+        )
+        
+        return f"""Explain why this insurance claim is considered {features.risk_level} risk based on these factors:
+- Amount: {features.amount_band}
+- Incident type: {features.incident_type}
+- Customer history score: {features.history_band}
+- Risk score: {features.risk_band}
+- Fraud probability: {features.fraud_band}
+
+Provide 3 bullet reasons and 1 recommended next action. Keep it business-friendly and compliance-aware. Use professional insurance terminology."""
     
     async def generate_explanation(
         self,
@@ -17,43 +73,125 @@ class OllamaClient:
         incident_type: str,
         history_score: float,
         risk_score: float,
-        fraud_probability: float
+        fraud_probability: float,
+        policy_version: Optional[str] = None
     ) -> Optional[str]:
-        """Generate explanation using Ollama LLM."""
+        """Generate explanation using Ollama LLM (served from the explanation cache when possible)."""
         if not self.available:
             return None
         
-        risk_level = "LOW" if fraud_probability < 0.35 else "MEDIUM" if fraud_probability < 0.70 else "HIGH"
-        
-        prompt = f"""Explain why this insurance claim is considered {risk_level} risk based on these factors:
-- Amount: ${amount:,.2f}
-- Incident type: {incident_type}
-- Customer history score: {history_score:.1f}/100
-- Risk score: {risk_score:.2f}/100
-- Fraud probability: {fraud_probability:.1%}
-
-Provide 3 bullet reasons and 1 recommended next action. Keep it business-friendly and compliance-aware. Use professional insurance terminology."""
+        prompt = self.build_prompt(amount, incident_type, history_score, risk_score, fraud_probability, policy_version)
+        cache_key = explanation_cache.key(prompt, self.model, policy_version or settings.POLICY_VERSION)
+        cached = await explanation_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": False
-                    }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("response", "").strip()
-                else:
-                    logger.warning(f"Ollama returned status {response.status_code}")
-                    return None
+            response = await self._get_client().post(
+                "/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": False
+                }
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                explanation = data.get("response", "").strip()
+                if explanation:
+                    await explanation_cache.put(
+                        cache_key, explanation, self.model, policy_version or settings.POLICY_VERSION
+                    )
+                return explanation
+            else:
+                logger.warning(f"Ollama returned status {response.status_code}")
+                return None
         
         except Exception as e:
             logger.warning(f"Ollama request failed: {e}")
             return None
+    
+    async def stream_explanation(
+        self,
+        amount: float,
+        incident_type: str,
+        history_score: float,
+        risk_score: float,
+        fraud_probability: float,
+        policy_version: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield explanation text chunks as Ollama generates them.
+        A cached explanation is yielded as a single chunk; the completed text is cached.
+        """
+        if not self.available:
+            return
+        
+        policy_version = policy_version or settings.POLICY_VERSION
+        prompt = self.build_prompt(amount, incident_type, history_score, risk_score, fraud_probability, policy_version)
+        cache_key = explanation_cache.key(prompt, self.model, policy_version)
+        cached = await explanation_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        async with self._get_client().stream(
+            "POST",
+            "/api/generate",
+            json={
+                "model": self.model,
+                "prompt": prompt,
+                "stream": True
+            }
+        ) as response:
+            if response.status_code != 200:
+                raise httpx.HTTPStatusError(
+                    f"Ollama returned status {response.status_code}",
+                    request=response.request, response=response
+                )
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                token = data.get("response", "")
+                if token:
+                    chunks.append(token)
+                    yield token
+                if data.get("done"):
+                    break
+        
+        explanation = "".join(chunks).strip()
+        if explanation:
+            await explanation_cache.put(cache_key, explanation, self.model, policy_version)
+    
+    async def generate_explanation_within(
+        self,
+        budget: float,
+        amount: float,
+        incident_type: str,
+        history_score: float,
+        risk_score: float,
+        fraud_probability: float,
+        policy_version: Optional[str] = None
+    ) -> tuple[Optional[str], Optional[asyncio.Task]]:
+        """
+        Wait at most `budget` seconds for the LLM explanation.
+        
+        Returns (explanation, None) if it finished in time (explanation may be
+        None on failure), or (None, task) if the budget ran out; the task keeps
+        running so the caller can backfill the explanation later.
+        """
+        if not self.available:
+            return None, None
+        
+        task = asyncio.create_task(self.generate_explanation(
+            amount, incident_type, history_score, risk_score, fraud_probability, policy_version
+        ))
+        done, _ = await asyncio.wait({task}, timeout=budget)
+        if done:
+            return task.result(), None
+        return None, task
 
 ollama_client = OllamaClient()
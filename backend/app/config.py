@@ -3,14 +3,73 @@ from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # Opt-in group commit: score_claim writes are committed in micro-batches
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_MAX_BATCH: int = 256
+    GROUP_COMMIT_MAX_WAIT_MS: float = 5.0
     MONGODB_URI: str
+    # Write-behind raw-claim storage
+    MONGO_WRITE_QUEUE_SIZE: int = 10000
+    MONGO_WRITE_BATCH_SIZE: int = 500
+    MONGO_WRITE_FLUSH_INTERVAL: float = 0.5
+    MONGO_ENQUEUE_TIMEOUT: float = 1.0
     OLLAMA_BASE_URL: Optional[str] = None
     OLLAMA_MODEL: str = "llama3.1"
+    OLLAMA_TIMEOUT: float = 30.0
+    OLLAMA_MAX_CONNECTIONS: int = 10
+    # Seconds score_claim waits for the LLM before answering with the template
+    OLLAMA_LATENCY_BUDGET: float = 1.5
+    # LLM explanation cache: in-memory LRU plus optional SQLite file
+    EXPLANATION_CACHE_SIZE: int = 5000
+    EXPLANATION_CACHE_PATH: Optional[str] = None
     LOG_LEVEL: str = "INFO"
     API_KEY: Optional[str] = None
     SEED_TOKEN: str
+    SEED_MAX_COUNT: int = 100000  # per /api/seed call; use `python -m app.seeding` for more
     MODEL_VERSION: str = "rb-v1"
+    # Comma-separated "version=module:Class[@process]" scorer entries
+    MODEL_REGISTRY: str = "rb-v1=app.scoring.registry:RuleBasedScorer"
+    MODEL_PROCESS_WORKERS: int = 2
+    
+    # Shadow scoring: comma-separated "model_version[:policy_version]" challengers
+    SHADOW_CHALLENGERS: str = ""
+    SHADOW_QUEUE_SIZE: int = 1000
+    SHADOW_WORKERS: int = 2
+    SHADOW_FLUSH_SIZE: int = 100
+    SHADOW_FLUSH_INTERVAL: float = 1.0
     POLICY_VERSION: str = "policy-v1"
+    SCORE_BATCH_MAX_SIZE: int = 10000
+    NDJSON_CHUNK_SIZE: int = 1000
+    NDJSON_MAX_LINE_BYTES: int = 65536
+    DECISIONS_PAGE_MAX: int = 1000
+    STATS_DEFAULT_DAYS: int = 30
+    STATS_MAX_DAYS: int = 366
+    EXPORT_BATCH_SIZE: int = 10000  # rows per cursor fetch / Parquet row group
+    ROLLUPS_ENABLED: bool = True  # append rollup deltas on every decision write
+    ROLLUP_MERGE_INTERVAL: float = 1.0  # seconds between merges of deltas into decision_rollups_hourly
+    ROLLUP_MERGE_BATCH: int = 10000  # deltas per merge transaction
+    
+    # Monthly partitions (PostgreSQL) and cold-month archival
+    PARTITION_HOT_MONTHS: int = 6  # months kept in the database, including the current one
+    PARTITION_MONTHS_AHEAD: int = 2  # future partitions created in advance
+    ARCHIVE_DIR: str = "./archive"
+    ARCHIVE_RETENTION_MONTHS: int = 0  # archived months older than this are deleted; 0 keeps them
+    
+    # Background file-scoring jobs (uploads and output CSVs live in JOB_DIR)
+    JOB_DIR: str = "./jobs"
+    JOB_CHUNK_SIZE: int = 5000
+    JOB_WORKERS: int = 1
+    JOB_PROCESS_WORKERS: int = 2  # 0 scores chunks on a thread instead
+    JOB_LEASE_SECONDS: float = 300.0  # a running job whose lease lapses is taken over; must exceed one chunk
+    
+    # Scoring policies (JSON files, hot-reloaded by mtime; 0 disables polling)
+    POLICY_DIR: Optional[str] = None
+    POLICY_RELOAD_INTERVAL: float = 5.0
+    INCIDENT_CACHE_SIZE: int = 4096
+    SCORING_CACHE_SIZE: int = 10000  # 0 disables the scoring result cache
+    DECISION_CACHE_SIZE: int = 10000  # decision detail responses; 0 disables
     
     # Feature flags
     ENABLE_HF_EMBEDDINGS: bool = False
@@ -0,0 +1,122 @@
+"""
+Read-through cache for decision detail responses.
+
+A decision and its audit trail only change when an audit event is appended
+to an existing decision (explanation_updated from ExplanationBackfill,
+shadow_decision from ShadowEvaluator), so the rendered GET /api/decisions/{id}
+body is cached per decision in a bounded LRU together with a strong ETag
+(SHA-256 of the body). Such events are written through
+app.persistence.append_audit_events, which calls invalidate() once the
+transaction commits. A read that started before an invalidation does not
+store its (possibly stale) result.
+
+The cache is per process: with several workers, an event appended by one
+worker is not seen by another's cache until the entry is evicted.
+"""
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import settings
+
+
+def strong_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 If-None-Match: '*' or any listed tag (weak comparison, so W/ prefixes are ignored)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class DecisionDetailCache:
+    """Thread-safe LRU of (etag, body) keyed on decision_id."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[uuid.UUID, tuple[str, bytes]] = OrderedDict()
+        # Invalidation clock: decision_id -> clock value of its last invalidation
+        self._clock = 0
+        self._invalidated: OrderedDict[uuid.UUID, int] = OrderedDict()
+        self._forgotten = 0  # highest clock value dropped from _invalidated
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def get(self, decision_id: uuid.UUID) -> Optional[tuple[str, bytes]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(decision_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(decision_id)
+            self.hits += 1
+            return entry
+
+    def version(self, decision_id: uuid.UUID) -> int:
+        """Token to pass to put(); taken before reading the decision from the database."""
+        with self._lock:
+            return self._clock
+
+    def put(self, decision_id: uuid.UUID, body: bytes, version: int) -> str:
+        """Store a rendered body unless the decision was invalidated since `version`; returns its ETag."""
+        etag = strong_etag(body)
+        if not self.enabled:
+            return etag
+        with self._lock:
+            if max(self._invalidated.get(decision_id, 0), self._forgotten) > version:
+                return etag
+            self._entries[decision_id] = (etag, body)
+            self._entries.move_to_end(decision_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return etag
+
+    def invalidate(self, decision_id: uuid.UUID):
+        """Drop a decision's entry; call after committing a new audit event for it."""
+        with self._lock:
+            self._entries.pop(decision_id, None)
+            self._clock += 1
+            self._invalidated[decision_id] = self._clock
+            self._invalidated.move_to_end(decision_id)
+            # Old invalidations only matter to reads still in flight; forgetting
+            # one makes puts from reads older than it skip the cache instead
+            while len(self._invalidated) > max(self.maxsize, 1):
+                _, self._forgotten = self._invalidated.popitem(last=False)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+decision_detail_cache = DecisionDetailCache(maxsize=settings.DECISION_CACHE_SIZE)
@@ -0,0 +1,197 @@
+"""
+Streaming decision exports.
+
+Rows are read with a server-side cursor (AsyncSession.stream + yield_per) in
+batches of batch_size and encoded as they arrive: CSV text per batch, or one
+Parquet row group per batch. Only one batch is held in memory, and the first
+bytes (the CSV header, or the first row group) go out before the rest of the
+query has been read.
+
+Months moved out of the database by app.archive are read back from their
+Parquet files (filtered the same way) ahead of the live rows; each source is
+in created_at order.
+"""
+import asyncio
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Decision
+
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+EXPORT_COLUMNS = [
+    "decision_id", "claim_id", "customer_id", "model_version", "policy_version",
+    "incident_class", "risk_score", "fraud_probability", "decision", "created_at"
+]
+
+
+class ExportError(Exception):
+    """An export that cannot be produced (unsupported format, missing dependency)."""
+
+
+def _parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportError("Parquet export requires pyarrow, which is not installed") from None
+    return pyarrow, pyarrow.parquet
+
+
+def export_query(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    decisions: Optional[list[str]] = None,
+    model_version: Optional[str] = None,
+    include_explanation: bool = False
+) -> tuple[list[str], Select]:
+    """(column names, SELECT) in (created_at, decision_id) order - the keyset index order."""
+    columns = EXPORT_COLUMNS + (["explanation"] if include_explanation else [])
+    query = select(*(getattr(Decision, c) for c in columns)).order_by(Decision.created_at, Decision.decision_id)
+    if since is not None:
+        query = query.filter(Decision.created_at >= since)
+    if until is not None:
+        query = query.filter(Decision.created_at < until)
+    if decisions:
+        query = query.filter(Decision.decision.in_(decisions))
+    if model_version is not None:
+        query = query.filter(Decision.model_version == model_version)
+    return columns, query
+
+
+def read_archived(
+    paths: list[str],
+    columns: list[str],
+    batch_size: int = 10000,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    decisions: Optional[list[str]] = None,
+    model_version: Optional[str] = None
+) -> Iterator[list]:
+    """Row batches from archived decision files, filtered like export_query."""
+    pa, pq = _parquet()
+    import pyarrow.compute as pc
+
+    needed = list(dict.fromkeys(columns + ["created_at", "decision", "model_version"]))
+    timestamp = pa.timestamp("us", tz="UTC")
+    for path in paths:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=needed):
+            conditions = []
+            if since is not None:
+                conditions.append(pc.greater_equal(batch.column("created_at"), pa.scalar(since, type=timestamp)))
+            if until is not None:
+                conditions.append(pc.less(batch.column("created_at"), pa.scalar(until, type=timestamp)))
+            if decisions:
+                conditions.append(pc.is_in(batch.column("decision"), value_set=pa.array(decisions)))
+            if model_version is not None:
+                conditions.append(pc.equal(batch.column("model_version"), model_version))
+            for condition in conditions:
+                batch = batch.filter(condition)
+            if batch.num_rows:
+                yield list(zip(*(batch.column(name).to_pylist() for name in columns)))
+
+
+async def _batches(
+    session_factory: Callable[[], AsyncSession],
+    query: Select,
+    batch_size: int,
+    archived: Optional[Iterator[list]] = None
+) -> AsyncIterator[list]:
+    if archived is not None:
+        while (rows := await asyncio.to_thread(next, archived, None)) is not None:
+            yield rows
+    async with session_factory() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def iter_csv(
+    session_factory: Callable[[], AsyncSession],
+    columns: list[str],
+    query: Select,
+    batch_size: int = 10000,
+    archived: Optional[Iterator[list]] = None
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    async for rows in _batches(session_factory, query, batch_size, archived):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in rows
+        )
+        yield buffer.getvalue()
+
+
+class _DrainableSink:
+    """Write-only file object for ParquetWriter whose bytes are handed out after each row group."""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def parquet_schema(columns: list[str]):
+    pa, _ = _parquet()
+    types = {
+        "risk_score": pa.float64(),
+        "fraud_probability": pa.float64(),
+        "created_at": pa.timestamp("us", tz="UTC")
+    }
+    return pa.schema([(c, types.get(c, pa.string())) for c in columns])
+
+
+async def iter_parquet(
+    session_factory: Callable[[], AsyncSession],
+    columns: list[str],
+    query: Select,
+    batch_size: int = 10000,
+    archived: Optional[Iterator[list]] = None
+) -> AsyncIterator[bytes]:
+    pa, pq = _parquet()
+    schema = parquet_schema(columns)
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for rows in _batches(session_factory, query, batch_size, archived):
+            arrays = [
+                pa.array(
+                    [str(value) if value is not None else None for value in values]
+                    if schema.field(name).type == pa.string() else values,
+                    type=schema.field(name).type
+                )
+                for name, values in zip(columns, zip(*rows))
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -1,9 +1,21 @@
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from app.routers import health, claims, decisions
+from app.routers import health, claims, decisions, jobs, policies, rollups
 from app.config import settings
+from app.clients.mongo import raw_claim_writer
+from app.clients.ollama import ollama_client
+from app.clients.explanation_cache import explanation_cache
+from app.scoring.explanations import explanation_backfill
+from app.scoring.jobs import job_runner
+from app.database import async_engine
+from app.persistence import group_commit_writer
+from app.partitions import maintain_partitions
+from app.rollups import rollup_merger
+from app.scoring.registry import model_registry
+from app.scoring.shadow import shadow_evaluator
 from app.utils.logging import get_trace_id, set_trace_id, get_logger
+from contextlib import asynccontextmanager
 import logging
 import uuid
 
@@ -15,10 +27,40 @@ logging.basicConfig(
 
 logger = get_logger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm-load scorers and start background writers; drain them on shutdown."""
+    model_registry.load()
+    try:
+        await maintain_partitions()
+    except Exception as e:
+        logger.error(f"Partition maintenance failed: {e}")
+    await raw_claim_writer.start()
+    if settings.GROUP_COMMIT_ENABLED:
+        await group_commit_writer.start()
+    if settings.ROLLUPS_ENABLED:
+        await rollup_merger.start()
+    await shadow_evaluator.start()
+    await job_runner.start()
+    yield
+    await job_runner.stop()
+    await explanation_backfill.drain()
+    await ollama_client.aclose()
+    explanation_cache.close()
+    await shadow_evaluator.stop()
+    await group_commit_writer.stop()
+    await rollup_merger.stop()
+    await raw_claim_writer.stop()
+    model_registry.shutdown()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title="DEEVO Intelligence Lab API",
     description="Insurance Claims Scoring & Decision Intelligence",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -28,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 
@@ -84,6 +127,9 @@ async def not_found_handler(request: Request, exc):
 app.include_router(health.router, tags=["Health"])
 app.include_router(claims.router, tags=["Claims"])
 app.include_router(decisions.router, tags=["Decisions"])
+app.include_router(policies.router, tags=["Policies"])
+app.include_router(jobs.router, tags=["Jobs"])
+app.include_router(rollups.router, tags=["Rollups"])
 
 
 @app.get("/")
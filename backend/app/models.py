@@ -1,20 +1,31 @@
 import uuid
-from sqlalchemy import Column, String, Float, Text, ForeignKey, TIMESTAMP, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Float, Integer, BigInteger, Text, Index, TIMESTAMP, JSON, DDL, event, literal_column
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy import TypeDecorator
 from app.database import Base
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class GUID(TypeDecorator):
-    """Platform-independent GUID type - always uses String(36) for compatibility."""
+    """Platform-independent GUID type - native UUID on PostgreSQL, String(36) elsewhere."""
     impl = String(36)
     cache_ok = True
 
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(UUID(as_uuid=True))
+        return dialect.type_descriptor(String(36))
+
     def process_bind_param(self, value, dialect):
         if value is not None:
-            if isinstance(value, uuid.UUID):
-                return str(value)
+            if dialect.name == "postgresql":
+                return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
             return str(value)
         return value
 
@@ -26,26 +37,166 @@ class GUID(TypeDecorator):
         return value
 
 
+# JSONB on PostgreSQL to match the migrations
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+# Text search configuration of the explanation full-text index
+FTS_CONFIG = "english"
+
+
+def explanation_tsvector(explanation):
+    """to_tsvector expression of the GIN index; the search filter must use the same expression."""
+    return func.to_tsvector(literal_column(f"'{FTS_CONFIG}'"), explanation)
+
+
 class Decision(Base):
+    # Range-partitioned by month on created_at in PostgreSQL (migration 009,
+    # app.partitions), so created_at is part of the primary key
     __tablename__ = "decisions"
     
     decision_id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     claim_id = Column(Text, nullable=False, index=True)
-    customer_id = Column(Text, nullable=False, index=True)
+    customer_id = Column(Text, nullable=False)
     model_version = Column(Text, nullable=False, default="rb-v1")
     policy_version = Column(Text, nullable=False, default="policy-v1")
+    incident_class = Column(Text, nullable=True)
     risk_score = Column(Float, nullable=False)
     fraud_probability = Column(Float, nullable=False)
     decision = Column(Text, nullable=False)
     explanation = Column(Text, nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    # Unique per decision; on PostgreSQL enforced through decision_idempotency_keys,
+    # since a partitioned table cannot have a unique index without created_at
+    idempotency_key = Column(Text, nullable=True, unique=True, index=True)
+    # SHA-256 of the request payload, so a reused key with a different payload is rejected
+    request_hash = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), primary_key=True, default=utcnow, server_default=func.now())
+    
+    # Read-only; load explicitly (joinedload) - lazy loading is not available under asyncio.
+    # No foreign key: audit_log is partitioned separately and may outlive archived decisions.
+    audit_events = relationship(
+        "AuditLog",
+        primaryjoin="Decision.decision_id == foreign(AuditLog.decision_id)",
+        order_by="AuditLog.created_at",
+        viewonly=True,
+        lazy="raise"
+    )
+    
+    __table_args__ = (
+        # Keyset pagination: ORDER BY created_at DESC, decision_id DESC
+        Index("ix_decisions_created_at_decision_id", "created_at", "decision_id"),
+        # Filtered listings keep the keyset order inside each equality prefix
+        Index("ix_decisions_customer_id_created_at", "customer_id", "created_at", "decision_id"),
+        Index("ix_decisions_decision_created_at", "decision", "created_at", "decision_id"),
+        Index("ix_decisions_risk_score", "risk_score"),
+        # Full-text search over explanations (PostgreSQL; SQLite uses decisions_fts below)
+        Index(
+            "ix_decisions_explanation_fts", explanation_tsvector(explanation), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+# SQLite counterpart of ix_decisions_explanation_fts: an external-content FTS5
+# table kept in sync by triggers
+for statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS decisions_fts USING fts5("
+    "explanation, content='decisions', content_rowid='rowid', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS decisions_fts_ai AFTER INSERT ON decisions BEGIN "
+    "INSERT INTO decisions_fts(rowid, explanation) VALUES (new.rowid, new.explanation); END",
+    "CREATE TRIGGER IF NOT EXISTS decisions_fts_ad AFTER DELETE ON decisions BEGIN "
+    "INSERT INTO decisions_fts(decisions_fts, rowid, explanation) VALUES ('delete', old.rowid, old.explanation); END",
+    "CREATE TRIGGER IF NOT EXISTS decisions_fts_au AFTER UPDATE OF explanation ON decisions BEGIN "
+    "INSERT INTO decisions_fts(decisions_fts, rowid, explanation) VALUES ('delete', old.rowid, old.explanation); "
+    "INSERT INTO decisions_fts(rowid, explanation) VALUES (new.rowid, new.explanation); END",
+):
+    event.listen(Decision.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Decision.__table__, "after_drop", DDL("DROP TABLE IF EXISTS decisions_fts").execute_if(dialect="sqlite"))
 
 
 class AuditLog(Base):
+    # Range-partitioned by month on created_at in PostgreSQL, like decisions
     __tablename__ = "audit_log"
     
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    decision_id = Column(GUID(), ForeignKey("decisions.decision_id"), nullable=False)
+    decision_id = Column(GUID(), nullable=False)
     event_type = Column(Text, nullable=False)
-    event_payload = Column(JSON, nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    event_payload = Column(JSONType, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), primary_key=True, default=utcnow, server_default=func.now())
+    
+    __table_args__ = (
+        # Decision detail: WHERE decision_id = ? ORDER BY created_at
+        Index("ix_audit_log_decision_id_created_at", "decision_id", "created_at"),
+    )
+
+
+class ScoringJob(Base):
+    __tablename__ = "scoring_jobs"
+    
+    job_id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    status = Column(Text, nullable=False, default="queued", index=True)
+    input_format = Column(Text, nullable=False)
+    input_path = Column(Text, nullable=False)
+    output_path = Column(Text, nullable=False)
+    model_version = Column(Text, nullable=False)
+    policy_version = Column(Text, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    total_rows = Column(Integer, nullable=True)
+    # Progress as of the last committed chunk; a resumed job continues from here
+    processed_rows = Column(Integer, nullable=False, default=0)
+    scored_rows = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    output_offset = Column(BigInteger, nullable=False, default=0)
+    errors = Column(JSONType, nullable=False, default=list)
+    last_error = Column(Text, nullable=True)
+    # Runner holding the job; it renews lease_until per chunk, and others
+    # may claim a running job only once the lease has lapsed
+    owner = Column(Text, nullable=True)
+    lease_until = Column(TIMESTAMP(timezone=True), nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), default=utcnow, server_default=func.now(), nullable=False)
+    started_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+
+class RollupSumsMixin:
+    """Additive columns shared by the hourly rollups and their pending deltas."""
+    decision_count = Column(BigInteger, nullable=False, default=0)
+    risk_score_sum = Column(Float, nullable=False, default=0.0)
+    fraud_probability_sum = Column(Float, nullable=False, default=0.0)
+    # Risk score histogram, buckets of 10 points; the last also holds scores >= 100
+    risk_hist_0 = Column(BigInteger, nullable=False, default=0)
+    risk_hist_1 = Column(BigInteger, nullable=False, default=0)
+    risk_hist_2 = Column(BigInteger, nullable=False, default=0)
+    risk_hist_3 = Column(BigInteger, nullable=False, default=0)
+    risk_hist_4 = Column(BigInteger, nullable=False, default=0)
+    risk_hist_5 = Column(BigInteger, nullable=False, default=0)
+    risk_hist_6 = Column(BigInteger, nullable=False, default=0)
+    risk_hist_7 = Column(BigInteger, nullable=False, default=0)
+    risk_hist_8 = Column(BigInteger, nullable=False, default=0)
+    risk_hist_9 = Column(BigInteger, nullable=False, default=0)
+
+
+class DecisionRollup(RollupSumsMixin, Base):
+    """Hourly decision aggregates, merged from decision_rollup_deltas by app.rollups.RollupMerger."""
+    __tablename__ = "decision_rollups_hourly"
+    
+    bucket_start = Column(TIMESTAMP(timezone=True), primary_key=True)
+    model_version = Column(Text, primary_key=True)
+    policy_version = Column(Text, primary_key=True)
+    incident_class = Column(Text, primary_key=True)  # "unclassified" for decisions without one
+    decision = Column(Text, primary_key=True)
+
+
+class DecisionRollupDelta(RollupSumsMixin, Base):
+    """
+    Append-only rollup increments written in the same transaction as the
+    decisions; plain inserts, so concurrent writers never wait on a shared
+    rollup row.
+    """
+    __tablename__ = "decision_rollup_deltas"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    bucket_start = Column(TIMESTAMP(timezone=True), nullable=False)
+    model_version = Column(Text, nullable=False)
+    policy_version = Column(Text, nullable=False)
+    incident_class = Column(Text, nullable=False)
+    decision = Column(Text, nullable=False)
@@ -0,0 +1,270 @@
+"""
+Monthly range partitions of decisions and audit_log (PostgreSQL).
+
+partition_tables turns both tables into PARTITION BY RANGE (created_at)
+parents by rebuilding them and copying every row, which takes both tables
+offline for the duration. Migration 009 only does this on an empty database;
+an existing deployment runs `python -m app.archive partition` in a
+maintenance window (the app keeps working unpartitioned until then, but
+archival needs the partitions). Each UTC month is a partition named <table>_pYYYYMM covering
+[first of month, first of next month); <table>_default catches rows that fall
+outside every partition (far back-dated seeds, clock skew).
+
+ensure_partition creates a month's partition and moves any rows for that month
+out of the default partition first, so it also works after the fact. The app
+creates partitions from the oldest hot month through PARTITION_MONTHS_AHEAD on
+startup; `python -m app.archive maintain` does the same from cron.
+
+On other databases (SQLite in tests and local dev) the tables are plain and
+these functions do nothing.
+"""
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import utcnow
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+PARTITIONED_TABLES = ("decisions", "audit_log")
+# DETACH PARTITION needs an ACCESS EXCLUSIVE lock on the parent, and writers
+# queue behind a DETACH waiting for it; give up quickly and let the caller retry.
+# (DETACH ... CONCURRENTLY is not allowed while the parent has a DEFAULT partition.)
+DETACH_LOCK_TIMEOUT = "2s"
+LOCK_NOT_AVAILABLE = "55P03"
+
+# table -> id column
+PARTITION_KEYS = {"decisions": "decision_id", "audit_log": "id"}
+
+PARTITIONED_INDEXES = [
+    "CREATE INDEX ix_decisions_claim_id ON decisions (claim_id)",
+    "CREATE INDEX ix_decisions_created_at_decision_id ON decisions (created_at, decision_id)",
+    "CREATE INDEX ix_decisions_customer_id_created_at ON decisions (customer_id, created_at, decision_id)",
+    "CREATE INDEX ix_decisions_decision_created_at ON decisions (decision, created_at, decision_id)",
+    "CREATE INDEX ix_decisions_risk_score ON decisions (risk_score)",
+    "CREATE INDEX ix_decisions_explanation_fts ON decisions USING gin (to_tsvector('english', explanation))",
+    "CREATE INDEX ix_audit_log_decision_id_created_at ON audit_log (decision_id, created_at)",
+]
+
+CREATE_MONTHS = """
+DO $$
+DECLARE
+    m date := date_trunc('month', coalesce((SELECT min(created_at) FROM {source}), now()) AT TIME ZONE 'UTC')::date;
+    last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{ahead} months')::date;
+BEGIN
+    WHILE m <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+            '{table}_p' || to_char(m, 'YYYYMM'),
+            m::timestamp AT TIME ZONE 'UTC',
+            (m + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        m := m + interval '1 month';
+    END LOOP;
+END $$
+"""
+
+IS_PARTITIONED = (
+    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+    "WHERE c.relname = 'decisions' AND c.relnamespace = current_schema()::regnamespace)"
+)
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def month_label(month: datetime) -> str:
+    return f"{month:%Y-%m}"
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def hot_cutoff(now: Optional[datetime] = None, hot_months: Optional[int] = None) -> datetime:
+    """Start of the oldest month kept in the database; older months are archived."""
+    hot_months = settings.PARTITION_HOT_MONTHS if hot_months is None else hot_months
+    return add_months(month_start(now or utcnow()), -(max(hot_months, 1) - 1))
+
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    if db.bind.dialect.name != "postgresql":
+        return False
+    return bool(await db.scalar(text(IS_PARTITIONED)))
+
+
+def partition_statements(months_ahead: int) -> list[str]:
+    """
+    The rebuild into partitioned tables, as SQL statements for one transaction.
+
+    Partitioned tables cannot have unique indexes or primary keys that omit the
+    partition key, so:
+    - the primary keys become (decision_id, created_at) and (id, created_at);
+    - the audit_log -> decisions foreign key is dropped (audit rows are archived
+      by their own created_at and may outlive their decision's partition);
+    - idempotency_key uniqueness moves to decision_idempotency_keys, filled by an
+      AFTER INSERT trigger so a duplicate key still fails the insert.
+    """
+    statements = ["ALTER TABLE audit_log DROP CONSTRAINT IF EXISTS audit_log_decision_id_fkey"]
+    for table, id_column in PARTITION_KEYS.items():
+        statements += [
+            f"ALTER TABLE {table} RENAME TO {table}_unpartitioned",
+            f"ALTER TABLE {table}_unpartitioned RENAME CONSTRAINT {table}_pkey TO {table}_unpartitioned_pkey",
+            f"CREATE TABLE {table} (LIKE {table}_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE (created_at)",
+            f"ALTER TABLE {table} ADD PRIMARY KEY ({id_column}, created_at)",
+            f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT",
+            CREATE_MONTHS.format(table=table, source=f"{table}_unpartitioned", ahead=months_ahead),
+            f"INSERT INTO {table} SELECT * FROM {table}_unpartitioned",
+            f"DROP TABLE {table}_unpartitioned",
+        ]
+    # Built after the copy; CONCURRENTLY is not available on partitioned parents
+    statements += PARTITIONED_INDEXES
+    statements += [
+        "CREATE INDEX ix_decisions_idempotency_key ON decisions (idempotency_key)",
+        """
+        CREATE TABLE decision_idempotency_keys (
+            idempotency_key TEXT PRIMARY KEY,
+            decision_id UUID NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL
+        )
+        """,
+        # Archival expires keys by month
+        "CREATE INDEX ix_decision_idempotency_keys_created_at ON decision_idempotency_keys (created_at)",
+        """
+        INSERT INTO decision_idempotency_keys
+        SELECT idempotency_key, decision_id, created_at FROM decisions WHERE idempotency_key IS NOT NULL
+        """,
+        """
+        CREATE FUNCTION decisions_claim_idempotency_key() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO decision_idempotency_keys VALUES (NEW.idempotency_key, NEW.decision_id, NEW.created_at);
+            RETURN NULL;
+        END $$
+        """,
+        """
+        CREATE TRIGGER decisions_idempotency_key AFTER INSERT ON decisions
+        FOR EACH ROW WHEN (NEW.idempotency_key IS NOT NULL)
+        EXECUTE FUNCTION decisions_claim_idempotency_key()
+        """,
+    ]
+    return statements
+
+
+async def partition_tables(
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    months_ahead: Optional[int] = None
+) -> bool:
+    """
+    Rebuild decisions and audit_log as partitioned tables; False if they
+    already are (or the database is not PostgreSQL).
+
+    One transaction that holds ACCESS EXCLUSIVE locks on both tables while
+    every row is copied: reads and writes wait until it commits, so stop the
+    app or run it in a maintenance window.
+    """
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    async with session_factory() as db:
+        if db.bind.dialect.name != "postgresql" or await is_partitioned(db):
+            return False
+        for statement in partition_statements(months_ahead):
+            await db.execute(text(statement))
+        await db.commit()
+    logger.info("Partitioned decisions and audit_log by month")
+    return True
+
+
+async def list_partitions(db: AsyncSession, table: str) -> list[str]:
+    """Partition names of a parent table, oldest first (the default partition last)."""
+    names = (await db.scalars(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table AND p.relnamespace = current_schema()::regnamespace"
+        ),
+        {"table": table}
+    )).all()
+    return sorted(names, key=lambda name: (name.endswith("_default"), name))
+
+
+async def ensure_partition(db: AsyncSession, table: str, month: datetime) -> bool:
+    """Create the month's partition (moving its rows out of the default partition); False if it exists."""
+    name = partition_name(table, month)
+    if name in await list_partitions(db, table):
+        return False
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    await db.execute(text(
+        f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    await db.execute(text(
+        f"WITH moved AS (DELETE FROM {table}_default "
+        f"WHERE created_at >= '{lower}' AND created_at < '{upper}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    # Builds the parent's indexes on the new partition and clones its triggers
+    await db.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    return True
+
+
+def is_lock_timeout(error: Exception) -> bool:
+    return getattr(getattr(error, "orig", error), "sqlstate", None) == LOCK_NOT_AVAILABLE
+
+
+async def drop_partition(db: AsyncSession, table: str, month: datetime) -> bool:
+    """
+    Detach and drop the month's partition; False if there is none.
+    
+    The parent stays exclusively locked until the caller commits, so call this
+    last in a short transaction. Waiting for the lock is bounded by
+    DETACH_LOCK_TIMEOUT (the rest of the transaction too); see is_lock_timeout.
+    """
+    name = partition_name(table, month)
+    if name not in await list_partitions(db, table):
+        return False
+    await db.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+    await db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    await db.execute(text(f"DROP TABLE {name}"))
+    return True
+
+
+async def maintain_partitions(
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    now: Optional[datetime] = None,
+    months_ahead: Optional[int] = None
+) -> list[str]:
+    """Ensure partitions from the hot cutoff through months_ahead; returns the names created."""
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(now or utcnow())
+    month, last = hot_cutoff(now), add_months(current, months_ahead)
+    created = []
+    async with session_factory() as db:
+        if not await is_partitioned(db):
+            if db.bind.dialect.name == "postgresql":
+                logger.warning(
+                    "decisions and audit_log are not partitioned; run `python -m app.archive partition` "
+                    "in a maintenance window"
+                )
+            return created
+        while month <= last:
+            for table in PARTITIONED_TABLES:
+                if await ensure_partition(db, table, month):
+                    created.append(partition_name(table, month))
+            month = add_months(month, 1)
+        await db.commit()
+    if created:
+        logger.info(f"Created partitions: {', '.join(created)}")
+    return created
@@ -0,0 +1,283 @@
+"""
+Write paths for decisions and their audit trail.
+
+Ids and timestamps are generated client-side so nothing has to be read back
+after the insert. On PostgreSQL a decision and its audit row go out as one
+statement (a data-modifying CTE); other databases use two inserts in the same
+transaction. Bulk loads (seeding) go through COPY on PostgreSQL. Every path
+also appends its rows' rollup deltas (app.rollups) in the same transaction;
+on PostgreSQL the single-decision path folds them into the same statement.
+
+Events for decisions that already exist (explanation updates, shadow
+outcomes) go through append_audit_events, which invalidates each decision's
+cached detail response (app.decision_cache) once the transaction commits.
+The decision_created rows above need no invalidation: nothing can be cached
+for a decision before it is committed.
+
+GroupCommitWriter is an opt-in alternative for high request rates: concurrent
+requests hand their rows to a single writer task that commits them in
+micro-batches, so many requests share one transaction and one fsync.
+"""
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import TIMESTAMP, Text, event, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.decision_cache import decision_detail_cache
+from app.models import GUID, AuditLog, Decision, DecisionRollupDelta, JSONType, utcnow
+from app.rollups import append_rollup_deltas, rollup_delta_rows
+from app.utils.logging import get_logger
+from app.utils.metrics import Histogram
+
+logger = get_logger(__name__)
+
+AUDIT_COLUMNS = ["id", "decision_id", "event_type", "event_payload", "created_at"]
+DECISION_COLUMNS = [column.name for column in Decision.__table__.columns]
+# Session.info key: decision ids whose cached detail is dropped on commit
+PENDING_INVALIDATIONS = "invalidate_decisions"
+
+
+def new_decision_rows(
+    decision: dict,
+    event_payload: dict,
+    created_at: Optional[datetime] = None
+) -> tuple[dict, dict]:
+    """Complete a decision row and its decision_created audit row with client-side ids/timestamps."""
+    created_at = created_at or utcnow()
+    decision_row = {"decision_id": uuid.uuid4(), "created_at": created_at, **decision}
+    audit_row = {
+        "id": uuid.uuid4(),
+        "decision_id": decision_row["decision_id"],
+        "event_type": "decision_created",
+        "event_payload": event_payload,
+        "created_at": created_at
+    }
+    return decision_row, audit_row
+
+
+def decision_with_audit_statement(decision_row: dict, audit_row: dict, delta_rows: Optional[list[dict]] = None):
+    """
+    WITH new_decision AS (INSERT ... RETURNING decision_id)
+    [, new_rollup_delta AS (INSERT INTO decision_rollup_deltas ...)]
+    INSERT INTO audit_log SELECT ...
+    """
+    new_decision = insert(Decision).values(**decision_row).returning(Decision.decision_id).cte("new_decision")
+    statement = insert(AuditLog).from_select(
+        AUDIT_COLUMNS,
+        select(
+            literal(audit_row["id"], GUID()),
+            new_decision.c.decision_id,
+            literal(audit_row["event_type"], Text()),
+            literal(audit_row["event_payload"], JSONType),
+            literal(audit_row["created_at"], TIMESTAMP(timezone=True))
+        )
+    )
+    if delta_rows:
+        # PostgreSQL runs every data-modifying CTE, referenced or not
+        statement = statement.add_cte(insert(DecisionRollupDelta).values(delta_rows).cte("new_rollup_delta"))
+    return statement
+
+
+async def insert_decision_with_audit(db: AsyncSession, decision_row: dict, audit_row: dict):
+    """Insert one decision and its audit row in a single round trip where supported."""
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(decision_with_audit_statement(decision_row, audit_row, rollup_delta_rows([decision_row])))
+    else:
+        await db.execute(insert(Decision), [decision_row])
+        await db.execute(insert(AuditLog), [audit_row])
+        await append_rollup_deltas(db, [decision_row])
+
+
+async def bulk_insert_decisions(db: AsyncSession, decision_rows: list[dict], audit_rows: list[dict]):
+    """Bulk insert decisions and audit rows (executemany / multi-row VALUES)."""
+    if decision_rows:
+        await db.execute(insert(Decision), decision_rows)
+    if audit_rows:
+        await db.execute(insert(AuditLog), audit_rows)
+    await append_rollup_deltas(db, decision_rows)
+
+
+async def append_audit_events(db: AsyncSession, rows: list[dict]):
+    """
+    Append audit events to existing decisions in the caller's transaction;
+    their cached detail responses are invalidated when it commits.
+    """
+    if not rows:
+        return
+    await db.execute(insert(AuditLog), rows)
+    db.info.setdefault(PENDING_INVALIDATIONS, set()).update(row["decision_id"] for row in rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    for decision_id in session.info.pop(PENDING_INVALIDATIONS, ()):
+        decision_detail_cache.invalidate(decision_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session):
+    session.info.pop(PENDING_INVALIDATIONS, None)
+
+
+async def copy_decisions(db: AsyncSession, decision_rows: list[dict], audit_rows: list[dict]):
+    """
+    Load decisions and audit rows with COPY on PostgreSQL/asyncpg (binary
+    protocol, no per-row statement overhead); bulk insert elsewhere. Runs in
+    the session's transaction.
+    """
+    if db.bind.dialect.name != "postgresql" or db.bind.dialect.driver != "asyncpg":
+        await bulk_insert_decisions(db, decision_rows, audit_rows)
+        return
+    connection = await (await db.connection()).get_raw_connection()
+    driver = connection.driver_connection
+    if decision_rows:
+        await driver.copy_records_to_table(
+            Decision.__tablename__,
+            columns=DECISION_COLUMNS,
+            records=[tuple(row.get(column) for column in DECISION_COLUMNS) for row in decision_rows]
+        )
+    if audit_rows:
+        # asyncpg's jsonb codec takes JSON text
+        await driver.copy_records_to_table(
+            AuditLog.__tablename__,
+            columns=AUDIT_COLUMNS,
+            records=[
+                (row["id"], row["decision_id"], row["event_type"], json.dumps(row["event_payload"]), row["created_at"])
+                for row in audit_rows
+            ]
+        )
+    await append_rollup_deltas(db, decision_rows)
+
+
+class GroupCommitWriter:
+    """
+    Single writer task that commits queued decision/audit rows in micro-batches
+    bounded by max_batch rows and max_wait seconds after the first row arrives.
+    Each submit() returns once its batch is committed. If a batch fails, its
+    rows are retried one per transaction so only the offending rows fail.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        max_batch: int = 256,
+        max_wait: float = 0.005
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.committed = 0
+        self.failed = 0
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256, 512])
+        self.wait_ms = Histogram([0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000])
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Group commit queue not drained; {self._queue.qsize()} write(s) abandoned")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def submit(self, decision_row: dict, audit_row: dict):
+        """Queue one decision + audit row and wait until it is committed (or raise)."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((decision_row, audit_row, future, time.perf_counter()))
+        await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit(self, batch: list[tuple]):
+        self.batch_sizes.observe(len(batch))
+        try:
+            async with self.session_factory() as db:
+                await bulk_insert_decisions(db, [b[0] for b in batch], [b[1] for b in batch])
+                await db.commit()
+            for item in batch:
+                self._resolve(item, None)
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0], e)
+                return
+            logger.warning(f"Group commit of {len(batch)} rows failed ({e}); retrying individually")
+            for item in batch:
+                try:
+                    async with self.session_factory() as db:
+                        await bulk_insert_decisions(db, [item[0]], [item[1]])
+                        await db.commit()
+                    self._resolve(item, None)
+                except Exception as item_error:
+                    self._resolve(item, item_error)
+
+    def _resolve(self, item: tuple, error: Optional[Exception]):
+        _, _, future, submitted_at = item
+        self.wait_ms.observe((time.perf_counter() - submitted_at) * 1000)
+        if future.done():
+            return
+        if error is None:
+            self.committed += 1
+            future.set_result(None)
+        else:
+            self.failed += 1
+            future.set_exception(error)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "committed": self.committed,
+            "failed": self.failed,
+            "batch_size": self.batch_sizes.snapshot(),
+            "wait_ms": self.wait_ms.snapshot()
+        }
+
+
+group_commit_writer = GroupCommitWriter(
+    max_batch=settings.GROUP_COMMIT_MAX_BATCH,
+    max_wait=settings.GROUP_COMMIT_MAX_WAIT_MS / 1000
+)
@@ -0,0 +1,433 @@
+"""
+Hourly decision rollups.
+
+decision_rollups_hourly holds one row per (UTC hour, model_version,
+policy_version, incident_class, decision) with a decision count, risk and
+fraud-probability sums and a 10-bucket risk score histogram. Every write path
+in app.persistence appends its rows' aggregated deltas to
+decision_rollup_deltas in the same transaction as the decisions, so they commit
+or roll back together and back-dated rows (seeding, replayed jobs) land in the
+right hour. Appends are plain inserts: concurrent writers in the same hour
+never queue on a shared rollup row.
+
+RollupMerger folds pending deltas into the hourly table every
+ROLLUP_MERGE_INTERVAL seconds, one DELETE ... RETURNING plus a sorted upsert
+(INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x) per batch. Reads
+(queries, verify) sum both tables, so they are exact before a merge runs.
+
+Rows inserted behind the write path's back (manual SQL, the latency benchmark's
+filler) are not counted; the verify command finds such drift and rebuild
+recomputes a window from decisions. Rollups of months moved out by app.archive
+are kept, so without --since both commands start after the newest archived
+month:
+
+    python -m app.rollups verify [--since 2026-01-01T00:00:00Z] [--until ...]
+    python -m app.rollups rebuild [--since ...] [--until ...]
+    python -m app.rollups merge    # merge pending deltas now (the API does it continuously)
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import delete, func, insert, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analytics import RISK_BUCKET_WIDTH, RISK_BUCKETS, as_utc
+from app.archive import archived_through
+from app.config import settings
+from app.database import AsyncSessionLocal, async_engine
+from app.models import Decision, DecisionRollup, DecisionRollupDelta
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+ROLLUP_KEY = ["bucket_start", "model_version", "policy_version", "incident_class", "decision"]
+HISTOGRAM_COLUMNS = [f"risk_hist_{i}" for i in range(RISK_BUCKETS)]
+SUM_COLUMNS = ["decision_count", "risk_score_sum", "fraud_probability_sum", *HISTOGRAM_COLUMNS]
+UNCLASSIFIED = "unclassified"
+# Rows per upsert statement (stays well under SQLite's bound-parameter limit)
+UPSERT_CHUNK = 500
+# Relative tolerance for float sums when verifying
+SUM_TOLERANCE = 1e-9
+
+
+def hour_floor(value: datetime) -> datetime:
+    return as_utc(value).replace(minute=0, second=0, microsecond=0)
+
+
+def hour_ceil(value: datetime) -> datetime:
+    floor = hour_floor(value)
+    return floor if floor == as_utc(value) else floor + timedelta(hours=1)
+
+
+def risk_bucket(risk_score: float) -> int:
+    return min(max(int(math.floor(risk_score / RISK_BUCKET_WIDTH)), 0), RISK_BUCKETS - 1)
+
+
+def rollup_deltas(decision_rows: Iterable[dict]) -> dict[tuple, dict]:
+    """Aggregate decision rows into {rollup key: column deltas}."""
+    deltas: dict[tuple, dict] = {}
+    for row in decision_rows:
+        key = (
+            hour_floor(row["created_at"]),
+            row["model_version"],
+            row["policy_version"],
+            row.get("incident_class") or UNCLASSIFIED,
+            row["decision"]
+        )
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = dict.fromkeys(SUM_COLUMNS, 0)
+            delta["risk_score_sum"] = delta["fraud_probability_sum"] = 0.0
+        delta["decision_count"] += 1
+        delta["risk_score_sum"] += row["risk_score"]
+        delta["fraud_probability_sum"] += row["fraud_probability"]
+        delta[HISTOGRAM_COLUMNS[risk_bucket(row["risk_score"])]] += 1
+    return deltas
+
+
+def _upsert(dialect: str, rows: list[dict]):
+    table = DecisionRollup.__table__
+    statement = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=ROLLUP_KEY,
+        set_={column: table.c[column] + statement.excluded[column] for column in SUM_COLUMNS}
+    )
+
+
+def rollup_delta_rows(decision_rows: Iterable[dict]) -> list[dict]:
+    """decision_rollup_deltas rows for a batch of decision rows (one per rollup key)."""
+    if not settings.ROLLUPS_ENABLED:
+        return []
+    return [{**dict(zip(ROLLUP_KEY, key)), **delta} for key, delta in rollup_deltas(decision_rows).items()]
+
+
+async def append_rollup_deltas(db: AsyncSession, decision_rows: list[dict]):
+    """Append decision rows' rollup deltas in the session's transaction."""
+    rows = rollup_delta_rows(decision_rows)
+    if rows:
+        await db.execute(insert(DecisionRollupDelta), rows)
+
+
+async def _upsert_rollups(db: AsyncSession, totals: dict[tuple, dict]):
+    # Sorted keys give concurrent mergers the same lock order
+    rows = [{**dict(zip(ROLLUP_KEY, key)), **delta} for key, delta in sorted(totals.items())]
+    dialect = db.bind.dialect.name
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        await db.execute(_upsert(dialect, rows[start:start + UPSERT_CHUNK]))
+
+
+async def merge_rollup_deltas(db: AsyncSession, batch_size: int = 10000) -> int:
+    """
+    Move the oldest batch_size pending deltas into the hourly rollups (caller
+    commits); returns how many were merged. DELETE ... RETURNING claims the
+    rows atomically, so concurrent mergers never count a delta twice.
+    """
+    table = DecisionRollupDelta.__table__
+    oldest = select(table.c.id).order_by(table.c.id).limit(batch_size)
+    claimed = (await db.execute(
+        delete(table).where(table.c.id.in_(oldest)).returning(*(table.c[c] for c in ROLLUP_KEY + SUM_COLUMNS))
+    )).all()
+    totals: dict[tuple, dict] = {}
+    for row in claimed:
+        key = (as_utc(row[0]), *row[1:len(ROLLUP_KEY)])
+        sums = dict(zip(SUM_COLUMNS, row[len(ROLLUP_KEY):]))
+        total = totals.setdefault(key, sums)
+        if total is not sums:
+            for column in SUM_COLUMNS:
+                total[column] += sums[column]
+    await _upsert_rollups(db, totals)
+    return len(claimed)
+
+
+class RollupMerger:
+    """Background task that merges decision_rollup_deltas into the hourly rollups."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        interval: float = 1.0,
+        batch_size: int = 10000
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.merges = 0
+        self.merged = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the loop and merge whatever is still pending."""
+        if not self.running:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await self.merge()
+        except Exception as e:
+            logger.error(f"Final rollup merge failed: {e}")
+
+    async def merge(self) -> int:
+        """Merge all pending deltas, one transaction per batch; returns how many were merged."""
+        total = 0
+        while True:
+            async with self.session_factory() as db:
+                merged = await merge_rollup_deltas(db, self.batch_size)
+                await db.commit()
+            total += merged
+            if merged < self.batch_size:
+                break
+        self.merges += 1
+        self.merged += total
+        return total
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.merge()
+            except Exception as e:
+                # Deltas stay pending and are retried on the next tick
+                self.failed += 1
+                logger.error(f"Rollup merge failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.running,
+            "interval": self.interval,
+            "batch_size": self.batch_size,
+            "merges": self.merges,
+            "merged_deltas": self.merged,
+            "failed": self.failed
+        }
+
+
+rollup_merger = RollupMerger(interval=settings.ROLLUP_MERGE_INTERVAL, batch_size=settings.ROLLUP_MERGE_BATCH)
+
+
+async def recompute_rollups(
+    db: AsyncSession,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    batch_size: int = 10000
+) -> dict[tuple, dict]:
+    """Rollups for an hour-aligned window, recomputed from decisions with a server-side cursor."""
+    columns = ["created_at", "model_version", "policy_version", "incident_class", "decision",
+               "risk_score", "fraud_probability"]
+    query = select(*(getattr(Decision, c) for c in columns))
+    if since is not None:
+        query = query.filter(Decision.created_at >= since)
+    if until is not None:
+        query = query.filter(Decision.created_at < until)
+
+    totals: dict[tuple, dict] = {}
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        for key, delta in rollup_deltas(dict(zip(columns, row)) for row in partition).items():
+            total = totals.setdefault(key, delta)
+            if total is not delta:
+                for column in SUM_COLUMNS:
+                    total[column] += delta[column]
+    return totals
+
+
+def _window_filter(query, since: Optional[datetime], until: Optional[datetime], table=DecisionRollup.__table__):
+    if since is not None:
+        query = query.filter(table.c.bucket_start >= since)
+    if until is not None:
+        query = query.filter(table.c.bucket_start < until)
+    return query
+
+
+def _rollup_source():
+    """Merged rollups plus pending deltas, as one row source to aggregate over."""
+    columns = ROLLUP_KEY + SUM_COLUMNS
+    return union_all(
+        select(*(DecisionRollup.__table__.c[c] for c in columns)),
+        select(*(DecisionRollupDelta.__table__.c[c] for c in columns))
+    ).subquery("rollups")
+
+
+async def stored_rollups(db: AsyncSession, since: Optional[datetime], until: Optional[datetime]) -> dict[tuple, dict]:
+    source = _rollup_source()
+    keys = [source.c[c] for c in ROLLUP_KEY]
+    rows = (await db.execute(
+        _window_filter(select(*keys, *(func.sum(source.c[c]) for c in SUM_COLUMNS)), since, until, source)
+        .group_by(*keys)
+    )).all()
+    return {
+        (as_utc(row[0]), *row[1:len(ROLLUP_KEY)]): dict(zip(SUM_COLUMNS, row[len(ROLLUP_KEY):]))
+        for row in rows
+    }
+
+
+def _matches(expected: dict, actual: dict) -> bool:
+    for column in SUM_COLUMNS:
+        if column.endswith("_sum"):
+            if not math.isclose(expected[column], actual[column], rel_tol=SUM_TOLERANCE, abs_tol=1e-6):
+                return False
+        elif expected[column] != actual[column]:
+            return False
+    return True
+
+
+def _window(since: Optional[datetime], until: Optional[datetime]) -> tuple[Optional[datetime], Optional[datetime]]:
+    # Rollup rows cover whole hours, so widen the window to hour boundaries
+    return (
+        hour_floor(since) if since is not None else None,
+        hour_ceil(until) if until is not None else None
+    )
+
+
+async def verify_rollups(
+    db: AsyncSession,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> dict:
+    """Compare stored rollups with a full recompute; counts and histograms must match exactly."""
+    since, until = _window(since, until)
+    expected = await recompute_rollups(db, since, until)
+    actual = await stored_rollups(db, since, until)
+
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys()):
+        want, have = expected.get(key), actual.get(key)
+        if want is not None and have is not None and _matches(want, have):
+            continue
+        mismatches.append({
+            **{c: (v.isoformat() if isinstance(v, datetime) else v) for c, v in zip(ROLLUP_KEY, key)},
+            "expected": want,
+            "stored": have
+        })
+    return {
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat() if until else None,
+        "rollup_rows": len(actual),
+        "decisions": sum(d["decision_count"] for d in expected.values()),
+        "consistent": not mismatches,
+        "mismatches": mismatches
+    }
+
+
+async def rebuild_rollups(
+    db: AsyncSession,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> dict:
+    """Replace the rollups (and pending deltas) of a window with a recompute from decisions (caller commits)."""
+    since, until = _window(since, until)
+    expected = await recompute_rollups(db, since, until)
+    deleted = await db.execute(_window_filter(delete(DecisionRollup), since, until))
+    deltas = DecisionRollupDelta.__table__
+    await db.execute(_window_filter(delete(deltas), since, until, deltas))
+    await _upsert_rollups(db, expected)
+    return {"deleted": deleted.rowcount, "inserted": len(expected)}
+
+
+GRANULARITIES = ("hour", "day", "total")
+GROUP_BY_COLUMNS = ("model_version", "policy_version", "incident_class", "decision")
+
+
+async def query_rollups(
+    db: AsyncSession,
+    since: datetime,
+    until: datetime,
+    granularity: str = "hour",
+    group_by: tuple[str, ...] = ()
+) -> list[dict]:
+    """
+    Aggregate rollup rows in [since, until) (widened to whole hours) by time
+    bucket and the requested dimensions. The database sums rollup and pending
+    delta rows per hour; hours are folded into days or a single total here, which is cheap
+    because there is at most one row per hour and group.
+    """
+    since, until = _window(since, until)
+    source = _rollup_source()
+    dimensions = [source.c[c] for c in group_by]
+    keys = ([source.c.bucket_start] if granularity != "total" else []) + dimensions
+    rows = (await db.execute(
+        _window_filter(
+            select(*keys, *(func.sum(source.c[c]) for c in SUM_COLUMNS)),
+            since, until, source
+        ).group_by(*keys)
+    )).all()
+
+    buckets: dict[tuple, dict] = {}
+    for row in rows:
+        if granularity == "total":
+            bucket_start, values = None, row
+        else:
+            bucket_start, values = as_utc(row[0]), row[1:]
+            if granularity == "day":
+                bucket_start = bucket_start.replace(hour=0)
+        dimension_values, sums = tuple(values[:len(group_by)]), values[len(group_by):]
+        bucket = buckets.setdefault((bucket_start, dimension_values), dict.fromkeys(SUM_COLUMNS, 0))
+        for column, value in zip(SUM_COLUMNS, sums):
+            bucket[column] += value or 0
+
+    return [
+        {
+            "bucket_start": bucket_start,
+            **dict(zip(group_by, dimension_values)),
+            "count": sums["decision_count"],
+            "risk_score_sum": sums["risk_score_sum"],
+            "fraud_probability_sum": sums["fraud_probability_sum"],
+            "avg_risk_score": round(sums["risk_score_sum"] / sums["decision_count"], 4),
+            "avg_fraud_probability": round(sums["fraud_probability_sum"] / sums["decision_count"], 4),
+            "risk_score_histogram": [
+                {"lower": i * RISK_BUCKET_WIDTH, "upper": (i + 1) * RISK_BUCKET_WIDTH, "count": sums[column]}
+                for i, column in enumerate(HISTOGRAM_COLUMNS)
+            ]
+        }
+        for (bucket_start, dimension_values), sums in sorted(
+            buckets.items(), key=lambda item: (item[0][0] or since, [str(v) for v in item[0][1]])
+        )
+        if sums["decision_count"]
+    ]
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Verify, rebuild or merge the hourly decision rollups.")
+    parser.add_argument("command", choices=["verify", "rebuild", "merge"])
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Window start (ISO 8601, UTC if naive)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Window end, exclusive")
+    args = parser.parse_args(argv)
+    since = args.since or archived_through(settings.ARCHIVE_DIR)
+
+    async def run() -> dict:
+        try:
+            if args.command == "merge":
+                return {"merged": await rollup_merger.merge()}
+            async with AsyncSessionLocal() as db:
+                if args.command == "verify":
+                    return await verify_rollups(db, since, args.until)
+                result = await rebuild_rollups(db, since, args.until)
+                await db.commit()
+                return result
+        finally:
+            await async_engine.dispose()
+
+    result = asyncio.run(run())
+    print(json.dumps(result, indent=2))
+    if args.command == "verify" and not result["consistent"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,208 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from datetime import datetime
-from app.database import get_db
-from app.schemas import ClaimScoreRequest, ClaimScoreResponse
-from app.models import Decision, AuditLog
-from app.scoring.engine import ScoringEngine
-from app.clients.mongo import mongo_client
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.database import get_db, get_session_factory
+from app.schemas import (
+    ClaimScoreRequest, ClaimScoreResponse, ClaimBatchScoreRequest, ClaimBatchScoreResponse
+)
+from app.models import Decision
+from app.persistence import (
+    bulk_insert_decisions, group_commit_writer, insert_decision_with_audit, new_decision_rows
+)
+from app.scoring.batch import BatchRows, build_batch_rows, incident_codes_for
+from app.scoring.explanations import explanation_backfill
+from app.scoring.policy import CompiledPolicy, get_policy
+from app.scoring.registry import Scorer, model_registry
+from app.scoring.shadow import ShadowJob, shadow_evaluator
+from app.clients.mongo import raw_claim_writer
 from app.clients.ollama import ollama_client
 # API key verification removed from score endpoint for public access
 # from app.dependencies import verify_api_key
+from app.utils.idempotency import InFlightRequests, derive_idempotency_key, payload_hash
 from app.utils.logging import get_logger, get_trace_id, set_trace_id
 from app.config import settings
+from typing import AsyncIterator, Optional
+import json
 import uuid
 
 router = APIRouter()
 logger = get_logger(__name__)
+inflight_requests = InFlightRequests()
+
+def get_scorer(x_model_version: Optional[str] = Header(None)) -> Scorer:
+    """Resolve the scorer from X-Model-Version, defaulting to MODEL_VERSION."""
+    try:
+        return model_registry.get(x_model_version)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+
+def _decision_response(decision_record: Decision) -> ClaimScoreResponse:
+    return ClaimScoreResponse(
+        decision_id=decision_record.decision_id,
+        claim_id=decision_record.claim_id,
+        customer_id=decision_record.customer_id,
+        risk_score=decision_record.risk_score,
+        fraud_probability=decision_record.fraud_probability,
+        decision=decision_record.decision,
+        explanation=decision_record.explanation,
+        model_version=decision_record.model_version,
+        policy_version=decision_record.policy_version,
+        timestamp=decision_record.created_at
+    )
+
+async def _find_by_idempotency_key(db: AsyncSession, key: str) -> Optional[Decision]:
+    return await db.scalar(select(Decision).filter(Decision.idempotency_key == key))
 
 @router.post("/api/claim/score", response_model=ClaimScoreResponse)
 async def score_claim(
     claim: ClaimScoreRequest,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    scorer: Scorer = Depends(get_scorer),
+    idempotency_key: Optional[str] = Header(None)
 ):
-    """Score a claim and return decision."""
+    """
+    Score a claim and return decision.
+    
+    Repeats with the same Idempotency-Key header (or, without one, the same
+    claim payload) return the stored decision; concurrent repeats are
+    coalesced so only one does the work. Reusing a key for a different
+    claim is a 409, for a different payload of the same claim a 422.
+    """
     # Set trace ID for this request
     set_trace_id(str(uuid.uuid4()))
     trace_id = get_trace_id()
     
+    # Resolve the policy once so the key and the decision agree on its version
+    policy = get_policy()
+    payload = claim.model_dump()
+    request_hash = payload_hash(payload)
+    key = idempotency_key or derive_idempotency_key(
+        claim.claim_id, payload, scorer.version, policy.version
+    )
+    existing = await _find_by_idempotency_key(db, key)
+    if existing is None:
+        # Only identical requests share the work; a different payload under
+        # the same key falls through to the hash check below
+        (result, stored_hash), replayed = await inflight_requests.run(
+            f"{key}\x1f{request_hash}",
+            lambda: _score_and_persist(claim, db, scorer, policy, key, request_hash, trace_id)
+        )
+    else:
+        result, stored_hash, replayed = _decision_response(existing), existing.request_hash, True
+    
+    if result.claim_id != claim.claim_id:
+        raise HTTPException(status_code=409, detail="Idempotency-Key was used for a different claim")
+    # Rows written before request hashes were stored cannot be checked
+    if stored_hash is not None and stored_hash != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was used with a different payload")
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+        logger.info(f"Replayed decision {result.decision_id} for claim {claim.claim_id} (trace: {trace_id})")
+    return result
+
+async def _score_and_persist(
+    claim: ClaimScoreRequest,
+    db: AsyncSession,
+    scorer: Scorer,
+    policy: CompiledPolicy,
+    idempotency_key: str,
+    request_hash: str,
+    trace_id: str
+) -> tuple[ClaimScoreResponse, Optional[str]]:
+    """Score and store a claim; returns the response and the stored request hash."""
     logger.info(f"Scoring claim {claim.claim_id} (trace: {trace_id})")
     
     try:
-        # Calculate risk score
-        risk_score, fraud_probability, decision = ScoringEngine.calculate_risk_score(claim)
+        # Classify the incident once; everything downstream uses the code
+        incident_code = policy.incident_code(claim.incident_type)
+        incident_class = policy.incident_label(incident_code)
         
-        # Generate explanation (try Ollama first, fallback to template)
-        explanation = await ollama_client.generate_explanation(
-            claim.amount, claim.incident_type, claim.history_score,
-            risk_score, fraud_probability
+        # Calculate risk score with the selected scorer
+        scored = await model_registry.score(scorer, claim, policy, incident_code)
+        risk_score, fraud_probability, decision = (
+            scored.risk_score, scored.fraud_probability, scored.decision
         )
         
-        if not explanation:
-            explanation = ScoringEngine.generate_template_explanation(
-                claim, risk_score, fraud_probability, decision
-            )
-        
-        # Create decision record
-        decision_record = Decision(
-            claim_id=claim.claim_id,
-            customer_id=claim.customer_id,
-            model_version=settings.MODEL_VERSION,
-            policy_version=settings.POLICY_VERSION,
-            risk_score=risk_score,
-            fraud_probability=fraud_probability,
-            decision=decision,
-            explanation=explanation
+        # Generate explanation (Ollama within the latency budget, fallback to template)
+        explanation, pending_explanation = await ollama_client.generate_explanation_within(
+            settings.OLLAMA_LATENCY_BUDGET,
+            claim.amount, incident_class, claim.history_score,
+            risk_score, fraud_probability, policy.version
         )
         
-        db.add(decision_record)
-        db.flush()
+        if not explanation:
+            explanation = scored.template_explanation(claim.amount)
         
-        # Create audit log
-        audit_event = AuditLog(
-            decision_id=decision_record.decision_id,
-            event_type="decision_created",
-            event_payload={
+        # Build decision and audit rows with client-side id and timestamp
+        decision_row, audit_row = new_decision_rows(
+            {
+                "claim_id": claim.claim_id,
+                "customer_id": claim.customer_id,
+                "model_version": scorer.version,
+                "policy_version": policy.version,
+                "incident_class": incident_class,
+                "risk_score": risk_score,
+                "fraud_probability": fraud_probability,
+                "decision": decision,
+                "explanation": explanation,
+                "idempotency_key": idempotency_key,
+                "request_hash": request_hash
+            },
+            {
                 "trace_id": trace_id,
                 "input": claim.model_dump(),
                 "output": {
+                    "incident_class": incident_class,
                     "risk_score": risk_score,
                     "fraud_probability": fraud_probability,
                     "decision": decision
                 }
             }
         )
+        decision_record = Decision(**decision_row)
+        
+        # One statement for decision + audit row, then commit; nothing to read back.
+        # With group commit on, the shared writer commits it in a micro-batch.
+        try:
+            if group_commit_writer.running:
+                await group_commit_writer.submit(decision_row, audit_row)
+            else:
+                await insert_decision_with_audit(db, decision_row, audit_row)
+                await db.commit()
+        except IntegrityError:
+            # Another worker committed the same idempotency key first
+            await db.rollback()
+            existing = await _find_by_idempotency_key(db, idempotency_key)
+            if existing is None:
+                raise
+            if pending_explanation is not None:
+                pending_explanation.cancel()
+            return _decision_response(existing), existing.request_hash
         
-        db.add(audit_event)
-        db.commit()
-        db.refresh(decision_record)
+        # LLM missed the budget: attach its explanation once it arrives
+        if pending_explanation is not None:
+            explanation_backfill.schedule(pending_explanation, decision_record.decision_id, trace_id)
         
-        # Store in MongoDB
-        mongo_client.store_claim(
+        # Challengers re-score off the critical path; dropped if the queue is full
+        if shadow_evaluator.enabled:
+            shadow_evaluator.submit(ShadowJob(
+                decision_id=decision_record.decision_id,
+                claim=claim,
+                champion={
+                    "model_version": scorer.version,
+                    "policy_version": policy.version,
+                    "decision": decision
+                },
+                trace_id=trace_id
+            ))
+        
+        # Queue raw claim for write-behind storage in MongoDB
+        await raw_claim_writer.enqueue(
             claim.claim_id,
             claim.customer_id,
             claim.model_dump(),
@@ -87,19 +211,181 @@ async def score_claim(
         
         logger.info(f"Decision {decision_record.decision_id}: {decision} (trace: {trace_id})")
         
-        return ClaimScoreResponse(
-            decision_id=decision_record.decision_id,
-            claim_id=decision_record.claim_id,
-            customer_id=decision_record.customer_id,
-            risk_score=decision_record.risk_score,
-            fraud_probability=decision_record.fraud_probability,
-            decision=decision_record.decision,
-            explanation=decision_record.explanation,
-            model_version=decision_record.model_version,
-            policy_version=decision_record.policy_version,
-            timestamp=decision_record.created_at
-        )
+        return _decision_response(decision_record), request_hash
     
     except Exception as e:
         logger.error(f"Error scoring claim: {e} (trace: {trace_id})")
         raise HTTPException(status_code=500, detail=f"Scoring failed: {str(e)}")
+
+
+async def _score_chunk(
+    claims: list[ClaimScoreRequest],
+    scorer: Scorer,
+    policy: CompiledPolicy,
+    trace_id: str
+) -> BatchRows:
+    """Classify, score (vectorized) and build insert-ready rows for a chunk of claims."""
+    incident_codes = incident_codes_for(claims, policy)
+    risk_scores, fraud_probabilities, decisions = await model_registry.score_batch(
+        scorer, claims, incident_codes, policy
+    )
+    return build_batch_rows(
+        claims, incident_codes, risk_scores, fraud_probabilities, decisions,
+        scorer.version, policy, trace_id
+    )
+
+
+@router.post("/api/claims/score/batch", response_model=ClaimBatchScoreResponse)
+async def score_claims_batch(
+    batch: ClaimBatchScoreRequest,
+    db: AsyncSession = Depends(get_db),
+    scorer: Scorer = Depends(get_scorer)
+):
+    """Score many claims in one vectorized pass and persist them with bulk inserts."""
+    set_trace_id(str(uuid.uuid4()))
+    trace_id = get_trace_id()
+    
+    claims = batch.claims
+    if len(claims) > settings.SCORE_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.SCORE_BATCH_MAX_SIZE} claims"
+        )
+    
+    logger.info(f"Scoring batch of {len(claims)} claims (trace: {trace_id})")
+    
+    try:
+        rows = await _score_chunk(claims, scorer, get_policy(), trace_id)
+        
+        await bulk_insert_decisions(db, rows.decision_rows, rows.audit_rows)
+        await db.commit()
+        
+        await raw_claim_writer.enqueue_many(rows.raw_claims)
+        
+        logger.info(f"Scored batch of {len(claims)} claims (trace: {trace_id})")
+        
+        results = [_decision_response(Decision(**row)) for row in rows.decision_rows]
+        return ClaimBatchScoreResponse(count=len(results), results=results)
+    
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error scoring batch: {e} (trace: {trace_id})")
+        raise HTTPException(status_code=500, detail=f"Batch scoring failed: {str(e)}")
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes], max_length: int) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a byte stream into lines without buffering more than one partial line.
+    
+    Each chunk is scanned once; only the trailing partial line is carried over.
+    A line longer than max_length bytes is discarded as it arrives and yielded
+    as None, so a body without newlines cannot grow the buffer without bound.
+    """
+    pending = bytearray()
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            if oversized or len(pending) + end - start > max_length:
+                yield None
+            elif pending:
+                pending += chunk[start:end]
+                yield bytes(pending)
+            else:
+                yield chunk[start:end]
+            pending.clear()
+            oversized = False
+            start = end + 1
+        if not oversized:
+            pending += chunk[start:]
+            if len(pending) > max_length:
+                pending.clear()
+                oversized = True
+    if oversized:
+        yield None
+    elif pending:
+        yield bytes(pending)
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves `receive` to the body iterator.
+    
+    The stock implementation polls `receive` for disconnects while streaming,
+    which steals request-body messages from a handler still reading its upload.
+    Here a disconnect surfaces as ClientDisconnect from request.stream() instead.
+    """
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@router.post("/api/claims/score/stream")
+async def score_claims_stream(
+    request: Request,
+    scorer: Scorer = Depends(get_scorer),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """
+    Score an NDJSON upload of claims, streaming NDJSON decisions back.
+    
+    The body is parsed incrementally; claims are validated line by line,
+    scored in vectorized chunks of NDJSON_CHUNK_SIZE and bulk-inserted per
+    chunk, so memory stays flat regardless of upload size. Invalid lines
+    produce {"line": n, "error": ...} records, as do lines longer than
+    NDJSON_MAX_LINE_BYTES, which are dropped without being buffered; a final {"summary": ...}
+    record closes the stream.
+    """
+    set_trace_id(str(uuid.uuid4()))
+    trace_id = get_trace_id()
+    policy = get_policy()
+    
+    async def persist(chunk: list[ClaimScoreRequest]) -> str:
+        rows = await _score_chunk(chunk, scorer, policy, trace_id)
+        async with session_factory() as db:
+            await bulk_insert_decisions(db, rows.decision_rows, rows.audit_rows)
+            await db.commit()
+        await raw_claim_writer.enqueue_many(rows.raw_claims)
+        return "".join(
+            _decision_response(Decision(**row)).model_dump_json() + "\n"
+            for row in rows.decision_rows
+        )
+    
+    async def results() -> AsyncIterator[str]:
+        chunk: list[ClaimScoreRequest] = []
+        line_no = scored = errors = 0
+        try:
+            async for line in _iter_lines(request.stream(), settings.NDJSON_MAX_LINE_BYTES):
+                line_no += 1
+                if line is None:
+                    errors += 1
+                    yield json.dumps({
+                        "line": line_no,
+                        "error": f"Line exceeds {settings.NDJSON_MAX_LINE_BYTES} bytes"
+                    }) + "\n"
+                    continue
+                if not line.strip():
+                    continue
+                try:
+                    chunk.append(ClaimScoreRequest.model_validate_json(line))
+                except ValidationError as e:
+                    errors += 1
+                    yield json.dumps({"line": line_no, "error": e.errors(include_url=False)}, default=str) + "\n"
+                    continue
+                if len(chunk) >= settings.NDJSON_CHUNK_SIZE:
+                    yield await persist(chunk)
+                    scored += len(chunk)
+                    chunk = []
+            if chunk:
+                yield await persist(chunk)
+                scored += len(chunk)
+        except Exception as e:
+            logger.error(f"NDJSON scoring aborted at line {line_no}: {e} (trace: {trace_id})")
+            yield json.dumps({"line": line_no, "error": f"Scoring aborted: {e}"}) + "\n"
+        
+        logger.info(f"Streamed {scored} decisions, {errors} invalid lines (trace: {trace_id})")
+        yield json.dumps({"summary": {"lines": line_no, "scored": scored, "errors": errors, "trace_id": trace_id}}) + "\n"
+    
+    return _DuplexStreamingResponse(results(), media_type="application/x-ndjson")
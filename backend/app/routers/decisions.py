@@ -1,26 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Decision, AuditLog
-from app.schemas import DecisionDetail, ClaimScoreResponse
-from app.scoring.engine import ScoringEngine
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import joinedload
+from app.clients.ollama import ollama_client
+from app.config import settings
+from app.database import get_db, get_session_factory
+from app.models import Decision, AuditLog, utcnow
+from app.analytics import as_utc, decision_stats
+from app.decision_cache import decision_detail_cache, etag_matches
+from app.search import SearchError, decision_filters
+from app.archive import archived_files
+from app.export import EXPORT_FORMATS, ExportError, export_query, iter_csv, iter_parquet, parquet_schema, read_archived
+from app.schemas import DecisionDetail, DecisionPage, DecisionStats, ClaimScoreResponse, SeedProfile
+from app.scoring.explanations import explanation_backfill
+from app.scoring.registry import model_registry
+from app.seeding import seed_decisions
 from app.dependencies import verify_api_key
-from typing import List
+from app.utils.logging import get_logger, get_trace_id
+from datetime import datetime, timedelta
+from typing import List, Optional
+import base64
+import json
+import random
+import uuid
 
 router = APIRouter()
+logger = get_logger(__name__)
 
-@router.get("/api/decisions", response_model=List[ClaimScoreResponse])
+def encode_cursor(decision: Decision) -> str:
+    """Opaque keyset cursor for the position after `decision`."""
+    raw = json.dumps([decision.created_at.isoformat(), str(decision.decision_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, decision_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), uuid.UUID(decision_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/api/decisions", response_model=DecisionPage)
 async def list_decisions(
-    limit: int = Query(default=50, le=200),
-    offset: int = Query(default=0, ge=0),
-    db: Session = Depends(get_db)
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=settings.DECISIONS_PAGE_MAX),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    offset: int = Query(default=0, ge=0, description="Deprecated; use cursor"),
+    customer_id: Optional[str] = Query(default=None),
+    decision: Optional[List[str]] = Query(default=None, description="APPROVE, REVIEW and/or REJECT"),
+    min_risk_score: Optional[float] = Query(default=None, ge=0, le=100),
+    max_risk_score: Optional[float] = Query(default=None, ge=0, le=100),
+    since: Optional[datetime] = Query(default=None, description="created_at >= since"),
+    until: Optional[datetime] = Query(default=None, description="created_at < until"),
+    q: Optional[str] = Query(default=None, max_length=200, description="Full-text search over explanations"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """List recent decisions."""
-    decisions = db.query(Decision).order_by(
-        Decision.created_at.desc()
-    ).limit(limit).offset(offset).all()
+    """
+    List decisions, newest first, optionally filtered.
+    
+    Pages are keyset-paginated on (created_at, decision_id): when more rows
+    remain, next_cursor (also sent as the X-Next-Cursor header) is the
+    cursor for the next page (pass the same filters with it). Every filter is backed by an
+    index; see app.search.
+    """
+    try:
+        conditions = decision_filters(
+            db.bind.dialect.name,
+            customer_id=customer_id,
+            decisions=decision,
+            min_risk_score=min_risk_score,
+            max_risk_score=max_risk_score,
+            since=as_utc(since) if since else None,
+            until=as_utc(until) if until else None,
+            q=q
+        )
+    except SearchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    query = (
+        select(Decision)
+        .filter(*conditions)
+        .order_by(Decision.created_at.desc(), Decision.decision_id.desc())
+    )
+    if cursor is not None:
+        if offset:
+            raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+        query = query.filter(tuple_(Decision.created_at, Decision.decision_id) < decode_cursor(cursor))
+    elif offset:
+        query = query.offset(offset)
+    
+    # One extra row tells us whether there is a next page
+    decisions = (await db.scalars(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(decisions) > limit:
+        decisions = decisions[:limit]
+        next_cursor = encode_cursor(decisions[-1])
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    return [
+    results = [
         ClaimScoreResponse(
             decision_id=d.decision_id,
             claim_id=d.claim_id,
@@ -35,21 +112,85 @@ async def list_decisions(
         )
         for d in decisions
     ]
+    return DecisionPage(count=len(results), results=results, next_cursor=next_cursor)
 
-@router.get("/api/decisions/{decision_id}", response_model=DecisionDetail)
-async def get_decision(decision_id: str, db: Session = Depends(get_db)):
-    """Get decision detail with audit trail."""
-    decision = db.query(Decision).filter(
-        Decision.decision_id == decision_id
-    ).first()
+@router.get("/api/decisions/stats", response_model=DecisionStats)
+async def get_decision_stats(
+    since: Optional[datetime] = Query(default=None, description="Window start (default: STATS_DEFAULT_DAYS before until)"),
+    until: Optional[datetime] = Query(default=None, description="Window end, exclusive (default: now)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Decision counts, risk histogram, fraud-probability percentiles and per-version breakdowns for a window."""
+    until = as_utc(until) if until else utcnow()
+    since = as_utc(since) if since else until - timedelta(days=settings.STATS_DEFAULT_DAYS)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if until - since > timedelta(days=settings.STATS_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window exceeds {settings.STATS_MAX_DAYS} days")
     
-    if not decision:
-        raise HTTPException(status_code=404, detail="Decision not found")
+    return await decision_stats(db, since, until)
+
+@router.get("/api/decisions/export")
+async def export_decisions(
+    format: str = Query(default="csv", description="csv or parquet"),
+    since: Optional[datetime] = Query(default=None, description="created_at >= since"),
+    until: Optional[datetime] = Query(default=None, description="created_at < until"),
+    decision: Optional[List[str]] = Query(default=None, description="APPROVE, REVIEW and/or REJECT"),
+    model_version: Optional[str] = Query(default=None),
+    include_explanation: bool = Query(default=False),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """
+    Stream matching decisions as CSV or Parquet, oldest first.
+    
+    Rows are read through a server-side cursor in EXPORT_BATCH_SIZE batches,
+    so memory use is constant and bytes start flowing immediately. Months
+    moved to ARCHIVE_DIR by `python -m app.archive run` are included, read
+    from their Parquet files ahead of the rows still in the database.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format {format!r}; expected csv or parquet")
     
-    audit_logs = db.query(AuditLog).filter(
-        AuditLog.decision_id == decision_id
-    ).order_by(AuditLog.created_at).all()
+    since = as_utc(since) if since else None
+    until = as_utc(until) if until else None
+    columns, query = export_query(since, until, decision, model_version, include_explanation)
+    paths = archived_files(settings.ARCHIVE_DIR, "decisions", since, until)
+    if format == "parquet" or paths:
+        try:
+            parquet_schema(columns)
+        except ExportError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    archived = read_archived(
+        paths, columns, settings.EXPORT_BATCH_SIZE, since, until, decision, model_version
+    ) if paths else None
     
+    if format == "parquet":
+        body = iter_parquet(session_factory, columns, query, settings.EXPORT_BATCH_SIZE, archived)
+    else:
+        body = iter_csv(session_factory, columns, query, settings.EXPORT_BATCH_SIZE, archived)
+    
+    filename = f"decisions_{utcnow():%Y%m%d_%H%M%S}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+async def fetch_decision_detail(db: AsyncSession, decision_id: uuid.UUID) -> Optional[Decision]:
+    """Decision plus its audit events in one round trip (LEFT JOIN on ix_audit_log_decision_id_created_at)."""
+    result = await db.scalars(
+        select(Decision)
+        .options(joinedload(Decision.audit_events))
+        .filter(Decision.decision_id == decision_id)
+    )
+    return result.unique().one_or_none()
+
+@router.get("/api/decisions/cache")
+async def decision_cache_stats():
+    """Decision detail cache size and hit/miss/eviction/invalidation counters."""
+    return decision_detail_cache.stats()
+
+def render_decision_detail(decision: Decision) -> bytes:
     return DecisionDetail(
         decision=ClaimScoreResponse(
             decision_id=decision.decision_id,
@@ -69,68 +210,138 @@ async def get_decision(decision_id: str, db: Session = Depends(get_db)):
                 "event_payload": log.event_payload,
                 "created_at": log.created_at.isoformat()
             }
-            for log in audit_logs
+            for log in decision.audit_events
         ]
+    ).model_dump_json().encode()
+
+@router.get("/api/decisions/{decision_id}", response_model=DecisionDetail)
+async def get_decision(
+    decision_id: str,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get decision detail with audit trail.
+    
+    Served from the decision detail cache when possible. The response
+    carries a strong ETag; a matching If-None-Match gets 304 Not Modified,
+    without a database query when the decision is cached.
+    """
+    try:
+        decision_id = uuid.UUID(decision_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Decision not found")
+    
+    cached = decision_detail_cache.get(decision_id)
+    if cached is not None:
+        etag, body = cached
+    else:
+        version = decision_detail_cache.version(decision_id)
+        decision = await fetch_decision_detail(db, decision_id)
+        if not decision:
+            raise HTTPException(status_code=404, detail="Decision not found")
+        body = render_decision_detail(decision)
+        etag = decision_detail_cache.put(decision_id, body, version)
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.get("/api/decisions/{decision_id}/explanation/stream")
+async def stream_explanation(decision_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Stream the LLM explanation for a decision as Server-Sent Events.
+    
+    Emits `token` events as Ollama generates text and a final `done` event;
+    the completed text is written back to the decision. Without an LLM the
+    stored explanation is sent as a single token.
+    """
+    try:
+        decision_id = uuid.UUID(decision_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Decision not found")
+    
+    decision = await db.scalar(
+        select(Decision).filter(Decision.decision_id == decision_id)
+    )
+    if not decision:
+        raise HTTPException(status_code=404, detail="Decision not found")
+    
+    created = await db.scalar(
+        select(AuditLog).filter(
+            AuditLog.decision_id == decision_id,
+            AuditLog.event_type == "decision_created"
+        )
+    )
+    claim_input = created.event_payload.get("input", {}) if created else {}
+    stored_explanation = decision.explanation
+    trace_id = get_trace_id()
+    
+    async def events():
+        if not ollama_client.available or not claim_input:
+            yield _sse("token", {"text": stored_explanation})
+            yield _sse("done", {"decision_id": str(decision_id), "explanation": stored_explanation})
+            return
+        
+        chunks = []
+        try:
+            async for token in ollama_client.stream_explanation(
+                claim_input["amount"],
+                decision.incident_class or claim_input["incident_type"],
+                claim_input["history_score"],
+                decision.risk_score,
+                decision.fraud_probability,
+                decision.policy_version
+            ):
+                chunks.append(token)
+                yield _sse("token", {"text": token})
+        except Exception as e:
+            logger.warning(f"Explanation stream failed for decision {decision_id}: {e}")
+            yield _sse("error", {"detail": "LLM stream failed", "explanation": stored_explanation})
+            return
+        
+        explanation = "".join(chunks).strip()
+        if explanation and explanation != stored_explanation:
+            await explanation_backfill.record(decision_id, explanation, trace_id)
+        yield _sse("done", {"decision_id": str(decision_id), "explanation": explanation or stored_explanation})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @router.get("/api/models")
 async def list_models():
     """List available models."""
-    return {
-        "models": [
-            {
-                "name": "rule-based-v1",
-                "version": "rb-v1",
-                "type": "deterministic",
-                "status": "active"
-            }
-        ]
-    }
+    return {"models": model_registry.describe()}
 
 @router.post("/api/seed")
 async def seed_demo_data(
-    count: int = Query(default=10, le=100),
+    count: int = Query(default=10, ge=1, le=settings.SEED_MAX_COUNT),
     seed_token: str = Query(...),
-    db: Session = Depends(get_db),
+    seed: Optional[int] = Query(default=None, description="Random seed; reuse it to reproduce a dataset"),
+    profile: Optional[SeedProfile] = Body(default=None),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
     api_key: str = Depends(verify_api_key)
 ):
-    """Seed demo data (protected endpoint)."""
-    from app.config import settings
-    import random
+    """
+    Seed synthetic scored claims with audit rows and raw Mongo claims (protected endpoint).
     
+    Claims are generated deterministically from the profile and seed; the
+    seed used is returned so the dataset can be regenerated.
+    """
     if seed_token != settings.SEED_TOKEN:
         raise HTTPException(status_code=401, detail="Invalid seed token")
     
-    incident_types = ["collision", "theft", "fire", "injury", "vandalism"]
-    
-    for i in range(count):
-        claim = {
-            "claim_id": f"CLM-DEMO-{i+1:04d}",
-            "customer_id": f"CUST-{random.randint(1000, 9999)}",
-            "amount": random.uniform(500, 50000),
-            "incident_type": random.choice(incident_types),
-            "history_score": random.uniform(0, 100)
-        }
-        
-        from app.schemas import ClaimScoreRequest
-        claim_request = ClaimScoreRequest(**claim)
-        
-        risk_score, fraud_prob, decision_text = ScoringEngine.calculate_risk_score(claim_request)
-        explanation = ScoringEngine.generate_template_explanation(
-            claim_request, risk_score, fraud_prob, decision_text
-        )
-        
-        decision_record = Decision(
-            claim_id=claim["claim_id"],
-            customer_id=claim["customer_id"],
-            risk_score=risk_score,
-            fraud_probability=fraud_prob,
-            decision=decision_text,
-            explanation=explanation
-        )
-        
-        db.add(decision_record)
-    
-    db.commit()
+    profile = profile or SeedProfile()
+    if seed is None and "seed" not in profile.model_fields_set:
+        seed = random.randrange(2**31)
+    if seed is not None:
+        profile = profile.model_copy(update={"seed": seed})
     
-    return {"message": f"Seeded {count} demo claims"}
+    return await seed_decisions(count, profile, session_factory)
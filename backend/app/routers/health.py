@@ -1,7 +1,23 @@
 from fastapi import APIRouter
+from app.clients.mongo import raw_claim_writer
+from app.persistence import group_commit_writer
+from app.rollups import rollup_merger
+from app.scoring.explanations import explanation_backfill
+from app.scoring.jobs import job_runner
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "deevo-backend"}
+
+@router.get("/health/queues")
+async def queue_stats():
+    """Depth and throughput counters for background write queues."""
+    return {
+        "mongo_raw_claims": raw_claim_writer.stats(),
+        "group_commit": group_commit_writer.stats(),
+        "rollup_merge": rollup_merger.stats(),
+        "explanation_backfill": explanation_backfill.stats(),
+        "scoring_jobs": job_runner.stats()
+    }
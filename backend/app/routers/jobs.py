@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
+from app.dependencies import verify_api_key
+from app.models import ScoringJob, utcnow
+from app.routers.claims import get_scorer
+from app.schemas import ScoringJobResponse
+from app.scoring.jobs import JobError, detect_format, job_runner
+from app.scoring.policy import get_policy
+from app.scoring.registry import Scorer
+from typing import Optional
+import asyncio
+import os
+import uuid
+
+router = APIRouter()
+
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+
+def _job_response(job: ScoringJob) -> ScoringJobResponse:
+    rows_per_second = None
+    last_progress = job.finished_at or job.updated_at
+    if job.started_at is not None and last_progress is not None and job.processed_rows:
+        elapsed = (last_progress - job.started_at).total_seconds()
+        if elapsed > 0:
+            rows_per_second = round(job.processed_rows / elapsed, 1)
+    if job.status == "completed":
+        progress = 1.0
+    elif job.total_rows:
+        progress = round(job.processed_rows / job.total_rows, 4)
+    else:
+        progress = 0.0
+
+    return ScoringJobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        input_format=job.input_format,
+        model_version=job.model_version,
+        policy_version=job.policy_version,
+        total_rows=job.total_rows,
+        processed_rows=job.processed_rows,
+        scored_rows=job.scored_rows,
+        error_count=job.error_count,
+        progress=progress,
+        rows_per_second=rows_per_second,
+        errors=job.errors,
+        last_error=job.last_error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at
+    )
+
+
+async def _get_job(db: AsyncSession, job_id: str) -> ScoringJob:
+    try:
+        job = await db.get(ScoringJob, uuid.UUID(job_id))
+    except ValueError:
+        job = None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/api/jobs", response_model=ScoringJobResponse, status_code=202)
+async def submit_job(
+    file: UploadFile = File(..., description="CSV or Parquet file of claims"),
+    format: Optional[str] = Query(None, description="csv or parquet; defaults to the file extension"),
+    db: AsyncSession = Depends(get_db),
+    scorer: Scorer = Depends(get_scorer),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Queue a file of claims for background scoring (protected endpoint).
+
+    The upload is stored under JOB_DIR and scored in chunks by the job
+    runner; poll GET /api/jobs/{job_id} for progress.
+    """
+    try:
+        fmt = detect_format(file.filename, format)
+    except JobError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    job_id = uuid.uuid4()
+    input_path, output_path = job_runner.paths_for(job_id, fmt)
+    os.makedirs(job_runner.job_dir, exist_ok=True)
+    with open(input_path, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            await asyncio.to_thread(f.write, chunk)
+
+    job = ScoringJob(
+        job_id=job_id,
+        status="queued",
+        input_format=fmt,
+        input_path=input_path,
+        output_path=output_path,
+        model_version=scorer.version,
+        policy_version=get_policy().version,
+        chunk_size=job_runner.chunk_size,
+        processed_rows=0,
+        scored_rows=0,
+        error_count=0,
+        output_offset=0,
+        errors=[],
+        created_at=utcnow()
+    )
+    db.add(job)
+    await db.commit()
+    job_runner.submit(job_id)
+
+    return _job_response(job)
+
+
+@router.get("/api/jobs/{job_id}", response_model=ScoringJobResponse)
+async def get_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """Job status with progress, throughput and the first recorded row errors."""
+    return _job_response(await _get_job(db, job_id))
+
+
+@router.get("/api/jobs/{job_id}/output")
+async def get_job_output(job_id: str, db: AsyncSession = Depends(get_db)):
+    """Download the scored-rows CSV of a completed job."""
+    job = await _get_job(db, job_id)
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return FileResponse(job.output_path, media_type="text/csv", filename=f"{job.job_id}.csv")
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.clients.explanation_cache import explanation_cache
+from app.config import settings
+from app.dependencies import verify_api_key
+from app.scoring.cache import scoring_cache
+from app.scoring.policy import policy_store
+from app.scoring.shadow import shadow_evaluator
+
+router = APIRouter()
+
+@router.get("/api/policies")
+async def list_policies():
+    """List loaded scoring policies and their compiled tables."""
+    return {
+        "active": settings.POLICY_VERSION,
+        "policies": [policy_store.get(v).describe() for v in policy_store.versions()]
+    }
+
+@router.get("/api/policies/{version}")
+async def get_policy_detail(version: str):
+    """Get a single compiled policy."""
+    try:
+        return policy_store.get(version).describe()
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Policy not found")
+
+@router.post("/api/policies/reload")
+async def reload_policies(api_key: str = Depends(verify_api_key)):
+    """Recompile policy files that changed on disk (protected endpoint)."""
+    reloaded = policy_store.reload()
+    return {"reloaded": reloaded, "versions": policy_store.versions()}
+
+@router.get("/api/scoring/cache")
+async def scoring_cache_stats():
+    """Scoring result cache size and hit/miss/eviction counters."""
+    return scoring_cache.stats()
+
+@router.get("/api/scoring/shadow")
+async def shadow_stats():
+    """Shadow scoring queue depth and submitted/dropped/written counters."""
+    return shadow_evaluator.stats()
+
+@router.get("/api/scoring/explanation-cache")
+async def explanation_cache_stats():
+    """LLM explanation cache hit rates per tier."""
+    return explanation_cache.stats()
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.analytics import as_utc
+from app.config import settings
+from app.database import get_db
+from app.models import utcnow
+from app.rollups import GRANULARITIES, GROUP_BY_COLUMNS, hour_ceil, hour_floor, query_rollups
+from app.schemas import RollupQueryResponse
+from datetime import datetime, timedelta
+from typing import Optional
+
+router = APIRouter()
+
+@router.get("/api/rollups/decisions", response_model=RollupQueryResponse)
+async def get_decision_rollups(
+    since: Optional[datetime] = Query(default=None, description="Window start, rounded down to the hour (default: STATS_DEFAULT_DAYS before until)"),
+    until: Optional[datetime] = Query(default=None, description="Window end, exclusive, rounded up to the hour (default: now)"),
+    granularity: str = Query(default="hour", description="hour, day or total"),
+    group_by: Optional[str] = Query(
+        default=None,
+        description="Comma-separated dimensions: model_version, policy_version, incident_class, decision"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Decision volumes, average risk, fraud probability and risk histograms per
+    time bucket, served from the hourly rollups rather than a decisions scan.
+    """
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    dimensions = tuple(dict.fromkeys(d.strip() for d in group_by.split(",") if d.strip())) if group_by else ()
+    unknown = [d for d in dimensions if d not in GROUP_BY_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by dimension(s): {', '.join(unknown)}")
+
+    until = hour_ceil(as_utc(until) if until else utcnow())
+    since = hour_floor(as_utc(since) if since else until - timedelta(days=settings.STATS_DEFAULT_DAYS))
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if until - since > timedelta(days=settings.STATS_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window exceeds {settings.STATS_MAX_DAYS} days")
+
+    return RollupQueryResponse(
+        since=since,
+        until=until,
+        granularity=granularity,
+        group_by=list(dimensions),
+        buckets=await query_rollups(db, since, until, granularity, dimensions)
+    )
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from uuid import UUID
 
 class ClaimScoreRequest(BaseModel):
@@ -22,6 +22,111 @@ class ClaimScoreResponse(BaseModel):
     policy_version: str
     timestamp: datetime
 
+class ClaimBatchScoreRequest(BaseModel):
+    claims: list[ClaimScoreRequest] = Field(..., min_length=1, description="Claims to score in one pass")
+
+class ClaimBatchScoreResponse(BaseModel):
+    count: int
+    results: list[ClaimScoreResponse]
+
+class DecisionPage(BaseModel):
+    count: int
+    results: list[ClaimScoreResponse]
+    next_cursor: Optional[str] = Field(default=None, description="Pass as cursor for the next page; null on the last page")
+
+class HistogramBucket(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+class VersionBreakdown(BaseModel):
+    model_version: str
+    policy_version: str
+    total: int
+    by_decision: dict[str, int]
+    avg_risk_score: float
+    avg_fraud_probability: float
+
+class DecisionStats(BaseModel):
+    since: datetime
+    until: datetime
+    total: int
+    by_decision: dict[str, int]
+    avg_risk_score: Optional[float]
+    avg_fraud_probability: Optional[float]
+    risk_score_histogram: list[HistogramBucket]
+    fraud_probability_percentiles: dict[str, Optional[float]] = Field(
+        ..., description="p50/p90/p95/p99; exact on PostgreSQL, within 0.001 elsewhere"
+    )
+    by_version: list[VersionBreakdown]
+
+class RollupBucket(BaseModel):
+    bucket_start: Optional[datetime] = Field(None, description="Hour or day start (UTC); null for granularity=total")
+    model_version: Optional[str] = None
+    policy_version: Optional[str] = None
+    incident_class: Optional[str] = None
+    decision: Optional[str] = None
+    count: int
+    risk_score_sum: float
+    fraud_probability_sum: float
+    avg_risk_score: float
+    avg_fraud_probability: float
+    risk_score_histogram: list[HistogramBucket]
+
+class RollupQueryResponse(BaseModel):
+    since: datetime
+    until: datetime
+    granularity: str
+    group_by: list[str]
+    buckets: list[RollupBucket]
+
 class DecisionDetail(BaseModel):
     decision: ClaimScoreResponse
     audit_events: list[dict]
+
+class ScoringJobError(BaseModel):
+    row: int
+    error: str
+
+class ScoringJobResponse(BaseModel):
+    job_id: UUID
+    status: str
+    input_format: str
+    model_version: str
+    policy_version: str
+    total_rows: Optional[int]
+    processed_rows: int
+    scored_rows: int
+    error_count: int
+    progress: float = Field(..., description="Fraction of input rows committed")
+    rows_per_second: Optional[float] = Field(None, description="Average throughput since the job started")
+    errors: list[ScoringJobError] = Field(default_factory=list, description="First recorded row errors")
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class SeedProfile(BaseModel):
+    """Distributions for synthetic claims; the same profile and seed always produce the same claims."""
+    seed: int = Field(0, description="Random seed")
+    claim_prefix: str = Field("CLM-SYN", description="Claim ids are <prefix>-<seed>-<index>")
+    amount_median: float = Field(4000.0, gt=0, description="Median claim amount (log-normal)")
+    amount_sigma: float = Field(1.0, ge=0, description="Log-normal sigma of claim amounts")
+    amount_min: float = Field(100.0, gt=0)
+    amount_max: float = Field(250000.0, gt=0)
+    incident_weights: dict[str, float] = Field(
+        default_factory=lambda: {"collision": 0.4, "theft": 0.15, "fire": 0.1, "injury": 0.2, "vandalism": 0.15},
+        description="Relative frequency of each incident type"
+    )
+    history_alpha: float = Field(2.0, gt=0, description="Beta(alpha, beta) shape of history_score / 100")
+    history_beta: float = Field(5.0, gt=0)
+    customers: int = Field(50000, gt=0, description="Number of distinct customers")
+    end: datetime = Field(datetime(2026, 1, 1, tzinfo=timezone.utc), description="Latest created_at (UTC)")
+    days: float = Field(365.0, ge=0, description="created_at is spread uniformly over this many days before end")
+    
+    @field_validator("incident_weights")
+    @classmethod
+    def _weights_positive(cls, weights: dict[str, float]) -> dict[str, float]:
+        if not weights or any(w < 0 for w in weights.values()) or sum(weights.values()) <= 0:
+            raise ValueError("incident_weights must be non-negative with a positive total")
+        return weights
@@ -0,0 +1,92 @@
+"""
+Row building for batch scoring paths (batch endpoint, NDJSON ingest, jobs).
+
+Takes the columnar output of a scorer's score_batch and produces the
+decision, audit and raw-claim rows that app.persistence bulk-inserts.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from app.persistence import new_decision_rows, utcnow
+from app.schemas import ClaimScoreRequest
+from app.scoring.engine import ScoringEngine
+from app.scoring.policy import CompiledPolicy
+
+
+@dataclass
+class BatchRows:
+    decision_rows: list[dict] = field(default_factory=list)
+    audit_rows: list[dict] = field(default_factory=list)
+    raw_claims: list[dict] = field(default_factory=list)
+
+
+def incident_codes_for(claims: list[ClaimScoreRequest], policy: CompiledPolicy) -> np.ndarray:
+    return np.fromiter(
+        (policy.incident_code(c.incident_type) for c in claims),
+        dtype=np.intp, count=len(claims)
+    )
+
+
+def build_batch_rows(
+    claims: list[ClaimScoreRequest],
+    incident_codes: np.ndarray,
+    risk_scores: np.ndarray,
+    fraud_probabilities: np.ndarray,
+    decisions: np.ndarray,
+    model_version: str,
+    policy: CompiledPolicy,
+    trace_id: str,
+    created_at: Optional[datetime] = None
+) -> BatchRows:
+    """Turn scored columns into insert-ready rows. Batches use the template explanation."""
+    created_at = created_at or utcnow()
+    rows = BatchRows()
+    
+    for claim, incident_code, risk_score, fraud_probability, decision in zip(
+        claims, incident_codes.tolist(), risk_scores.tolist(),
+        fraud_probabilities.tolist(), decisions.tolist()
+    ):
+        incident_class = policy.incident_label(incident_code)
+        payload = claim.model_dump()
+        # LLM explanations are per-claim round trips; batches use the template
+        explanation = ScoringEngine.generate_template_explanation(
+            claim, risk_score, fraud_probability, decision, policy, incident_code
+        )
+        
+        decision_row, audit_row = new_decision_rows(
+            {
+                "claim_id": claim.claim_id,
+                "customer_id": claim.customer_id,
+                "model_version": model_version,
+                "policy_version": policy.version,
+                "incident_class": incident_class,
+                "risk_score": risk_score,
+                "fraud_probability": fraud_probability,
+                "decision": decision,
+                "explanation": explanation
+            },
+            {
+                "trace_id": trace_id,
+                "input": payload,
+                "output": {
+                    "incident_class": incident_class,
+                    "risk_score": risk_score,
+                    "fraud_probability": fraud_probability,
+                    "decision": decision
+                }
+            },
+            created_at
+        )
+        rows.decision_rows.append(decision_row)
+        rows.audit_rows.append(audit_row)
+        rows.raw_claims.append({
+            "claim_id": claim.claim_id,
+            "customer_id": claim.customer_id,
+            "payload": payload,
+            "decision_id": str(decision_row["decision_id"])
+        })
+    
+    return rows
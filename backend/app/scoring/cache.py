@@ -0,0 +1,115 @@
+"""
+Memoized scoring results.
+
+The rule engine is deterministic in (policy version, amount band, incident
+code, history score), so the score and the template explanation (minus the
+claim-amount line) are cached per key in a bounded LRU. The cache is cleared
+whenever the policy store recompiles a policy.
+"""
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.config import settings
+from app.schemas import ClaimScoreRequest
+from app.scoring.engine import ScoringEngine
+from app.scoring.policy import CompiledPolicy, PolicyStore, policy_store
+
+
+@dataclass(frozen=True)
+class ScoredClaim:
+    risk_score: float
+    fraud_probability: float
+    decision: str
+    explanation_head: str
+    explanation_tail: str
+
+    def template_explanation(self, amount: float) -> str:
+        return self.explanation_head + ScoringEngine.template_amount_line(amount) + self.explanation_tail
+
+
+class ScoringCache:
+    """Thread-safe LRU of ScoredClaim keyed on normalized scoring inputs."""
+
+    def __init__(self, store: PolicyStore, maxsize: int = 10000):
+        self.store = store
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[tuple, ScoredClaim] = OrderedDict()
+        self._generation = store.generation
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def score(
+        self,
+        claim: ClaimScoreRequest,
+        policy: CompiledPolicy,
+        incident_code: int
+    ) -> ScoredClaim:
+        """Return the cached result for the claim's scoring key, computing it on a miss."""
+        key = (
+            policy.version,
+            bisect_right(policy.amount_edges, claim.amount),
+            incident_code,
+            claim.history_score
+        )
+        if self.enabled:
+            with self._lock:
+                if self._generation != self.store.generation:
+                    self._clear_locked()
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                self.misses += 1
+
+        risk_score, fraud_probability, decision = ScoringEngine.calculate_risk_score(
+            claim, policy, incident_code
+        )
+        head, tail = ScoringEngine.template_explanation_parts(
+            claim.history_score, risk_score, fraud_probability, decision, policy, incident_code
+        )
+        entry = ScoredClaim(risk_score, fraud_probability, decision, head, tail)
+
+        if self.enabled:
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+
+    def _clear_locked(self):
+        self._entries.clear()
+        self._generation = self.store.generation
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+scoring_cache = ScoringCache(policy_store, maxsize=settings.SCORING_CACHE_SIZE)
@@ -0,0 +1,49 @@
+"""
+Incident-type classifier.
+
+Turns free-text incident descriptions into a small integer code with a single
+precompiled regex pass, memoized in a bounded LRU cache of recent strings.
+"""
+import re
+import sys
+from functools import lru_cache
+
+
+class IncidentClassifier:
+    """
+    Classify text into one of `classes`, where index 0 is the catch-all.
+
+    Semantics match the original substring scan: if several keywords occur,
+    the one listed first wins, regardless of where it appears in the text.
+    """
+
+    def __init__(self, classes: tuple[str, ...], cache_size: int = 4096):
+        self.classes = tuple(sys.intern(name.lower()) for name in classes)
+        self._codes = {name: code for code, name in enumerate(self.classes) if code > 0}
+        # Alternatives in precedence order: where several keywords start at the
+        # same position ("car" / "carfire"), the regex reports the one listed
+        # first, which is the only one there that could win
+        keywords = sorted(self._codes, key=self._codes.get)
+        # Zero-width lookahead so overlapping keywords are all reported in one scan
+        self._pattern = re.compile(
+            "(?=(" + "|".join(re.escape(k) for k in keywords) + "))", re.IGNORECASE
+        ) if keywords else None
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, text: str) -> int:
+        if self._pattern is None:
+            return 0
+        best = 0
+        for match in self._pattern.finditer(text):
+            code = self._codes[match.group(1).lower()]
+            if code == 1:
+                return 1
+            if best == 0 or code < best:
+                best = code
+        return best
+
+    def label(self, code: int) -> str:
+        return self.classes[code]
+
+    def cache_info(self):
+        return self.classify.cache_info()
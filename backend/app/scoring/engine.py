@@ -1,85 +1,145 @@
-import math
+import numpy as np
+from typing import Optional
 from app.schemas import ClaimScoreRequest
+from app.scoring.policy import CompiledPolicy, DECISIONS, get_policy
+
+DECISION_LABELS = np.array(DECISIONS, dtype=object)
+
 
 class ScoringEngine:
     @staticmethod
-    def calculate_risk_score(claim: ClaimScoreRequest) -> tuple[float, float, str]:
+    def incident_code(incident_type: str, policy: Optional[CompiledPolicy] = None) -> int:
+        """Map a free-text incident type to its index in the policy's incident classes."""
+        return (policy or get_policy()).incident_code(incident_type)
+
+    @staticmethod
+    def calculate_risk_score(
+        claim: ClaimScoreRequest,
+        policy: Optional[CompiledPolicy] = None,
+        incident_code: Optional[int] = None
+    ) -> tuple[float, float, str]:
         """
         Calculate risk score, fraud probability, and decision.
+        Pass incident_code when the caller has already classified the claim.
         Returns: (risk_score, fraud_probability, decision)
         """
+        policy = policy or get_policy()
+        if incident_code is None:
+            incident_code = policy.incident_code(claim.incident_type)
         risk_score = 0.0
         
         # Amount-based scoring
-        if claim.amount < 500:
-            risk_score += 5
-        elif claim.amount < 5000:
-            risk_score += 15
-        elif claim.amount < 20000:
-            risk_score += 30
-        else:
-            risk_score += 45
+        risk_score += policy.amount_band_points(claim.amount)
         
         # Incident type scoring
-        incident_lower = claim.incident_type.lower()
-        if "collision" in incident_lower:
-            risk_score += 15
-        elif "theft" in incident_lower:
-            risk_score += 25
-        elif "fire" in incident_lower:
-            risk_score += 35
-        elif "injury" in incident_lower:
-            risk_score += 20
-        else:
-            risk_score += 10
+        risk_score += policy.incident_points[incident_code]
         
         # History score
-        risk_score += claim.history_score * 0.3
+        risk_score += claim.history_score * policy.history_weight
         
-        # Cap at 100
-        risk_score = min(risk_score, 100.0)
+        # Cap
+        risk_score = min(risk_score, policy.score_cap)
         
         # Fraud probability (sigmoid)
-        fraud_probability = 1 / (1 + math.exp(-(risk_score - 50) / 10))
+        fraud_probability = float(policy.fraud_probability(risk_score))
         
         # Decision policy
-        if fraud_probability < 0.35:
-            decision = "APPROVE"
-        elif fraud_probability < 0.70:
-            decision = "REVIEW"
-        else:
-            decision = "REJECT"
+        decision = policy.decide(fraud_probability)
         
         return risk_score, fraud_probability, decision
     
+    @staticmethod
+    def score_batch(
+        amounts: np.ndarray,
+        incident_codes: np.ndarray,
+        history_scores: np.ndarray,
+        policy: Optional[CompiledPolicy] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized equivalent of calculate_risk_score over columnar input.
+
+        Args:
+            amounts: Claim amounts
+            incident_codes: Incident codes from incident_code (same policy)
+            history_scores: Customer history scores (0-100)
+            policy: Compiled policy (default: the active POLICY_VERSION)
+
+        Returns:
+            (risk_scores, fraud_probabilities, decisions) arrays, element-wise
+            identical to the scalar path.
+        """
+        policy = policy or get_policy()
+        amounts = np.asarray(amounts, dtype=np.float64)
+        incident_codes = np.asarray(incident_codes, dtype=np.intp)
+        history_scores = np.asarray(history_scores, dtype=np.float64)
+        
+        band = np.searchsorted(policy.amount_edges_array, amounts, side="right")
+        risk_scores = policy.amount_points_array[band] + policy.incident_points_array[incident_codes]
+        risk_scores += history_scores * policy.history_weight
+        np.minimum(risk_scores, policy.score_cap, out=risk_scores)
+        
+        fraud_probabilities = policy.fraud_probability(risk_scores)
+        decisions = DECISION_LABELS[
+            np.searchsorted(policy.thresholds_array, fraud_probabilities, side="right")
+        ]
+        
+        return risk_scores, fraud_probabilities, decisions
+    
     @staticmethod
     def generate_template_explanation(
         claim: ClaimScoreRequest,
         risk_score: float,
         fraud_probability: float,
-        decision: str
+        decision: str,
+        policy: Optional[CompiledPolicy] = None,
+        incident_code: Optional[int] = None
     ) -> str:
         """Generate deterministic template explanation."""
-        risk_level = "LOW" if fraud_probability < 0.35 else "MEDIUM" if fraud_probability < 0.70 else "HIGH"
+        policy = policy or get_policy()
+        if incident_code is None:
+            incident_code = policy.incident_code(claim.incident_type)
+        head, tail = ScoringEngine.template_explanation_parts(
+            claim.history_score, risk_score, fraud_probability, decision, policy, incident_code
+        )
+        return head + ScoringEngine.template_amount_line(claim.amount) + tail
+    
+    @staticmethod
+    def template_amount_line(amount: float) -> str:
+        return f"• Claim amount: ${amount:,.2f} (contributes to overall risk assessment)\n"
+    
+    @staticmethod
+    def template_explanation_parts(
+        history_score: float,
+        risk_score: float,
+        fraud_probability: float,
+        decision: str,
+        policy: CompiledPolicy,
+        incident_code: int
+    ) -> tuple[str, str]:
+        """
+        Template explanation split around the claim-amount line, the only part
+        that varies within a scoring band (see app.scoring.cache).
+        """
+        risk_level = policy.risk_level(fraud_probability)
+        
+        head = f"**Risk Level: {risk_level}**\n\n"
+        head += "**Key Factors:**\n"
         
-        explanation = f"**Risk Level: {risk_level}**\n\n"
-        explanation += "**Key Factors:**\n"
-        explanation += f"• Claim amount: ${claim.amount:,.2f} (contributes to overall risk assessment)\n"
-        explanation += f"• Incident type: {claim.incident_type} (evaluated against historical patterns)\n"
-        explanation += f"• Customer history score: {claim.history_score:.1f}/100\n\n"
-        explanation += f"**Assessment:**\n"
-        explanation += f"• Overall risk score: {risk_score:.2f}/100\n"
-        explanation += f"• Fraud probability: {fraud_probability:.1%}\n\n"
-        explanation += "**Recommended Action:**\n"
+        tail = f"• Incident type: {policy.incident_label(incident_code)} (evaluated against historical patterns)\n"
+        tail += f"• Customer history score: {history_score:.1f}/100\n\n"
+        tail += f"**Assessment:**\n"
+        tail += f"• Overall risk score: {risk_score:.2f}/100\n"
+        tail += f"• Fraud probability: {fraud_probability:.1%}\n\n"
+        tail += "**Recommended Action:**\n"
         
         if decision == "APPROVE":
-            explanation += "• Auto-approve this claim for fast-track processing\n"
-            explanation += "• Estimated processing time: <2 hours\n"
+            tail += "• Auto-approve this claim for fast-track processing\n"
+            tail += "• Estimated processing time: <2 hours\n"
         elif decision == "REVIEW":
-            explanation += "• Assign to senior adjuster for manual review\n"
-            explanation += "• Request additional documentation if needed\n"
+            tail += "• Assign to senior adjuster for manual review\n"
+            tail += "• Request additional documentation if needed\n"
         else:
-            explanation += "• Escalate to fraud investigation team\n"
-            explanation += "• Conduct thorough verification before proceeding\n"
+            tail += "• Escalate to fraud investigation team\n"
+            tail += "• Conduct thorough verification before proceeding\n"
         
-        return explanation
+        return head, tail
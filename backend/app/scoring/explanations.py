@@ -0,0 +1,100 @@
+"""
+Background backfill of LLM explanations.
+
+When Ollama misses the request's latency budget, score_claim answers with the
+template explanation and hands the still-running LLM task to
+ExplanationBackfill. Once the LLM answers, the Decision's explanation is
+replaced, an "explanation_updated" audit event is appended and the cached
+decision detail is invalidated.
+"""
+import asyncio
+import uuid
+from typing import Callable, Optional
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Decision, utcnow
+from app.persistence import append_audit_events
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ExplanationBackfill:
+    def __init__(self, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.scheduled = 0
+        self.updated = 0
+        self.failed = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    def schedule(
+        self,
+        explanation_task: asyncio.Task,
+        decision_id: uuid.UUID,
+        trace_id: str,
+        source: Optional[str] = None
+    ) -> asyncio.Task:
+        task = asyncio.create_task(self._backfill(explanation_task, decision_id, trace_id, source))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.scheduled += 1
+        return task
+
+    async def _backfill(self, explanation_task, decision_id, trace_id, source):
+        try:
+            explanation = await explanation_task
+            if not explanation:
+                self.failed += 1
+                return
+            await self.record(decision_id, explanation, trace_id, source)
+            self.updated += 1
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Explanation backfill failed for decision {decision_id}: {e}")
+
+    async def record(
+        self,
+        decision_id: uuid.UUID,
+        explanation: str,
+        trace_id: str,
+        source: Optional[str] = None
+    ):
+        """Replace the Decision's explanation and append an explanation_updated audit event."""
+        async with self.session_factory() as db:
+            await db.execute(
+                update(Decision)
+                .where(Decision.decision_id == decision_id)
+                .values(explanation=explanation)
+            )
+            await append_audit_events(db, [{
+                "id": uuid.uuid4(),
+                "decision_id": decision_id,
+                "event_type": "explanation_updated",
+                "event_payload": {
+                    "trace_id": trace_id,
+                    "source": source or f"ollama:{settings.OLLAMA_MODEL}",
+                    "explanation": explanation
+                },
+                "created_at": utcnow()
+            }])
+            await db.commit()
+
+    async def drain(self, timeout: float = 5.0):
+        """Give in-flight backfills a chance to finish on shutdown."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._tasks),
+            "scheduled": self.scheduled,
+            "updated": self.updated,
+            "failed": self.failed
+        }
+
+
+explanation_backfill = ExplanationBackfill()
@@ -0,0 +1,443 @@
+"""
+Background batch-scoring jobs for CSV and Parquet files.
+
+POST /api/jobs stores the upload under JOB_DIR and records a queued
+ScoringJob. JobRunner workers read the file in chunk_size-row chunks; each
+chunk is validated, scored and turned into decision rows in a process pool,
+appended to the job's output CSV, and then bulk-inserted in the same
+transaction that advances the job's progress counters.
+
+Several processes may run a JobRunner against the same table. A runner
+claims a job with one conditional UPDATE (queued, or running with a lapsed
+lease) and renews its lease before writing each chunk; the renewal locks
+the job row until the chunk commits, and a runner that finds the lease
+taken abandons the job. Runners rescan for claimable jobs every lease
+period, so a job left behind by a crashed process is picked up once its
+lease lapses: the new owner truncates any output written past the last
+committed chunk and continues from there.
+"""
+import asyncio
+import csv
+import io
+import os
+import socket
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import islice
+from typing import Callable, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.clients.mongo import raw_claim_writer
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import ScoringJob, utcnow
+from app.persistence import bulk_insert_decisions
+from app.schemas import ClaimScoreRequest
+from app.scoring.batch import BatchRows, build_batch_rows, incident_codes_for
+from app.scoring.policy import get_policy
+from app.scoring.registry import model_registry
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+JOB_FORMATS = ("csv", "parquet")
+OUTPUT_COLUMNS = [
+    "row", "decision_id", "claim_id", "customer_id", "incident_class",
+    "risk_score", "fraud_probability", "decision", "model_version", "policy_version"
+]
+
+
+class JobError(Exception):
+    """A job input that cannot be read (unsupported format, missing dependency)."""
+
+
+class LeaseLost(Exception):
+    """Another runner claimed the job after this runner's lease lapsed."""
+
+
+def detect_format(filename: str, declared: Optional[str] = None) -> str:
+    fmt = (declared or os.path.splitext(filename or "")[1].lstrip(".")).lower()
+    if fmt == "pq":
+        fmt = "parquet"
+    if fmt not in JOB_FORMATS:
+        raise JobError(f"Unsupported job format {fmt or '(none)'!r}; expected one of {', '.join(JOB_FORMATS)}")
+    if fmt == "parquet":
+        _parquet()
+    return fmt
+
+
+def _parquet():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise JobError("Parquet jobs require pyarrow, which is not installed") from None
+    return pyarrow.parquet
+
+
+def iter_rows(path: str, fmt: str) -> Iterator[dict]:
+    """Yield input rows as dicts without loading the whole file."""
+    if fmt == "parquet":
+        for batch in _parquet().ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+    with open(path, newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def count_rows(path: str, fmt: str) -> int:
+    if fmt == "parquet":
+        return _parquet().ParquetFile(path).metadata.num_rows
+    return sum(1 for _ in iter_rows(path, fmt))
+
+
+def score_rows(
+    rows: list[dict],
+    first_row: int,
+    model_version: str,
+    policy_version: str,
+    trace_id: str
+) -> tuple[BatchRows, list[dict], str]:
+    """
+    Validate and score one chunk; runs in the job process pool.
+
+    Returns the insert-ready rows, per-row validation errors (1-based input
+    row numbers) and the chunk's output CSV lines.
+    """
+    claims, row_numbers, errors = [], [], []
+    for row_number, row in enumerate(rows, start=first_row):
+        try:
+            claims.append(ClaimScoreRequest.model_validate(row))
+            row_numbers.append(row_number)
+        except ValidationError as e:
+            errors.append({
+                "row": row_number,
+                "error": "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+                )
+            })
+
+    batch = BatchRows()
+    if claims:
+        scorer = model_registry.get(model_version)
+        policy = get_policy(policy_version)
+        incident_codes = incident_codes_for(claims, policy)
+        risk_scores, fraud_probabilities, decisions = scorer.score_batch(claims, incident_codes, policy)
+        batch = build_batch_rows(
+            claims, incident_codes, risk_scores, fraud_probabilities, decisions,
+            scorer.version, policy, trace_id
+        )
+
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    for row_number, row in zip(row_numbers, batch.decision_rows):
+        writer.writerow([
+            row_number, row["decision_id"], row["claim_id"], row["customer_id"], row["incident_class"],
+            row["risk_score"], row["fraud_probability"], row["decision"],
+            row["model_version"], row["policy_version"]
+        ])
+    return batch, errors, output.getvalue()
+
+
+def append_output(path: str, offset: int, text: str) -> int:
+    """Write text at the committed offset (dropping anything past it) and return the new offset."""
+    with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        if offset == 0:
+            f.write((",".join(OUTPUT_COLUMNS) + "\n").encode())
+        f.write(text.encode())
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+
+class JobRunner:
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        job_dir: str = "./jobs",
+        chunk_size: int = 5000,
+        workers: int = 1,
+        process_workers: int = 2,
+        max_recorded_errors: int = 100,
+        lease_seconds: float = 300.0
+    ):
+        self.session_factory = session_factory
+        self.job_dir = job_dir
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.process_workers = process_workers
+        self.max_recorded_errors = max_recorded_errors
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.submitted = 0
+        self.resumed = 0
+        self.completed = 0
+        self.failed = 0
+        self.rows_scored = 0
+        self.lost_leases = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: list[asyncio.Task] = []
+        self._active: set[uuid.UUID] = set()
+        self._queued: set[uuid.UUID] = set()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def paths_for(self, job_id: uuid.UUID, fmt: str) -> tuple[str, str]:
+        """(input_path, output_path) for a new job."""
+        return (
+            os.path.join(self.job_dir, f"{job_id}.{fmt}"),
+            os.path.join(self.job_dir, f"{job_id}.out.csv")
+        )
+
+    def submit(self, job_id: uuid.UUID) -> bool:
+        """Queue a committed job; returns False if no runner is active (it resumes on next start)."""
+        if not self.running:
+            return False
+        self._enqueue(job_id)
+        self.submitted += 1
+        return True
+
+    def _enqueue(self, job_id: uuid.UUID) -> bool:
+        if job_id in self._queued or job_id in self._active:
+            return False
+        self._queued.add(job_id)
+        self._queue.put_nowait(job_id)
+        return True
+
+    def _claimable(self, now):
+        # Queued jobs, and running jobs whose owner stopped renewing its lease
+        return or_(
+            ScoringJob.status == "queued",
+            and_(
+                ScoringJob.status == "running",
+                or_(ScoringJob.lease_until.is_(None), ScoringJob.lease_until < now)
+            )
+        )
+
+    def _lease_end(self):
+        return utcnow() + timedelta(seconds=self.lease_seconds)
+
+    async def _queue_claimable(self) -> int:
+        async with self.session_factory() as db:
+            pending = (await db.scalars(
+                select(ScoringJob.job_id)
+                .filter(self._claimable(utcnow()))
+                .order_by(ScoringJob.created_at)
+            )).all()
+        return sum(self._enqueue(job_id) for job_id in pending)
+
+    async def _claim(self, db: AsyncSession, job_id: uuid.UUID) -> bool:
+        """Take the job in one conditional UPDATE; False if it is not claimable."""
+        claimed = await db.scalar(
+            update(ScoringJob)
+            .where(ScoringJob.job_id == job_id, self._claimable(utcnow()))
+            .values(status="running", owner=self.owner, lease_until=self._lease_end())
+            .returning(ScoringJob.job_id)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return claimed is not None
+
+    async def _renew(self, db: AsyncSession, job: ScoringJob):
+        """
+        Extend this runner's lease inside the current transaction. The UPDATE
+        locks the job row until commit, so nobody can claim it in between.
+        """
+        held = await db.scalar(
+            update(ScoringJob)
+            .where(ScoringJob.job_id == job.job_id, ScoringJob.owner == self.owner)
+            .values(lease_until=self._lease_end())
+            .returning(ScoringJob.job_id)
+            .execution_options(synchronize_session=False)
+        )
+        if held is None:
+            raise LeaseLost(f"Scoring job {job.job_id} was claimed by another runner")
+
+    async def start(self):
+        if self.running:
+            return
+        os.makedirs(self.job_dir, exist_ok=True)
+        if self.process_workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        self._queue = asyncio.Queue()
+        self._queued.clear()
+
+        pending = await self._queue_claimable()
+        self.resumed += pending
+        if pending:
+            logger.info(f"Resuming {pending} scoring job(s)")
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._rescan_loop()))
+
+    async def stop(self):
+        """Stop workers; a chunk in flight is abandoned and redone after the next start."""
+        if not self.running:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        # Hand our running jobs back without waiting out the lease
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(ScoringJob)
+                    .where(ScoringJob.owner == self.owner, ScoringJob.status == "running")
+                    .values(lease_until=None)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Could not release scoring job leases: {e}")
+
+    async def _rescan_loop(self):
+        """Pick up jobs queued elsewhere or left behind by a crashed runner."""
+        while True:
+            await asyncio.sleep(self.lease_seconds)
+            try:
+                resumed = await self._queue_claimable()
+            except Exception as e:
+                logger.error(f"Scoring job rescan failed: {e}")
+                continue
+            if resumed:
+                logger.info(f"Queued {resumed} claimable scoring job(s)")
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self.run(job_id)
+            except Exception as e:
+                # run() already marks failing jobs; this is a failure to do so
+                # (e.g. database down). The job stays active and resumes on restart.
+                logger.error(f"Scoring job {job_id} could not be run or marked failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def run(self, job_id: uuid.UUID):
+        """Run (or resume) one job to completion, committing progress per chunk."""
+        if job_id in self._active:
+            return
+        self._active.add(job_id)
+        try:
+            async with self.session_factory() as db:
+                if not await self._claim(db, job_id):
+                    return
+                job = await db.get(ScoringJob, job_id)
+                try:
+                    await self._run(db, job)
+                except LeaseLost as e:
+                    await db.rollback()
+                    self.lost_leases += 1
+                    logger.warning(f"{e}; abandoning it")
+                except Exception as e:
+                    await db.rollback()
+                    await db.refresh(job)
+                    try:
+                        await self._renew(db, job)
+                    except LeaseLost:
+                        await db.rollback()
+                        self.lost_leases += 1
+                        logger.warning(f"Scoring job {job_id} failed after another runner took it over: {e}")
+                        return
+                    job.status = "failed"
+                    job.last_error = str(e)
+                    job.finished_at = utcnow()
+                    job.lease_until = None
+                    await db.commit()
+                    self.failed += 1
+                    logger.error(f"Scoring job {job_id} failed after {job.processed_rows} rows: {e}")
+        finally:
+            self._active.discard(job_id)
+
+    async def _run(self, db: AsyncSession, job: ScoringJob):
+        if job.total_rows is None:
+            job.total_rows = await asyncio.to_thread(count_rows, job.input_path, job.input_format)
+        job.started_at = job.started_at or utcnow()
+        await db.commit()
+
+        trace_id = f"job-{job.job_id}"
+        rows = iter_rows(job.input_path, job.input_format)
+        try:
+            # Skip rows covered by already-committed chunks
+            await asyncio.to_thread(lambda: next(islice(rows, job.processed_rows, job.processed_rows), None))
+            while True:
+                chunk = await asyncio.to_thread(lambda: list(islice(rows, job.chunk_size)))
+                if not chunk:
+                    break
+                batch, errors, output = await self._score(job, chunk, job.processed_rows + 1, trace_id)
+                # Hold the row from here to commit so the output file has one writer
+                await self._renew(db, job)
+                offset = await asyncio.to_thread(append_output, job.output_path, job.output_offset, output)
+
+                await bulk_insert_decisions(db, batch.decision_rows, batch.audit_rows)
+                job.processed_rows += len(chunk)
+                job.scored_rows += len(batch.decision_rows)
+                job.error_count += len(errors)
+                if errors and len(job.errors) < self.max_recorded_errors:
+                    job.errors = (job.errors + errors)[:self.max_recorded_errors]
+                job.output_offset = offset
+                job.updated_at = utcnow()
+                await db.commit()
+
+                self.rows_scored += len(batch.decision_rows)
+                await raw_claim_writer.enqueue_many(batch.raw_claims)
+        finally:
+            rows.close()
+
+        await self._renew(db, job)
+        job.status = "completed"
+        job.finished_at = utcnow()
+        job.lease_until = None
+        await db.commit()
+        self.completed += 1
+        logger.info(
+            f"Scoring job {job.job_id} completed: {job.scored_rows} scored, {job.error_count} invalid rows"
+        )
+
+    async def _score(
+        self,
+        job: ScoringJob,
+        chunk: list[dict],
+        first_row: int,
+        trace_id: str
+    ) -> tuple[BatchRows, list[dict], str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, score_rows, chunk, first_row, job.model_version, job.policy_version, trace_id
+        )
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "active_jobs": len(self._active),
+            "submitted": self.submitted,
+            "resumed": self.resumed,
+            "completed": self.completed,
+            "failed": self.failed,
+            "lost_leases": self.lost_leases,
+            "rows_scored": self.rows_scored
+        }
+
+
+job_runner = JobRunner(
+    job_dir=settings.JOB_DIR,
+    chunk_size=settings.JOB_CHUNK_SIZE,
+    workers=settings.JOB_WORKERS,
+    process_workers=settings.JOB_PROCESS_WORKERS,
+    lease_seconds=settings.JOB_LEASE_SECONDS
+)
@@ -0,0 +1,215 @@
+"""
+Data-driven scoring policies.
+
+Policies live as JSON files (one per POLICY_VERSION) and are compiled at load
+time into lookup structures: a bisect array for amount bands, an ordered
+tuple/dict for incident classes and NumPy arrays for the batch path. Files are
+re-read when their mtime changes, so a policy edit takes effect without
+restarting the worker.
+"""
+import json
+import sys
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.scoring.classifier import IncidentClassifier
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_POLICY_DIR = Path(__file__).resolve().parent / "policies"
+DECISIONS = ("APPROVE", "REVIEW", "REJECT")
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH")
+
+
+class PolicyError(ValueError):
+    """Raised when a policy definition is invalid."""
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    version: str
+    amount_edges: tuple[float, ...]
+    amount_points: tuple[float, ...]
+    # Incident classes in match-precedence order; index 0 is the catch-all
+    incident_classes: tuple[str, ...]
+    incident_points: tuple[float, ...]
+    history_weight: float
+    score_cap: float
+    sigmoid_midpoint: float
+    sigmoid_scale: float
+    thresholds: tuple[float, float]
+    # NumPy views of the tables above for ScoringEngine.score_batch
+    amount_edges_array: np.ndarray
+    amount_points_array: np.ndarray
+    incident_points_array: np.ndarray
+    thresholds_array: np.ndarray
+    classifier: IncidentClassifier
+
+    def amount_band_points(self, amount: float) -> float:
+        return self.amount_points[bisect_right(self.amount_edges, amount)]
+
+    def incident_code(self, incident_type: str) -> int:
+        """Index into incident_classes of the first class found in the text (0 if none)."""
+        return self.classifier.classify(incident_type)
+
+    def incident_label(self, code: int) -> str:
+        return self.incident_classes[code]
+
+    def fraud_probability(self, risk_score):
+        """Sigmoid over the risk score; accepts floats or arrays so both scoring paths round identically."""
+        return 1 / (1 + np.exp(-(risk_score - self.sigmoid_midpoint) / self.sigmoid_scale))
+
+    def decide(self, fraud_probability: float) -> str:
+        return DECISIONS[bisect_right(self.thresholds, fraud_probability)]
+
+    def risk_level(self, fraud_probability: float) -> str:
+        return RISK_LEVELS[bisect_right(self.thresholds, fraud_probability)]
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "amount_bands": [
+                {"below": edge, "points": points}
+                for edge, points in zip(self.amount_edges + (None,), self.amount_points)
+            ],
+            "incident_weights": dict(zip(self.incident_classes[1:], self.incident_points[1:])),
+            "default_incident_weight": self.incident_points[0],
+            "history_weight": self.history_weight,
+            "score_cap": self.score_cap,
+            "thresholds": {"approve_below": self.thresholds[0], "review_below": self.thresholds[1]}
+        }
+
+
+def compile_policy(spec: dict) -> CompiledPolicy:
+    """Validate a policy definition and compile it into lookup tables."""
+    try:
+        version = str(spec["version"])
+        bands = spec["amount_bands"]
+        incident_weights = spec["incident_weights"]
+        thresholds = spec["thresholds"]
+        sigmoid = spec.get("sigmoid", {})
+
+        if not bands or bands[-1]["below"] is not None:
+            raise PolicyError("last amount band must be open-ended (below: null)")
+        amount_edges = tuple(float(band["below"]) for band in bands[:-1])
+        if list(amount_edges) != sorted(set(amount_edges)):
+            raise PolicyError("amount band edges must be strictly increasing")
+        amount_points = tuple(float(band["points"]) for band in bands)
+
+        incident_classes = ("other",) + tuple(sys.intern(name.lower()) for name in incident_weights)
+        incident_points = (float(spec["default_incident_weight"]),) + tuple(
+            float(points) for points in incident_weights.values()
+        )
+
+        cutoffs = (float(thresholds["approve_below"]), float(thresholds["review_below"]))
+        if not 0.0 <= cutoffs[0] <= cutoffs[1] <= 1.0:
+            raise PolicyError("thresholds must satisfy 0 <= approve_below <= review_below <= 1")
+
+        history_weight = float(spec["history_weight"])
+        score_cap = float(spec.get("score_cap", 100.0))
+        sigmoid_midpoint = float(sigmoid.get("midpoint", 50.0))
+        sigmoid_scale = float(sigmoid.get("scale", 10.0))
+        if sigmoid_scale <= 0:
+            raise PolicyError("sigmoid scale must be positive")
+    except (KeyError, TypeError, ValueError) as e:
+        if isinstance(e, PolicyError):
+            raise
+        raise PolicyError(f"Invalid policy definition: {e!r}") from e
+
+    return CompiledPolicy(
+        version=version,
+        amount_edges=amount_edges,
+        amount_points=amount_points,
+        incident_classes=incident_classes,
+        incident_points=incident_points,
+        history_weight=history_weight,
+        score_cap=score_cap,
+        sigmoid_midpoint=sigmoid_midpoint,
+        sigmoid_scale=sigmoid_scale,
+        thresholds=cutoffs,
+        amount_edges_array=np.array(amount_edges, dtype=np.float64),
+        amount_points_array=np.array(amount_points, dtype=np.float64),
+        incident_points_array=np.array(incident_points, dtype=np.float64),
+        thresholds_array=np.array(cutoffs, dtype=np.float64),
+        classifier=IncidentClassifier(incident_classes, settings.INCIDENT_CACHE_SIZE)
+    )
+
+
+class PolicyStore:
+    """Loads every *.json policy in a directory and hot-reloads changed files."""
+
+    def __init__(self, policy_dir: Path, reload_interval: float = 5.0):
+        self.policy_dir = Path(policy_dir)
+        self.reload_interval = reload_interval
+        # Bumped whenever any policy is (re)compiled, so dependants can invalidate
+        self.generation = 0
+        self._policies: dict[str, CompiledPolicy] = {}
+        self._files: dict[Path, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.reload()
+
+    def reload(self) -> list[str]:
+        """Recompile policies whose files changed; returns the versions (re)loaded."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            loaded = []
+            seen = set()
+            for path in sorted(self.policy_dir.glob("*.json")):
+                seen.add(path)
+                mtime = path.stat().st_mtime
+                known = self._files.get(path)
+                if known and known[0] == mtime:
+                    continue
+                try:
+                    policy = compile_policy(json.loads(path.read_text()))
+                except (OSError, json.JSONDecodeError, PolicyError) as e:
+                    # Keep serving the previous compiled version
+                    logger.error(f"Failed to load policy {path.name}: {e}")
+                    continue
+                if known and known[1] != policy.version:
+                    self._policies.pop(known[1], None)
+                self._policies[policy.version] = policy
+                self._files[path] = (mtime, policy.version)
+                loaded.append(policy.version)
+
+            for path in set(self._files) - seen:
+                _, version = self._files.pop(path)
+                self._policies.pop(version, None)
+                loaded.append(version)
+
+            if loaded:
+                self.generation += 1
+                logger.info(f"Loaded policies: {', '.join(loaded)}")
+            return loaded
+
+    def get(self, version: Optional[str] = None) -> CompiledPolicy:
+        """Return the compiled policy for a version (default: settings.POLICY_VERSION)."""
+        if self.reload_interval > 0 and time.monotonic() - self._last_check >= self.reload_interval:
+            self.reload()
+        version = version or settings.POLICY_VERSION
+        try:
+            return self._policies[version]
+        except KeyError:
+            raise KeyError(f"Unknown policy version: {version}") from None
+
+    def versions(self) -> list[str]:
+        return sorted(self._policies)
+
+
+policy_store = PolicyStore(
+    Path(settings.POLICY_DIR) if settings.POLICY_DIR else DEFAULT_POLICY_DIR,
+    reload_interval=settings.POLICY_RELOAD_INTERVAL
+)
+
+
+def get_policy(version: Optional[str] = None) -> CompiledPolicy:
+    return policy_store.get(version)
@@ -0,0 +1,233 @@
+"""
+Pluggable scorer registry.
+
+Scorers are configured in settings.MODEL_REGISTRY as comma-separated
+"version=module:Class" entries and are instantiated and warmed up once at
+startup. Requests pick a scorer by X-Model-Version header, falling back to
+settings.MODEL_VERSION. Entries suffixed with "@process" (or classes with
+cpu_bound = True) are served from a process pool so heavy models never block
+the event loop.
+"""
+import asyncio
+import importlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.schemas import ClaimScoreRequest
+from app.scoring.cache import ScoredClaim, scoring_cache
+from app.scoring.engine import ScoringEngine
+from app.scoring.policy import CompiledPolicy, get_policy
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class Scorer:
+    """Base class for scorer implementations."""
+
+    name = "scorer"
+    type = "custom"
+    cpu_bound = False
+
+    def __init__(self, version: str):
+        self.version = version
+
+    def load(self) -> None:
+        """Load weights/artifacts; called once before the scorer serves traffic."""
+
+    def predict(
+        self,
+        claim: ClaimScoreRequest,
+        policy: CompiledPolicy,
+        incident_code: int
+    ) -> tuple[float, float, str]:
+        """Return (risk_score, fraud_probability, decision)."""
+        raise NotImplementedError
+
+    def score(
+        self,
+        claim: ClaimScoreRequest,
+        policy: CompiledPolicy,
+        incident_code: int
+    ) -> ScoredClaim:
+        risk_score, fraud_probability, decision = self.predict(claim, policy, incident_code)
+        head, tail = ScoringEngine.template_explanation_parts(
+            claim.history_score, risk_score, fraud_probability, decision, policy, incident_code
+        )
+        return ScoredClaim(risk_score, fraud_probability, decision, head, tail)
+
+    def score_batch(
+        self,
+        claims: list[ClaimScoreRequest],
+        incident_codes: np.ndarray,
+        policy: CompiledPolicy
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Score many claims; override with a vectorized implementation where possible."""
+        results = [self.predict(c, policy, int(code)) for c, code in zip(claims, incident_codes)]
+        risk_scores, fraud_probabilities, decisions = zip(*results)
+        return (
+            np.array(risk_scores, dtype=np.float64),
+            np.array(fraud_probabilities, dtype=np.float64),
+            np.array(decisions, dtype=object)
+        )
+
+    def describe(self) -> dict:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "type": self.type,
+            "execution": "process" if self.cpu_bound else "inline",
+            "status": "active"
+        }
+
+
+class RuleBasedScorer(Scorer):
+    """The deterministic policy-table engine, served through the scoring cache."""
+
+    name = "rule-based-v1"
+    type = "deterministic"
+
+    def predict(self, claim, policy, incident_code):
+        return ScoringEngine.calculate_risk_score(claim, policy, incident_code)
+
+    def score(self, claim, policy, incident_code):
+        return scoring_cache.score(claim, policy, incident_code)
+
+    def score_batch(self, claims, incident_codes, policy):
+        return ScoringEngine.score_batch(
+            np.fromiter((c.amount for c in claims), dtype=np.float64, count=len(claims)),
+            incident_codes,
+            np.fromiter((c.history_score for c in claims), dtype=np.float64, count=len(claims)),
+            policy
+        )
+
+
+def parse_registry_spec(spec: str) -> list[tuple[str, str, bool]]:
+    """Parse "version=module:Class[@process],..." into (version, path, in_process_pool)."""
+    entries = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        version, _, path = item.partition("=")
+        if not path or ":" not in path:
+            raise ValueError(f"Invalid MODEL_REGISTRY entry: {item!r}")
+        path, _, mode = path.partition("@")
+        entries.append((version.strip(), path.strip(), mode.strip() == "process"))
+    return entries
+
+
+def _load_scorer(version: str, path: str, cpu_bound: bool) -> Scorer:
+    module_name, _, class_name = path.partition(":")
+    scorer = getattr(importlib.import_module(module_name), class_name)(version)
+    scorer.cpu_bound = cpu_bound or scorer.cpu_bound
+    scorer.load()
+    return scorer
+
+
+# Per-process scorers for the pool workers, loaded once by the initializer
+_worker_scorers: dict[str, Scorer] = {}
+
+
+def _init_worker(entries: list[tuple[str, str, bool]]):
+    for version, path, cpu_bound in entries:
+        _worker_scorers[version] = _load_scorer(version, path, cpu_bound)
+
+
+def _score_in_worker(version: str, claim: dict, policy_version: str, incident_code: int) -> ScoredClaim:
+    return _worker_scorers[version].score(
+        ClaimScoreRequest(**claim), get_policy(policy_version), incident_code
+    )
+
+
+def _score_batch_in_worker(version: str, claims: list[dict], incident_codes: np.ndarray, policy_version: str):
+    return _worker_scorers[version].score_batch(
+        [ClaimScoreRequest(**c) for c in claims], incident_codes, get_policy(policy_version)
+    )
+
+
+class ModelRegistry:
+    def __init__(self, spec: str, process_workers: int = 2):
+        self.spec = spec
+        self.process_workers = process_workers
+        self._scorers: dict[str, Scorer] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._scorers)
+
+    def load(self):
+        """Instantiate and warm every configured scorer (idempotent)."""
+        with self._lock:
+            if self._scorers:
+                return
+            entries = parse_registry_spec(self.spec)
+            scorers = {version: _load_scorer(version, path, cpu) for version, path, cpu in entries}
+            pooled = [(v, p, True) for v, p, _ in entries if scorers[v].cpu_bound]
+            if pooled:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    initializer=_init_worker,
+                    initargs=(pooled,)
+                )
+            self._scorers = scorers
+            logger.info(f"Loaded scorers: {', '.join(scorers)}")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def get(self, version: Optional[str] = None) -> Scorer:
+        if not self._scorers:
+            self.load()
+        version = version or settings.MODEL_VERSION
+        try:
+            return self._scorers[version]
+        except KeyError:
+            raise KeyError(f"Unknown model version: {version}") from None
+
+    async def score(
+        self,
+        scorer: Scorer,
+        claim: ClaimScoreRequest,
+        policy: CompiledPolicy,
+        incident_code: int
+    ) -> ScoredClaim:
+        """Score inline, or in the process pool for CPU-bound scorers."""
+        if scorer.cpu_bound and self._pool is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._pool, _score_in_worker,
+                scorer.version, claim.model_dump(), policy.version, incident_code
+            )
+        return scorer.score(claim, policy, incident_code)
+
+    async def score_batch(
+        self,
+        scorer: Scorer,
+        claims: list[ClaimScoreRequest],
+        incident_codes: np.ndarray,
+        policy: CompiledPolicy
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if scorer.cpu_bound and self._pool is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._pool, _score_batch_in_worker,
+                scorer.version, [c.model_dump() for c in claims], incident_codes, policy.version
+            )
+        return scorer.score_batch(claims, incident_codes, policy)
+
+    def describe(self) -> list[dict]:
+        if not self._scorers:
+            self.load()
+        return [
+            {**scorer.describe(), "default": version == settings.MODEL_VERSION}
+            for version, scorer in self._scorers.items()
+        ]
+
+
+model_registry = ModelRegistry(settings.MODEL_REGISTRY, settings.MODEL_PROCESS_WORKERS)
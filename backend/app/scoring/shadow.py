@@ -0,0 +1,208 @@
+"""
+Shadow (champion/challenger) scoring.
+
+After the champion decision is committed, score_claim hands the claim to the
+ShadowEvaluator, which re-scores it with each configured challenger on a small
+pool of background workers and writes the outcomes as "shadow_decision"
+AuditLog events in batches. The queue is bounded: when it is full, shadow work
+is dropped (and counted) rather than delaying the live path.
+"""
+import asyncio
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.persistence import append_audit_events
+from app.schemas import ClaimScoreRequest
+from app.scoring.policy import get_policy
+from app.scoring.registry import model_registry
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ShadowJob:
+    decision_id: uuid.UUID
+    claim: ClaimScoreRequest
+    champion: dict
+    trace_id: str
+
+
+def parse_challengers(spec: str) -> list[tuple[str, Optional[str]]]:
+    """Parse "model_version[:policy_version],..." into (model, policy) pairs."""
+    challengers = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        model_version, _, policy_version = item.partition(":")
+        challengers.append((model_version.strip(), policy_version.strip() or None))
+    return challengers
+
+
+class ShadowEvaluator:
+    def __init__(
+        self,
+        challengers: list[tuple[str, Optional[str]]],
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        queue_size: int = 1000,
+        workers: int = 2,
+        flush_size: int = 100,
+        flush_interval: float = 1.0
+    ):
+        self.challengers = challengers
+        self.session_factory = session_factory
+        self.queue_size = queue_size
+        self.workers = workers
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.submitted = 0
+        self.dropped = 0
+        self.evaluated = 0
+        self.written = 0
+        self.failed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._buffer: list[dict] = []
+        self._flush_now: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.challengers)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def submit(self, job: ShadowJob) -> bool:
+        """Enqueue without waiting; returns False if the job was dropped."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    async def start(self):
+        if not self.enabled or self.running:
+            return
+        for model_version, policy_version in self.challengers:
+            model_registry.get(model_version)
+            get_policy(policy_version)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._flush_now = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._flush_loop()))
+        logger.info(f"Shadow scoring enabled for {len(self.challengers)} challenger(s)")
+
+    async def stop(self, timeout: float = 5.0):
+        """Drain queued jobs (up to timeout), then flush outstanding rows."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Shadow queue not drained; abandoning {self._queue.qsize()} job(s)")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._flush()
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._evaluate(job)
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Shadow scoring failed for decision {job.decision_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _evaluate(self, job: ShadowJob):
+        for model_version, policy_version in self.challengers:
+            scorer = model_registry.get(model_version)
+            policy = get_policy(policy_version)
+            incident_code = policy.incident_code(job.claim.incident_type)
+            scored = await model_registry.score(scorer, job.claim, policy, incident_code)
+            self._buffer.append({
+                "id": uuid.uuid4(),
+                "decision_id": job.decision_id,
+                "event_type": "shadow_decision",
+                "event_payload": {
+                    "trace_id": job.trace_id,
+                    "champion": job.champion,
+                    "challenger": {
+                        "model_version": scorer.version,
+                        "policy_version": policy.version,
+                        "incident_class": policy.incident_label(incident_code),
+                        "risk_score": scored.risk_score,
+                        "fraud_probability": scored.fraud_probability,
+                        "decision": scored.decision
+                    },
+                    "agrees": scored.decision == job.champion["decision"]
+                },
+                "created_at": datetime.now(timezone.utc)
+            })
+        self.evaluated += 1
+        if len(self._buffer) >= self.flush_size:
+            self._flush_now.set()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self._flush()
+
+    async def _flush(self):
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        try:
+            await self._write(rows)
+            self.written += len(rows)
+        except Exception as e:
+            self.failed += len(rows)
+            logger.error(f"Failed to write {len(rows)} shadow audit events: {e}")
+
+    async def _write(self, rows: list[dict]):
+        async with self.session_factory() as db:
+            await append_audit_events(db, rows)
+            await db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "challengers": [
+                {"model_version": m, "policy_version": p or settings.POLICY_VERSION}
+                for m, p in self.challengers
+            ],
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "evaluated": self.evaluated,
+            "written": self.written,
+            "failed": self.failed,
+            "pending_rows": len(self._buffer)
+        }
+
+
+shadow_evaluator = ShadowEvaluator(
+    parse_challengers(settings.SHADOW_CHALLENGERS),
+    queue_size=settings.SHADOW_QUEUE_SIZE,
+    workers=settings.SHADOW_WORKERS,
+    flush_size=settings.SHADOW_FLUSH_SIZE,
+    flush_interval=settings.SHADOW_FLUSH_INTERVAL
+)
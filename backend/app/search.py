@@ -0,0 +1,76 @@
+"""
+Filters for decision listings.
+
+Each filter is matched by an index (see Decision.__table_args__):
+
+    customer_id                ix_decisions_customer_id_created_at
+    decision                   ix_decisions_decision_created_at
+    min/max_risk_score         ix_decisions_risk_score
+    since/until                ix_decisions_created_at_decision_id
+    q (explanation full text)  ix_decisions_explanation_fts (GIN) on PostgreSQL,
+                               the decisions_fts FTS5 table on SQLite
+
+On PostgreSQL q is parsed with websearch_to_tsquery ("quoted phrases", or,
+-negation); the SQLite fallback ANDs the words of q.
+"""
+import re
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, literal_column, text
+
+from app.models import FTS_CONFIG, Decision, explanation_tsvector
+
+
+class SearchError(ValueError):
+    """A search term that cannot be turned into a query."""
+
+
+def fts5_query(q: str) -> str:
+    """AND of the words in q, each quoted so FTS5 operators in user input are literal."""
+    words = re.findall(r"\w+", q)
+    if not words:
+        raise SearchError("q has no searchable words")
+    return " ".join(f'"{word}"' for word in words)
+
+
+def explanation_matches(dialect: str, q: str):
+    if dialect == "postgresql":
+        if not q.strip():
+            raise SearchError("q has no searchable words")
+        query = func.websearch_to_tsquery(literal_column(f"'{FTS_CONFIG}'"), q)
+        return explanation_tsvector(Decision.explanation).op("@@")(query)
+    return text(
+        "decisions.rowid IN (SELECT rowid FROM decisions_fts WHERE decisions_fts MATCH :fts_query)"
+    ).bindparams(fts_query=fts5_query(q))
+
+
+def decision_filters(
+    dialect: str,
+    customer_id: Optional[str] = None,
+    decisions: Optional[list[str]] = None,
+    min_risk_score: Optional[float] = None,
+    max_risk_score: Optional[float] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    q: Optional[str] = None
+) -> list:
+    """WHERE conditions for the given filters (None = not filtered)."""
+    conditions = []
+    if customer_id is not None:
+        conditions.append(Decision.customer_id == customer_id)
+    if decisions:
+        conditions.append(
+            Decision.decision == decisions[0] if len(decisions) == 1 else Decision.decision.in_(decisions)
+        )
+    if min_risk_score is not None:
+        conditions.append(Decision.risk_score >= min_risk_score)
+    if max_risk_score is not None:
+        conditions.append(Decision.risk_score <= max_risk_score)
+    if since is not None:
+        conditions.append(Decision.created_at >= since)
+    if until is not None:
+        conditions.append(Decision.created_at < until)
+    if q is not None:
+        conditions.append(explanation_matches(dialect, q))
+    return conditions
@@ -0,0 +1,165 @@
+"""
+Synthetic load-data generator.
+
+Generates claims from a SeedProfile, scores them with the vectorized scoring
+path and loads decisions, decision_created audit rows and raw Mongo claims in
+blocks (COPY on PostgreSQL, insert_many on MongoDB). Claims are generated in
+fixed-size blocks, each drawn from its own seeded generator, so the same
+profile yields the same claims regardless of how many rows are written per
+transaction. Decision ids are random, so a dataset can be loaded twice.
+
+    python -m app.seeding --count 1000000 --seed 42 [--profile profile.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from datetime import timedelta, timezone
+from typing import Callable, Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.clients.mongo import mongo_client
+from app.config import settings
+from app.database import AsyncSessionLocal, async_engine
+from app.persistence import copy_decisions
+from app.schemas import ClaimScoreRequest, SeedProfile
+from app.scoring.batch import BatchRows, build_batch_rows, incident_codes_for
+from app.scoring.policy import CompiledPolicy, get_policy
+from app.scoring.registry import Scorer, model_registry
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Rows drawn per generator; fixed so output does not depend on write batch size
+BLOCK_SIZE = 10000
+
+
+def generate_block(profile: SeedProfile, block: int, count: int = BLOCK_SIZE) -> tuple[list[ClaimScoreRequest], list]:
+    """Claims and created_at timestamps for rows [block * BLOCK_SIZE, + count)."""
+    rng = np.random.default_rng([profile.seed, block])
+    start = block * BLOCK_SIZE
+    # Always draw a full block so a short final block is a prefix of the full one
+    rows = slice(0, count)
+
+    amounts = np.clip(
+        rng.lognormal(math.log(profile.amount_median), profile.amount_sigma, BLOCK_SIZE)[rows],
+        profile.amount_min, profile.amount_max
+    ).round(2)
+    incident_types = list(profile.incident_weights)
+    weights = np.array([profile.incident_weights[t] for t in incident_types], dtype=np.float64)
+    incidents = rng.choice(len(incident_types), size=BLOCK_SIZE, p=weights / weights.sum())[rows]
+    history_scores = (rng.beta(profile.history_alpha, profile.history_beta, BLOCK_SIZE)[rows] * 100).round(1)
+    customers = rng.integers(1, profile.customers + 1, BLOCK_SIZE)[rows]
+    ages = rng.uniform(0, profile.days * 86400, BLOCK_SIZE)[rows]
+
+    end = profile.end if profile.end.tzinfo else profile.end.replace(tzinfo=timezone.utc)
+    claims = [
+        # Generated values are in range by construction; skip validation
+        ClaimScoreRequest.model_construct(
+            claim_id=f"{profile.claim_prefix}-{profile.seed}-{start + i:09d}",
+            customer_id=f"CUST-{customer:07d}",
+            amount=amount,
+            incident_type=incident_types[incident],
+            history_score=history_score
+        )
+        for i, (amount, incident, history_score, customer) in enumerate(zip(
+            amounts.tolist(), incidents.tolist(), history_scores.tolist(), customers.tolist()
+        ))
+    ]
+    created_at = [end - timedelta(seconds=age) for age in ages.tolist()]
+    return claims, created_at
+
+
+def build_block_rows(
+    profile: SeedProfile,
+    block: int,
+    count: int,
+    scorer: Scorer,
+    policy: CompiledPolicy
+) -> BatchRows:
+    """Generate and score one block into insert-ready rows stamped with their synthetic created_at."""
+    claims, created_at = generate_block(profile, block, count)
+    incident_codes = incident_codes_for(claims, policy)
+    risk_scores, fraud_probabilities, decisions = scorer.score_batch(claims, incident_codes, policy)
+    rows = build_batch_rows(
+        claims, incident_codes, risk_scores, fraud_probabilities, decisions,
+        scorer.version, policy, f"seed-{profile.seed}"
+    )
+    for decision_row, audit_row, timestamp in zip(rows.decision_rows, rows.audit_rows, created_at):
+        decision_row["created_at"] = audit_row["created_at"] = timestamp
+    return rows
+
+
+async def seed_decisions(
+    count: int,
+    profile: Optional[SeedProfile] = None,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    store_raw_claims: bool = True,
+    model_version: Optional[str] = None
+) -> dict:
+    """Generate, score and load `count` claims; one transaction per block."""
+    profile = profile or SeedProfile()
+    scorer = model_registry.get(model_version)
+    policy = get_policy()
+    started = time.perf_counter()
+    written = 0
+
+    for block in range(math.ceil(count / BLOCK_SIZE)):
+        rows = await asyncio.to_thread(
+            build_block_rows, profile, block, min(BLOCK_SIZE, count - written), scorer, policy
+        )
+        async with session_factory() as db:
+            await copy_decisions(db, rows.decision_rows, rows.audit_rows)
+            await db.commit()
+        if store_raw_claims:
+            await asyncio.to_thread(mongo_client.store_claims, rows.raw_claims)
+
+        written += len(rows.decision_rows)
+        logger.info(f"Seeded {written}/{count} decisions")
+
+    elapsed = time.perf_counter() - started
+    return {
+        "seeded": written,
+        "seed": profile.seed,
+        "model_version": scorer.version,
+        "policy_version": policy.version,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(written / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate synthetic scored claims for load testing.")
+    parser.add_argument("--count", type=int, required=True, help="Number of decisions to create")
+    parser.add_argument("--seed", type=int, help="Random seed (overrides the profile)")
+    parser.add_argument("--profile", help="JSON file with SeedProfile fields")
+    parser.add_argument("--model-version", default=settings.MODEL_VERSION)
+    parser.add_argument("--no-mongo", action="store_true", help="Skip raw claim documents")
+    args = parser.parse_args(argv)
+
+    fields = {}
+    if args.profile:
+        with open(args.profile) as f:
+            fields = json.load(f)
+    if args.seed is not None:
+        fields["seed"] = args.seed
+
+    async def run() -> dict:
+        try:
+            return await seed_decisions(
+                args.count,
+                SeedProfile(**fields),
+                store_raw_claims=not args.no_mongo,
+                model_version=args.model_version
+            )
+        finally:
+            await async_engine.dispose()
+
+    print(json.dumps(asyncio.run(run())))
+
+
+if __name__ == "__main__":
+    main()
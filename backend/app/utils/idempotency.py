@@ -0,0 +1,59 @@
+"""Idempotency keys and in-flight request coalescing for scoring."""
+import asyncio
+import hashlib
+import json
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def payload_hash(payload: dict) -> str:
+    """SHA-256 of the canonical JSON payload, stored next to the idempotency key."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def derive_idempotency_key(claim_id: str, payload: dict, model_version: str, policy_version: str) -> str:
+    """Key for requests without an Idempotency-Key header: claim_id plus a hash of payload and versions."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(f"{model_version}\x1f{policy_version}\x1f{canonical}".encode()).hexdigest()
+    return f"{claim_id}:{digest}"
+
+
+class InFlightRequests:
+    """
+    Coalesce concurrent work for the same key within this process: the first
+    caller runs it, later callers await the same result (or exception).
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._pending: dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, work: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Returns (result, coalesced) where coalesced is True for followers."""
+        future = self._pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark exceptions retrieved even when nobody else was waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._pending[key] = future
+        try:
+            result = await work()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._pending.pop(key, None)
+
+    def in_flight(self) -> int:
+        return len(self._pending)
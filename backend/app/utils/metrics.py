@@ -0,0 +1,30 @@
+"""Minimal in-process metrics."""
+from bisect import bisect_left
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus-style `le` bounds)."""
+
+    def __init__(self, bounds: list[float]):
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        buckets = {}
+        running = 0
+        for bound, count in zip(self.bounds + [float("inf")], self.counts):
+            running += count
+            buckets["+Inf" if bound == float("inf") else f"{bound:g}"] = running
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "buckets": buckets
+        }
@@ -0,0 +1,202 @@
+"""
+Decision-detail latency as audit_log grows.
+
+Grows audit_log in steps with filler decisions and events, and after each
+step times fetch_decision_detail (the query behind GET /api/decisions/{id})
+for a fixed set of probe decisions. With ix_audit_log_decision_id_created_at
+the per-lookup cost is an index range scan, so p50/p95 should stay flat from
+thousands to tens of millions of rows; --without-index drops the index first
+to show the sequential-scan baseline.
+
+Run against a scratch database (filler rows are deleted afterwards unless
+--keep is given):
+
+    cd backend
+    DATABASE_URL=postgresql://... python -m benchmarks.detail_latency --steps 1e6,1e7,3e7
+
+On PostgreSQL filler rows are generated server-side with generate_series; on
+other databases they are inserted from Python, which is only practical for
+small steps.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, insert, select, text
+
+from app.database import AsyncSessionLocal, async_engine
+from app.models import AuditLog, Decision, utcnow
+from app.persistence import new_decision_rows, bulk_insert_decisions
+from app.routers.decisions import fetch_decision_detail
+
+FILLER_PREFIX = "BENCH-FILLER-"
+PROBE_PREFIX = "BENCH-PROBE-"
+INDEX_NAME = "ix_audit_log_decision_id_created_at"
+
+PG_FILL = text("""
+    WITH filler AS (
+        INSERT INTO decisions (
+            decision_id, claim_id, customer_id, model_version, policy_version,
+            risk_score, fraud_probability, decision, explanation, created_at
+        )
+        SELECT gen_random_uuid(), :prefix || g, 'CUST-BENCH', 'rb-v1', 'policy-v1',
+               0, 0, 'APPROVE', '', now() - g * interval '1 second'
+        FROM generate_series(1, :decisions) AS g
+        RETURNING decision_id, created_at
+    )
+    INSERT INTO audit_log (id, decision_id, event_type, event_payload, created_at)
+    SELECT gen_random_uuid(), filler.decision_id, 'benchmark_filler', '{}'::jsonb,
+           filler.created_at + e * interval '1 millisecond'
+    FROM filler CROSS JOIN generate_series(1, :events) AS e
+""")
+
+
+async def insert_probes(count: int, events: int) -> list[uuid.UUID]:
+    decision_ids = []
+    async with AsyncSessionLocal() as db:
+        for i in range(count):
+            decision_row, audit_row = new_decision_rows(
+                {
+                    "claim_id": f"{PROBE_PREFIX}{i}",
+                    "customer_id": "CUST-BENCH",
+                    "model_version": "rb-v1",
+                    "policy_version": "policy-v1",
+                    "risk_score": 0.0,
+                    "fraud_probability": 0.0,
+                    "decision": "APPROVE",
+                    "explanation": ""
+                },
+                {"trace_id": "benchmark"}
+            )
+            extra = [
+                {**audit_row, "id": uuid.uuid4(), "event_type": "benchmark_probe", "created_at": utcnow()}
+                for _ in range(events - 1)
+            ]
+            await bulk_insert_decisions(db, [decision_row], [audit_row, *extra])
+            decision_ids.append(decision_row["decision_id"])
+        await db.commit()
+    return decision_ids
+
+
+async def grow_audit_log(rows: int, events_per_decision: int):
+    decisions = max(1, rows // events_per_decision)
+    async with AsyncSessionLocal() as db:
+        if db.bind.dialect.name == "postgresql":
+            await db.execute(PG_FILL, {
+                "prefix": f"{FILLER_PREFIX}{uuid.uuid4().hex[:8]}-",
+                "decisions": decisions,
+                "events": events_per_decision
+            })
+            await db.commit()
+            await db.execute(text("ANALYZE audit_log"))
+            await db.commit()
+            return
+        for start in range(0, decisions, 5000):
+            decision_rows, audit_rows = [], []
+            for _ in range(min(5000, decisions - start)):
+                decision_row, audit_row = new_decision_rows(
+                    {
+                        "claim_id": f"{FILLER_PREFIX}{uuid.uuid4().hex}",
+                        "customer_id": "CUST-BENCH",
+                        "risk_score": 0.0,
+                        "fraud_probability": 0.0,
+                        "decision": "APPROVE",
+                        "explanation": ""
+                    },
+                    {}
+                )
+                decision_rows.append(decision_row)
+                audit_rows.extend(
+                    {**audit_row, "id": uuid.uuid4(), "event_type": "benchmark_filler"}
+                    for _ in range(events_per_decision)
+                )
+            await db.execute(insert(Decision), decision_rows)
+            await db.execute(insert(AuditLog), audit_rows)
+        await db.commit()
+
+
+async def time_lookups(probe_ids: list[uuid.UUID], lookups: int) -> list[float]:
+    timings = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(lookups):
+            decision_id = random.choice(probe_ids)
+            started = time.perf_counter()
+            decision = await fetch_decision_detail(db, decision_id)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert decision is not None and decision.audit_events
+            db.expunge_all()
+    return timings
+
+
+async def explain(decision_id: uuid.UUID) -> str:
+    async with AsyncSessionLocal() as db:
+        if db.bind.dialect.name != "postgresql":
+            return ""
+        plan = await db.execute(text(
+            f"EXPLAIN SELECT * FROM audit_log WHERE decision_id = '{decision_id}' ORDER BY created_at"
+        ))
+        return "\n".join(plan.scalars().all())
+
+
+async def audit_log_rows() -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(text("SELECT count(*) FROM audit_log"))
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        for prefix in (FILLER_PREFIX, PROBE_PREFIX):
+            ids = select(Decision.decision_id).filter(Decision.claim_id.like(f"{prefix}%"))
+            await db.execute(delete(AuditLog).filter(AuditLog.decision_id.in_(ids)))
+            await db.execute(delete(Decision).filter(Decision.claim_id.like(f"{prefix}%")))
+        await db.commit()
+
+
+async def run(args):
+    steps = [int(float(step)) for step in args.steps.split(",")]
+    if args.without_index:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text(f"DROP INDEX IF EXISTS {INDEX_NAME}"))
+            await db.commit()
+
+    probe_ids = await insert_probes(args.probes, args.events)
+    print(f"{'audit_log rows':>16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    try:
+        for step in steps:
+            current = await audit_log_rows()
+            if step > current:
+                await grow_audit_log(step - current, args.events)
+            timings = await time_lookups(probe_ids, args.lookups)
+            quantiles = statistics.quantiles(timings, n=100)
+            print(f"{await audit_log_rows():>16,} {quantiles[49]:>8.2f} {quantiles[94]:>8.2f} {quantiles[98]:>8.2f}")
+        plan = await explain(probe_ids[0])
+        if plan:
+            print(f"\nAudit lookup plan:\n{plan}")
+    finally:
+        if not args.keep:
+            await cleanup()
+        if args.without_index:
+            async with AsyncSessionLocal() as db:
+                await db.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON audit_log (decision_id, created_at)"
+                ))
+                await db.commit()
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--steps", default="1e4,1e5,1e6", help="Comma-separated audit_log sizes to measure at")
+    parser.add_argument("--events", type=int, default=4, help="Audit events per filler/probe decision")
+    parser.add_argument("--probes", type=int, default=100, help="Decisions looked up at each step")
+    parser.add_argument("--lookups", type=int, default=500, help="Timed lookups per step")
+    parser.add_argument("--without-index", action="store_true", help=f"Drop {INDEX_NAME} for the run (baseline)")
+    parser.add_argument("--keep", action="store_true", help="Keep filler rows afterwards")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
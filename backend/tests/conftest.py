@@ -1,11 +1,19 @@
+import os
+
+# Keep the explanation cache in memory whatever .env says, so tests write nothing to the tree
+os.environ["EXPLANATION_CACHE_PATH"] = ""
+
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from app.database import Base, get_db, get_session_factory
 from app.dependencies import verify_api_key
 from app.main import app
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 
 @pytest.fixture
@@ -22,21 +30,27 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def async_session_factory(db_session):
+    # NullPool: TestClient runs each request on its own event loop
+    engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
 async def mock_verify_api_key():
     """Mock API key verification for tests."""
     return "test-api-key"
 
 
 @pytest.fixture
-def override_get_db(db_session):
-    def _override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+def override_get_db(async_session_factory):
+    async def _override_get_db():
+        async with async_session_factory() as db:
+            yield db
     
     # Override both database and API key verification
     app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: async_session_factory
     app.dependency_overrides[verify_api_key] = mock_verify_api_key
     yield
     app.dependency_overrides.clear()
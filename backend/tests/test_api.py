@@ -1,3 +1,4 @@
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from app.schemas import ClaimScoreRequest
@@ -30,4 +31,827 @@ def test_score_claim(override_get_db):
 def test_list_decisions(override_get_db):
     response = client.get("/api/decisions?limit=10")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
+    assert isinstance(response.json()["results"], list)
+
+def test_score_claims_batch(override_get_db):
+    claims = [
+        {
+            "claim_id": f"API-BATCH-{i:03d}",
+            "customer_id": "CUST-999",
+            "amount": 250 + i * 1500,
+            "incident_type": incident_type,
+            "history_score": i * 5
+        }
+        for i, incident_type in enumerate(["collision", "theft", "fire", "injury", "other"] * 4)
+    ]
+    
+    response = client.post("/api/claims/score/batch", json={"claims": claims})
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == len(claims)
+    for claim, result in zip(claims, data["results"]):
+        single = client.post("/api/claim/score", json=claim).json()
+        assert result["claim_id"] == claim["claim_id"]
+        assert result["risk_score"] == single["risk_score"]
+        assert result["fraud_probability"] == single["fraud_probability"]
+        assert result["decision"] == single["decision"]
+    
+    listed = client.get("/api/decisions?limit=200").json()["results"]
+    assert sum(d["claim_id"].startswith("API-BATCH-") for d in listed) == 2 * len(claims)
+
+def test_list_policies():
+    response = client.get("/api/policies")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["active"] in [p["version"] for p in data["policies"]]
+
+def test_unknown_model_version(override_get_db):
+    response = client.post(
+        "/api/claim/score",
+        json={
+            "claim_id": "API-TEST-002",
+            "customer_id": "CUST-999",
+            "amount": 3000,
+            "incident_type": "collision",
+            "history_score": 45
+        },
+        headers={"X-Model-Version": "does-not-exist"}
+    )
+    assert response.status_code == 400
+
+def test_get_decision_detail(override_get_db):
+    scored = client.post("/api/claim/score", json={
+        "claim_id": "API-TEST-003",
+        "customer_id": "CUST-999",
+        "amount": 7000,
+        "incident_type": "theft",
+        "history_score": 60
+    }).json()
+    
+    response = client.get(f"/api/decisions/{scored['decision_id']}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["decision"]["claim_id"] == "API-TEST-003"
+    assert [e["event_type"] for e in data["audit_events"]] == ["decision_created"]
+    
+    assert client.get("/api/decisions/not-a-uuid").status_code == 404
+
+def test_raw_claim_writer_batches_and_drains():
+    import asyncio
+    from types import SimpleNamespace
+    from app.clients.mongo import RawClaimWriter
+    
+    batches = []
+    collection = SimpleNamespace(insert_many=lambda docs, ordered: batches.append((len(docs), ordered)))
+    client_stub = SimpleNamespace(collection=collection, is_connected=lambda: True)
+    writer = RawClaimWriter(client_stub, queue_size=100, batch_size=4, flush_interval=0.05)
+    
+    async def run():
+        await writer.start()
+        for i in range(10):
+            await writer.enqueue(f"CLM-{i}", "CUST-1", {"i": i}, f"dec-{i}")
+        await writer.stop()
+    
+    asyncio.run(run())
+    
+    assert sum(n for n, _ in batches) == 10
+    assert max(n for n, _ in batches) <= 4
+    assert all(ordered is False for _, ordered in batches)
+    stats = writer.stats()
+    assert (stats["written"], stats["failed"], stats["queue_depth"]) == (10, 0, 0)
+
+def test_slow_llm_explanation_is_backfilled(db_session, async_session_factory):
+    import asyncio
+    import uuid
+    from app.clients.ollama import OllamaClient
+    from app.models import AuditLog, Decision
+    from app.scoring.explanations import ExplanationBackfill
+    
+    llm = OllamaClient()
+    llm.available = True
+    
+    async def slow_generate(*args):
+        await asyncio.sleep(0.2)
+        return "LLM explanation"
+    llm.generate_explanation = slow_generate
+    
+    decision_id = uuid.uuid4()
+    db_session.add(Decision(
+        decision_id=decision_id, claim_id="LLM-001", customer_id="CUST-1",
+        risk_score=40.0, fraud_probability=0.27, decision="APPROVE", explanation="template"
+    ))
+    db_session.commit()
+    backfill = ExplanationBackfill(session_factory=async_session_factory)
+    
+    async def run():
+        explanation, pending = await llm.generate_explanation_within(0.01, 1000, "theft", 50, 40, 0.27)
+        assert explanation is None and pending is not None
+        await backfill.schedule(pending, decision_id, "trace")
+    
+    asyncio.run(run())
+    
+    db_session.expire_all()
+    assert db_session.query(Decision).filter(Decision.decision_id == decision_id).one().explanation == "LLM explanation"
+    events = db_session.query(AuditLog).filter(AuditLog.decision_id == decision_id).all()
+    assert [e.event_type for e in events] == ["explanation_updated"]
+    assert backfill.stats()["updated"] == 1
+
+def test_explanation_cache_survives_restart(tmp_path):
+    import asyncio
+    from app.clients.explanation_cache import ExplanationCache
+    
+    path = str(tmp_path / "explanations.sqlite3")
+    key = ExplanationCache.key("prompt", "llama3.1", "policy-v1")
+    assert key != ExplanationCache.key("prompt", "llama3.1", "policy-v2")
+    
+    first = ExplanationCache(maxsize=10, path=path)
+    asyncio.run(first.put(key, "cached explanation", "llama3.1", "policy-v1"))
+    first.close()
+    
+    restarted = ExplanationCache(maxsize=10, path=path)
+    assert asyncio.run(restarted.get(key)) == "cached explanation"
+    assert asyncio.run(restarted.get(key)) == "cached explanation"
+    assert asyncio.run(restarted.get("missing")) is None
+    stats = restarted.stats()
+    restarted.close()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+
+def test_explanation_prompt_buckets_similar_claims(monkeypatch):
+    import json
+    from app.clients.ollama import OllamaClient
+    from app.scoring.policy import DEFAULT_POLICY_DIR, compile_policy, policy_store
+    
+    llm = OllamaClient()
+    prompt = llm.build_prompt(3120.55, "Collision", 42.3, 31.27, 0.214)
+    assert prompt == llm.build_prompt(4980.00, "collision ", 47.9, 38.6, 0.291)
+    assert "$2,500-$5,000" in prompt and "40-50/100" in prompt and "20-30%" in prompt
+    # Crossing a bucket edge or the risk level changes the prompt
+    assert prompt != llm.build_prompt(5000.00, "collision", 42.3, 31.27, 0.214)
+    assert prompt != llm.build_prompt(3120.55, "collision", 42.3, 31.27, 0.36)
+    assert "90-100/100" in llm.build_prompt(250000, "fire", 100, 100, 1.0)
+    
+    # The risk level follows the deciding policy's thresholds
+    spec = json.loads((DEFAULT_POLICY_DIR / "policy-v1.json").read_text())
+    spec.update(version="policy-strict", thresholds={"approve_below": 0.1, "review_below": 0.2})
+    monkeypatch.setitem(policy_store._policies, "policy-strict", compile_policy(spec))
+    assert "LOW risk" in prompt
+    assert "HIGH risk" in llm.build_prompt(3120.55, "collision", 42.3, 31.27, 0.214, "policy-strict")
+    assert llm.build_prompt(3120.55, "collision", 42.3, 31.27, 0.214, "policy-retired") == prompt
+
+def test_stream_explanation_writes_back(override_get_db, async_session_factory, monkeypatch):
+    from app.clients.ollama import ollama_client
+    from app.scoring.explanations import explanation_backfill
+    
+    scored = client.post("/api/claim/score", json={
+        "claim_id": "API-TEST-004",
+        "customer_id": "CUST-999",
+        "amount": 2500,
+        "incident_type": "injury",
+        "history_score": 35
+    }).json()
+    
+    async def fake_stream(*args):
+        for token in ["Claim ", "looks ", "routine."]:
+            yield token
+    
+    monkeypatch.setattr(ollama_client, "available", True)
+    monkeypatch.setattr(ollama_client, "stream_explanation", fake_stream)
+    monkeypatch.setattr(explanation_backfill, "session_factory", async_session_factory)
+    
+    response = client.get(f"/api/decisions/{scored['decision_id']}/explanation/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n")[0] for block in response.text.strip().split("\n\n")]
+    assert events == ["event: token"] * 3 + ["event: done"]
+    
+    detail = client.get(f"/api/decisions/{scored['decision_id']}").json()
+    assert detail["decision"]["explanation"] == "Claim looks routine."
+    assert detail["audit_events"][-1]["event_type"] == "explanation_updated"
+
+def test_score_claim_is_idempotent(override_get_db):
+    claim_data = {
+        "claim_id": "API-TEST-005",
+        "customer_id": "CUST-999",
+        "amount": 4200,
+        "incident_type": "theft",
+        "history_score": 20
+    }
+    
+    first = client.post("/api/claim/score", json=claim_data)
+    retry = client.post("/api/claim/score", json=claim_data)
+    assert retry.headers.get("Idempotent-Replayed") == "true"
+    assert retry.json()["decision_id"] == first.json()["decision_id"]
+    
+    keyed = client.post("/api/claim/score", json=claim_data, headers={"Idempotency-Key": "k-1"})
+    assert keyed.json()["decision_id"] != first.json()["decision_id"]
+    conflict = client.post(
+        "/api/claim/score",
+        json={**claim_data, "claim_id": "API-TEST-006"},
+        headers={"Idempotency-Key": "k-1"}
+    )
+    assert conflict.status_code == 409
+    changed = client.post(
+        "/api/claim/score",
+        json={**claim_data, "amount": 9000},
+        headers={"Idempotency-Key": "k-1"}
+    )
+    assert changed.status_code == 422
+    
+    listed = client.get("/api/decisions?limit=200").json()["results"]
+    assert sum(d["claim_id"] == "API-TEST-005" for d in listed) == 2
+
+def test_derived_idempotency_key_includes_versions():
+    from app.utils.idempotency import derive_idempotency_key
+    
+    payload = {"claim_id": "C-1", "amount": 100}
+    key = derive_idempotency_key("C-1", payload, "rb-v1", "policy-v1")
+    assert key == derive_idempotency_key("C-1", dict(payload), "rb-v1", "policy-v1")
+    assert key != derive_idempotency_key("C-1", payload, "rb-v1", "policy-v2")
+    assert key != derive_idempotency_key("C-1", payload, "rb-v2", "policy-v1")
+
+def test_inflight_requests_coalesce():
+    import asyncio
+    from app.utils.idempotency import InFlightRequests
+    
+    inflight = InFlightRequests()
+    calls = []
+    
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "decision"
+    
+    async def run():
+        return await asyncio.gather(*(inflight.run("key", work) for _ in range(5)))
+    
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert [r for r, _ in results] == ["decision"] * 5
+    assert sum(coalesced for _, coalesced in results) == 4
+    assert inflight.in_flight() == 0
+
+def test_decision_with_audit_is_one_postgres_statement():
+    from sqlalchemy.dialects import postgresql
+    from app.persistence import decision_with_audit_statement, new_decision_rows
+    
+    decision_row, audit_row = new_decision_rows(
+        {
+            "claim_id": "PG-001", "customer_id": "CUST-1", "model_version": "rb-v1",
+            "policy_version": "policy-v1", "risk_score": 10.0, "fraud_probability": 0.02,
+            "decision": "APPROVE", "explanation": "ok"
+        },
+        {"trace_id": "trace"}
+    )
+    assert audit_row["decision_id"] == decision_row["decision_id"]
+    sql = str(decision_with_audit_statement(decision_row, audit_row).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH new_decision AS")
+    assert "RETURNING decisions.decision_id" in sql
+    assert "INSERT INTO audit_log" in sql
+
+def test_group_commit_batches_and_isolates_failures(db_session, async_session_factory):
+    import asyncio
+    from app.models import Decision
+    from app.persistence import GroupCommitWriter, new_decision_rows
+    
+    writer = GroupCommitWriter(async_session_factory, max_batch=50, max_wait=0.02)
+    
+    def rows(i, key):
+        return new_decision_rows(
+            {
+                "claim_id": f"GC-{i:03d}", "customer_id": "CUST-1", "model_version": "rb-v1",
+                "policy_version": "policy-v1", "risk_score": 10.0, "fraud_probability": 0.02,
+                "decision": "APPROVE", "explanation": "ok", "idempotency_key": key
+            },
+            {"trace_id": f"trace-{i}"}
+        )
+    
+    async def run():
+        await writer.start()
+        # Two rows share an idempotency key: exactly one of them must fail
+        submissions = [rows(i, "dup" if i in (3, 4) else f"k-{i}") for i in range(20)]
+        results = await asyncio.gather(
+            *(writer.submit(d, a) for d, a in submissions), return_exceptions=True
+        )
+        await writer.stop()
+        return results
+    
+    results = asyncio.run(run())
+    assert sum(isinstance(r, Exception) for r in results) == 1
+    stats = writer.stats()
+    assert stats["committed"] == 19
+    assert stats["batch_size"]["count"] < 20
+    assert stats["wait_ms"]["count"] == 20
+    assert db_session.query(Decision).filter(Decision.claim_id.like("GC-%")).count() == 19
+
+def test_score_claims_ndjson_stream(override_get_db, monkeypatch):
+    import json
+    from app.config import settings
+    
+    monkeypatch.setattr(settings, "NDJSON_CHUNK_SIZE", 4)
+    monkeypatch.setattr(settings, "NDJSON_MAX_LINE_BYTES", 300)
+    lines = [
+        json.dumps({
+            "claim_id": f"NDJSON-{i:03d}",
+            "customer_id": "CUST-1",
+            "amount": 100 + i * 900,
+            "incident_type": "collision",
+            "history_score": i
+        })
+        for i in range(10)
+    ]
+    lines.insert(5, '{"claim_id": "BROKEN"}')
+    lines.insert(8, '{"claim_id": "' + "X" * 1000 + '"}')
+    body = ("\n".join(lines) + "\n").encode()
+    
+    response = client.post(
+        "/api/claims/score/stream",
+        content=(body[i:i + 37] for i in range(0, len(body), 37)),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    decisions = [r for r in records if "decision_id" in r]
+    assert [d["claim_id"] for d in decisions] == [f"NDJSON-{i:03d}" for i in range(10)]
+    assert [r["line"] for r in records if "error" in r] == [6, 9]
+    assert records[-1]["summary"]["scored"] == 10
+    assert records[-1]["summary"]["errors"] == 2
+    
+    stored = client.get("/api/decisions", params={"limit": 200}).json()["results"]
+    assert sum(d["claim_id"].startswith("NDJSON-") for d in stored) == 10
+
+def test_submit_scoring_job(override_get_db, tmp_path, monkeypatch):
+    from app.scoring.jobs import job_runner
+    
+    monkeypatch.setattr(job_runner, "job_dir", str(tmp_path))
+    csv_body = (
+        "claim_id,customer_id,amount,incident_type,history_score\n"
+        "JOB-001,CUST-1,1200,collision,10\n"
+    )
+    response = client.post("/api/jobs", files={"file": ("claims.csv", csv_body, "text/csv")})
+    assert response.status_code == 202
+    job = response.json()
+    assert (job["status"], job["input_format"], job["processed_rows"]) == ("queued", "csv", 0)
+    assert (tmp_path / f"{job['job_id']}.csv").read_text() == csv_body
+    
+    status = client.get(f"/api/jobs/{job['job_id']}")
+    assert status.status_code == 200
+    assert status.json()["status"] == "queued"
+    assert client.get(f"/api/jobs/{job['job_id']}/output").status_code == 409
+    assert client.get("/api/jobs/not-a-uuid").status_code == 404
+    
+    rejected = client.post("/api/jobs", files={"file": ("claims.xlsx", b"x", "application/octet-stream")})
+    assert rejected.status_code == 400
+
+def test_seed_is_deterministic_and_writes_audit_rows(override_get_db, db_session):
+    from app.config import settings
+    from app.models import AuditLog, Decision
+    from app.seeding import BLOCK_SIZE, generate_block
+    from app.schemas import SeedProfile
+    
+    params = {"count": 25, "seed": 7, "seed_token": settings.SEED_TOKEN}
+    first = client.post("/api/seed", params=params)
+    assert first.status_code == 200
+    assert (first.json()["seeded"], first.json()["seed"]) == (25, 7)
+    assert client.post("/api/seed", params=params).status_code == 200
+    
+    decisions = db_session.query(Decision).all()
+    assert len(decisions) == 50
+    assert db_session.query(AuditLog).filter(AuditLog.event_type == "decision_created").count() == 50
+    by_claim = {}
+    for d in decisions:
+        by_claim.setdefault(d.claim_id, []).append((d.customer_id, d.risk_score, d.decision))
+    assert len(by_claim) == 25
+    assert all(a == b for a, b in by_claim.values())
+    
+    # Claims depend only on (seed, row index), not on how many rows are requested
+    profile = SeedProfile(seed=7)
+    claims, created_at = generate_block(profile, 0, 10)
+    assert claims == generate_block(profile, 0, BLOCK_SIZE)[0][:10]
+    assert all(c.amount >= profile.amount_min and 0 <= c.history_score <= 100 for c in claims)
+    assert all(t <= profile.end for t in created_at)
+    assert client.post("/api/seed", params={**params, "seed_token": "wrong"}).status_code == 401
+
+def test_list_decisions_keyset_pagination(override_get_db):
+    from app.config import settings
+    
+    client.post("/api/seed", params={"count": 25, "seed": 3, "seed_token": settings.SEED_TOKEN})
+    
+    pages, cursor = [], None
+    while True:
+        response = client.get("/api/decisions", params={"limit": 10, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json()
+        pages.append(page["results"])
+        cursor = page["next_cursor"]
+        assert response.headers.get("X-Next-Cursor") == cursor
+        if cursor is None:
+            break
+    
+    assert [len(page) for page in pages] == [10, 10, 5]
+    rows = [row for page in pages for row in page]
+    assert len({row["decision_id"] for row in rows}) == 25
+    keys = [(row["timestamp"], row["decision_id"]) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+    
+    assert client.get("/api/decisions", params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_decision_detail_is_one_query(override_get_db, async_session_factory):
+    from sqlalchemy import event
+    
+    scored = client.post("/api/claim/score", json={
+        "claim_id": "API-TEST-004",
+        "customer_id": "CUST-998",
+        "amount": 2500,
+        "incident_type": "fire",
+        "history_score": 20
+    }).json()
+    
+    statements = []
+    engine = async_session_factory.kw["bind"].sync_engine
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(f"/api/decisions/{scored['decision_id']}")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    
+    assert response.status_code == 200
+    assert [e["event_type"] for e in response.json()["audit_events"]] == ["decision_created"]
+    assert len(statements) == 1
+    assert "LEFT OUTER JOIN audit_log" in statements[0]
+
+def test_decision_stats_match_rows(override_get_db, db_session):
+    import numpy as np
+    from app.analytics import percentiles_from_histogram
+    from app.config import settings
+    from app.models import Decision
+    
+    profile = {"end": "2026-01-01T00:00:00Z", "days": 10}
+    client.post("/api/seed", params={"count": 300, "seed": 11, "seed_token": settings.SEED_TOKEN}, json=profile)
+    
+    response = client.get("/api/decisions/stats", params={"since": "2025-12-01T00:00:00Z", "until": "2026-01-01T00:00:00Z"})
+    assert response.status_code == 200
+    stats = response.json()
+    
+    rows = db_session.query(Decision).all()
+    assert stats["total"] == 300
+    assert stats["by_decision"] == {d: sum(r.decision == d for r in rows) for d in {r.decision for r in rows}}
+    assert sum(b["count"] for b in stats["risk_score_histogram"]) == 300
+    assert stats["by_version"][0]["total"] == 300
+    assert abs(stats["avg_risk_score"] - np.mean([r.risk_score for r in rows])) < 1e-3
+    p95 = np.percentile([r.fraud_probability for r in rows], 95)
+    assert abs(stats["fraud_probability_percentiles"]["p95"] - p95) <= 0.002
+    
+    empty = client.get("/api/decisions/stats", params={"since": "2020-01-01T00:00:00Z", "until": "2020-02-01T00:00:00Z"})
+    assert empty.json()["total"] == 0
+    assert empty.json()["fraud_probability_percentiles"]["p50"] is None
+    assert client.get("/api/decisions/stats", params={"since": "2020-01-01T00:00:00Z", "until": "2026-01-01T00:00:00Z"}).status_code == 400
+    assert percentiles_from_histogram({100: 1, 900: 3}, 1000)["p50"] == 0.9005
+
+def test_decision_stats_buckets_floor_scores(override_get_db, db_session):
+    import uuid
+    from datetime import datetime, timezone
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+    from app.analytics import bucket_index
+    from app.models import Decision
+    
+    created_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    for risk_score in (19.6, 19.99, 20.0, 99.9):
+        db_session.add(Decision(
+            decision_id=uuid.uuid4(), claim_id="EDGE", customer_id="CUST-EDGE", incident_class="other",
+            risk_score=risk_score, fraud_probability=0.0996, decision="APPROVE", explanation="edge",
+            model_version="rb-v1", policy_version="policy-v1", created_at=created_at
+        ))
+    db_session.commit()
+    
+    stats = client.get("/api/decisions/stats", params={
+        "since": "2024-05-01T00:00:00Z", "until": "2024-05-02T00:00:00Z"
+    }).json()
+    assert [b["count"] for b in stats["risk_score_histogram"]] == [0, 2, 1, 0, 0, 0, 0, 0, 0, 1]
+    # Bucket 99 of 1000 has midpoint 0.0995; rounding 99.6 up would give 0.1005
+    assert stats["fraud_probability_percentiles"]["p50"] == 0.0995
+    # PostgreSQL rounds on CAST, so its bucket expression must floor first
+    compiled = select(bucket_index(Decision.risk_score / 10.0, "postgresql")).compile(dialect=postgresql.dialect())
+    assert "floor(" in str(compiled)
+
+def test_export_decisions_streams_csv_and_parquet(override_get_db, db_session, monkeypatch):
+    import csv
+    import io
+    from app.config import settings
+    from app.models import Decision
+    
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 7)
+    client.post("/api/seed", params={"count": 40, "seed": 5, "seed_token": settings.SEED_TOKEN})
+    rejected = db_session.query(Decision).filter(Decision.decision == "REJECT").count()
+    
+    response = client.get("/api/decisions/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 40
+    assert [r["created_at"] for r in rows] == sorted(r["created_at"] for r in rows)
+    assert "explanation" not in rows[0]
+    
+    filtered = client.get("/api/decisions/export", params={"decision": "REJECT", "include_explanation": True})
+    filtered_rows = list(csv.DictReader(io.StringIO(filtered.text)))
+    assert len(filtered_rows) == rejected
+    assert all(r["decision"] == "REJECT" and r["explanation"] for r in filtered_rows)
+    assert client.get("/api/decisions/export", params={"format": "xlsx"}).status_code == 400
+    
+    pq = pytest.importorskip("pyarrow.parquet")
+    parquet = client.get("/api/decisions/export", params={"format": "parquet"})
+    assert parquet.status_code == 200
+    table = pq.read_table(io.BytesIO(parquet.content))
+    assert table.num_rows == 40
+    assert pq.ParquetFile(io.BytesIO(parquet.content)).num_row_groups == 6
+    assert sorted(table.column("decision_id").to_pylist()) == sorted(r["decision_id"] for r in rows)
+
+def test_rollups_track_writes_and_verify(override_get_db, db_session, async_session_factory):
+    import asyncio
+    from app.config import settings
+    from app.models import Decision, DecisionRollup, DecisionRollupDelta
+    from app.rollups import RollupMerger, rebuild_rollups, verify_rollups
+    
+    async def verify():
+        async with async_session_factory() as db:
+            return await verify_rollups(db)
+    
+    async def rebuild():
+        async with async_session_factory() as db:
+            result = await rebuild_rollups(db)
+            await db.commit()
+            return result
+    
+    client.post("/api/seed", params={"count": 120, "seed": 3, "seed_token": settings.SEED_TOKEN},
+                json={"end": "2026-01-01T00:00:00Z", "days": 2})
+    client.post("/api/claim/score", json={
+        "claim_id": "API-ROLLUP-001",
+        "customer_id": "CUST-997",
+        "amount": 900,
+        "incident_type": "theft",
+        "history_score": 70
+    })
+    assert asyncio.run(verify())["consistent"]
+    
+    response = client.get("/api/rollups/decisions", params={
+        "since": "2025-12-30T00:00:00Z", "until": "2026-01-01T00:00:00Z",
+        "granularity": "total", "group_by": "decision"
+    })
+    assert response.status_code == 200
+    buckets = response.json()["buckets"]
+    rows = db_session.query(Decision).filter(Decision.claim_id.notlike("API-%")).all()
+    assert {b["decision"]: b["count"] for b in buckets} == {
+        d: sum(r.decision == d for r in rows) for d in {r.decision for r in rows}
+    }
+    assert all(sum(h["count"] for h in b["risk_score_histogram"]) == b["count"] for b in buckets)
+    daily = client.get("/api/rollups/decisions", params={
+        "since": "2025-12-30T00:00:00Z", "until": "2026-01-01T00:00:00Z", "granularity": "day"
+    }).json()["buckets"]
+    assert len(daily) == 2 and sum(b["count"] for b in daily) == 120
+    assert client.get("/api/rollups/decisions", params={"group_by": "customer_id"}).status_code == 400
+    
+    # Writes only append deltas; reads are exact before and after a merge
+    assert db_session.query(DecisionRollup).count() == 0
+    pending = db_session.query(DecisionRollupDelta).count()
+    merger = RollupMerger(session_factory=async_session_factory, batch_size=7)
+    assert asyncio.run(merger.merge()) == pending
+    assert db_session.query(DecisionRollupDelta).count() == 0
+    assert asyncio.run(verify())["consistent"]
+    assert client.get("/api/rollups/decisions", params={
+        "since": "2025-12-30T00:00:00Z", "until": "2026-01-01T00:00:00Z", "granularity": "day"
+    }).json()["buckets"] == daily
+    
+    # Drift (e.g. a manual edit) is detected and repaired by a rebuild
+    db_session.query(DecisionRollup).first().decision_count += 1
+    db_session.commit()
+    report = asyncio.run(verify())
+    assert not report["consistent"] and len(report["mismatches"]) == 1
+    asyncio.run(rebuild())
+    assert asyncio.run(verify())["consistent"]
+
+def test_decision_detail_etag_and_invalidation(override_get_db, async_session_factory):
+    import asyncio
+    from sqlalchemy import event
+    import uuid
+    from app.scoring.explanations import ExplanationBackfill
+    
+    scored = client.post("/api/claim/score", json={
+        "claim_id": "API-TEST-005",
+        "customer_id": "CUST-996",
+        "amount": 4100,
+        "incident_type": "collision",
+        "history_score": 35
+    }).json()
+    url = f"/api/decisions/{scored['decision_id']}"
+    
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('"')
+    assert first.json()["decision"]["decision_id"] == scored["decision_id"]
+    
+    statements = []
+    engine = async_session_factory.kw["bind"].sync_engine
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        revalidated = client.get(url, headers={"If-None-Match": etag})
+        cached = client.get(url)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert revalidated.status_code == 304 and revalidated.headers["ETag"] == etag
+    assert cached.content == first.content
+    assert statements == []
+    
+    # Appending an audit event invalidates the entry and changes the ETag
+    backfill = ExplanationBackfill(session_factory=async_session_factory)
+    asyncio.run(backfill.record(uuid.UUID(scored["decision_id"]), "Updated explanation", "trace-etag"))
+    updated = client.get(url, headers={"If-None-Match": etag})
+    assert updated.status_code == 200 and updated.headers["ETag"] != etag
+    assert updated.json()["decision"]["explanation"] == "Updated explanation"
+    assert [e["event_type"] for e in updated.json()["audit_events"]] == ["decision_created", "explanation_updated"]
+
+def test_shadow_events_invalidate_decision_detail(override_get_db, async_session_factory, monkeypatch):
+    import asyncio
+    import httpx
+    from app.scoring.shadow import shadow_evaluator
+    
+    monkeypatch.setattr(shadow_evaluator, "challengers", [("rb-v1", None)])
+    monkeypatch.setattr(shadow_evaluator, "session_factory", async_session_factory)
+    # Rows are only written by the flush in stop(), after the first read
+    monkeypatch.setattr(shadow_evaluator, "flush_interval", 60)
+    
+    async def run():
+        # Shadow workers need the app's event loop, so drive it in-process
+        await shadow_evaluator.start()
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as api:
+                scored = (await api.post("/api/claim/score", json={
+                    "claim_id": "API-TEST-007",
+                    "customer_id": "CUST-995",
+                    "amount": 2600,
+                    "incident_type": "theft",
+                    "history_score": 15
+                })).json()
+                url = f"/api/decisions/{scored['decision_id']}"
+                first = await api.get(url)
+                assert [e["event_type"] for e in first.json()["audit_events"]] == ["decision_created"]
+                await shadow_evaluator.stop()
+                return first.headers["ETag"], await api.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        finally:
+            await shadow_evaluator.stop()
+    
+    etag, updated = asyncio.run(run())
+    assert updated.status_code == 200 and updated.headers["ETag"] != etag
+    assert [e["event_type"] for e in updated.json()["audit_events"]] == ["decision_created", "shadow_decision"]
+
+def test_list_decisions_filters_and_search(override_get_db, db_session):
+    from app.config import settings
+    from app.models import Decision
+    
+    client.post("/api/seed", params={"count": 60, "seed": 9, "seed_token": settings.SEED_TOKEN})
+    rows = db_session.query(Decision).all()
+    customer = rows[0].customer_id
+    
+    def listed(**params):
+        response = client.get("/api/decisions", params={"limit": 1000, **params})
+        assert response.status_code == 200
+        return {d["decision_id"] for d in response.json()["results"]}
+    
+    ids = lambda predicate: {str(r.decision_id) for r in rows if predicate(r)}
+    assert listed(customer_id=customer) == ids(lambda r: r.customer_id == customer)
+    assert listed(decision=["REVIEW", "REJECT"]) == ids(lambda r: r.decision != "APPROVE")
+    assert listed(min_risk_score=40, max_risk_score=70) == ids(lambda r: 40 <= r.risk_score <= 70)
+    middle = sorted(r.created_at for r in rows)[30]
+    assert listed(since=middle.isoformat()) == ids(lambda r: r.created_at >= middle)
+    # Stemmed full-text match ("incidents" finds "incident"); words are ANDed
+    word = rows[0].explanation.split()[0].strip(".,:").lower()
+    assert listed(q=word) == ids(lambda r: word in r.explanation.lower())
+    assert listed(q=f"{word} zzznomatch") == set()
+    assert client.get("/api/decisions", params={"q": "!!!"}).status_code == 400
+    
+    page = client.get("/api/decisions", params={"limit": 5, "decision": "APPROVE"}).json()
+    rest = client.get("/api/decisions", params={
+        "limit": 1000, "decision": "APPROVE", "cursor": page["next_cursor"]
+    }).json()
+    assert rest["next_cursor"] is None
+    assert {d["decision_id"] for d in page["results"] + rest["results"]} == ids(lambda r: r.decision == "APPROVE")
+
+@pytest.mark.parametrize("filters, index", [
+    ({"customer_id": "CUST-0000001"}, "ix_decisions_customer_id_created_at"),
+    ({"decisions": ["REJECT"]}, "ix_decisions_decision_created_at"),
+    ({"decisions": ["REVIEW", "REJECT"]}, "ix_decisions_decision_created_at"),
+    ({"min_risk_score": 70.0, "max_risk_score": 90.0}, "ix_decisions_risk_score"),
+    ({"since": "2026-01-01T00:00:00+00:00", "until": "2026-02-01T00:00:00+00:00"}, "ix_decisions_created_at_decision_id"),
+    ({"q": "theft history"}, "decisions_fts"),
+    ({"customer_id": "CUST-0000001", "decisions": ["REJECT"], "min_risk_score": 50.0}, None),
+    ({"customer_id": "CUST-0000001", "q": "theft"}, None),
+    ({"decisions": ["REVIEW"], "since": "2026-01-01T00:00:00+00:00", "max_risk_score": 60.0}, None),
+    ({"min_risk_score": 50.0, "since": "2026-01-01T00:00:00+00:00", "q": "collision"}, None),
+])
+def test_decision_filters_use_an_index(db_session, filters, index):
+    from datetime import datetime
+    from sqlalchemy import event, select
+    from app.models import Decision
+    from app.search import decision_filters
+    
+    filters = {k: datetime.fromisoformat(v) if k in ("since", "until") else v for k, v in filters.items()}
+    query = (
+        select(Decision)
+        .filter(*decision_filters("sqlite", **filters))
+        .order_by(Decision.created_at.desc(), Decision.decision_id.desc())
+        .limit(51)
+    )
+    explain = lambda conn, cursor, statement, parameters, *args: ("EXPLAIN QUERY PLAN " + statement, parameters)
+    with db_session.get_bind().connect() as conn:
+        event.listen(conn, "before_cursor_execute", explain, retval=True)
+        plan = [row[-1] for row in conn.execute(query)]
+    
+    # Every access to decisions goes through an index or the rowid, never a table scan
+    steps = [step for step in plan if step.split()[:2] in (["SCAN", "decisions"], ["SEARCH", "decisions"])]
+    assert steps and all(" USING " in step for step in steps), plan
+    if index is not None:
+        assert any(index in step for step in plan), plan
+
+def test_archive_cold_months_and_export_them(override_get_db, db_session, async_session_factory, tmp_path, monkeypatch):
+    import asyncio
+    import csv
+    import io
+    pytest.importorskip("pyarrow")
+    from app.archive import archive_cold_months, archived_through, load_manifest
+    from app.config import settings
+    from app.models import AuditLog, Decision
+    from app.rollups import verify_rollups
+    
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 16)
+    client.post("/api/seed", params={"count": 60, "seed": 21, "seed_token": settings.SEED_TOKEN},
+                json={"end": "2025-03-01T00:00:00Z", "days": 40})
+    client.post("/api/claim/score", json={
+        "claim_id": "API-ARCHIVE-001",
+        "customer_id": "CUST-995",
+        "amount": 1200,
+        "incident_type": "fire",
+        "history_score": 60
+    })
+    old = {str(d.decision_id): d.decision for d in db_session.query(Decision).filter(Decision.claim_id.notlike("API-%"))}
+    
+    result = asyncio.run(archive_cold_months(async_session_factory, hot_months=3))
+    assert [m["month"] for m in result["archived"]] == ["2025-01", "2025-02"]
+    assert sum(m["decisions"] for m in result["archived"]) == sum(m["audit_log"] for m in result["archived"]) == 60
+    db_session.expire_all()
+    assert [d.claim_id for d in db_session.query(Decision)] == ["API-ARCHIVE-001"]
+    assert db_session.query(AuditLog).count() == 1
+    assert all(entry["status"] == "complete" for entry in load_manifest(str(tmp_path))["files"])
+    assert asyncio.run(archive_cold_months(async_session_factory, hot_months=3))["archived"] == []
+    
+    # Archived months come back through the export path, oldest first, ahead of live rows
+    response = client.get("/api/decisions/export", params={"since": "2025-01-01T00:00:00Z", "include_explanation": True})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 61 and rows[-1]["claim_id"] == "API-ARCHIVE-001"
+    assert {r["decision_id"]: r["decision"] for r in rows[:60]} == old
+    assert all(r["explanation"] for r in rows)
+    rejected = client.get("/api/decisions/export", params={
+        "since": "2025-02-01T00:00:00Z", "until": "2025-03-01T00:00:00Z", "decision": "REJECT"
+    })
+    rejected_rows = list(csv.DictReader(io.StringIO(rejected.text)))
+    assert all(r["decision"] == "REJECT" and r["created_at"] >= "2025-02-01" for r in rejected_rows)
+    
+    # Rollups of archived months are kept; verification starts after them
+    async def verify():
+        async with async_session_factory() as db:
+            return await verify_rollups(db, since=archived_through(str(tmp_path)))
+    assert asyncio.run(verify())["consistent"]
+
+def test_archive_removal_checks_the_archived_counts(override_get_db, db_session, async_session_factory):
+    import asyncio
+    from datetime import datetime, timezone
+    from app.archive import ArchiveError, _remove_month
+    from app.config import settings
+    from app.models import Decision
+    from app.partitions import is_lock_timeout
+    
+    client.post("/api/seed", params={"count": 10, "seed": 4, "seed_token": settings.SEED_TOKEN},
+                json={"end": "2025-01-20T00:00:00Z", "days": 5})
+    start, end = datetime(2025, 1, 1, tzinfo=timezone.utc), datetime(2025, 2, 1, tzinfo=timezone.utc)
+    
+    async def remove(counts):
+        async with async_session_factory() as db:
+            try:
+                await _remove_month(db, start, end, counts)
+                await db.commit()
+            finally:
+                await db.rollback()
+    
+    # A row written after the files were counted aborts the removal
+    with pytest.raises(ArchiveError):
+        asyncio.run(remove({"decisions": 9, "audit_log": 10}))
+    assert db_session.query(Decision).count() == 10
+    asyncio.run(remove({"decisions": 10, "audit_log": 10}))
+    db_session.expire_all()
+    assert db_session.query(Decision).count() == 0
+    
+    class LockNotAvailable(Exception):
+        sqlstate = "55P03"
+    assert is_lock_timeout(LockNotAvailable()) and not is_lock_timeout(ValueError())
@@ -43,3 +43,323 @@ def test_risk_score_cap():
     risk_score, _, _ = ScoringEngine.calculate_risk_score(claim)
     
     assert risk_score <= 100
+
+def test_batch_matches_scalar():
+    import numpy as np
+    
+    rng = np.random.default_rng(42)
+    incident_types = ["collision", "theft", "fire", "injury", "vandalism", "Rear COLLISION"]
+    amounts = np.concatenate([rng.uniform(1, 60000, 2000), [499.99, 500, 4999.99, 5000, 20000]])
+    history = np.concatenate([rng.uniform(0, 100, 2000), [0, 100, 50, 33.3, 100]])
+    incidents = [incident_types[i % len(incident_types)] for i in range(len(amounts))]
+    
+    risk_scores, fraud_probs, decisions = ScoringEngine.score_batch(
+        amounts,
+        np.array([ScoringEngine.incident_code(t) for t in incidents]),
+        history
+    )
+    
+    for i, incident_type in enumerate(incidents):
+        claim = ClaimScoreRequest(
+            claim_id=f"BATCH-{i}",
+            customer_id="CUST-BATCH",
+            amount=float(amounts[i]),
+            incident_type=incident_type,
+            history_score=float(history[i])
+        )
+        assert ScoringEngine.calculate_risk_score(claim) == (
+            risk_scores[i], fraud_probs[i], decisions[i]
+        )
+
+def test_policy_hot_reload(tmp_path):
+    import json
+    import os
+    import pytest
+    from app.scoring.policy import DEFAULT_POLICY_DIR, PolicyError, PolicyStore, compile_policy
+    
+    spec = json.loads((DEFAULT_POLICY_DIR / "policy-v1.json").read_text())
+    spec["version"] = "policy-test"
+    path = tmp_path / "policy-test.json"
+    path.write_text(json.dumps(spec))
+    store = PolicyStore(tmp_path, reload_interval=0)
+    
+    claim = ClaimScoreRequest(
+        claim_id="TEST-004",
+        customer_id="CUST-004",
+        amount=3000,
+        incident_type="collision",
+        history_score=40
+    )
+    policy = store.get("policy-test")
+    assert ScoringEngine.calculate_risk_score(claim, policy)[2] == "APPROVE"
+    
+    spec["thresholds"]["approve_below"] = 0.01
+    path.write_text(json.dumps(spec))
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 1))
+    assert store.reload() == ["policy-test"]
+    assert ScoringEngine.calculate_risk_score(claim, store.get("policy-test"))[2] == "REVIEW"
+    
+    # A broken edit keeps the last good compiled policy
+    path.write_text("{not json")
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 2))
+    assert store.reload() == []
+    assert store.get("policy-test").thresholds[0] == 0.01
+    
+    # So does a well-formed file with an invalid field
+    spec["history_weight"] = "heavy"
+    path.write_text(json.dumps(spec))
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 3))
+    assert store.reload() == []
+    assert store.get("policy-test").thresholds[0] == 0.01
+    
+    del spec["history_weight"]
+    with pytest.raises(PolicyError):
+        compile_policy(spec)
+
+def test_incident_classifier_precedence():
+    from app.scoring.classifier import IncidentClassifier
+    
+    classifier = IncidentClassifier(("other", "collision", "theft", "fire", "injury"), cache_size=8)
+    
+    assert classifier.classify("Rear-end COLLISION on highway") == 1
+    # Earlier-listed class wins regardless of position in the text
+    assert classifier.classify("fire after attempted theft") == 2
+    assert classifier.classify("minor injury; vehicle caught fire") == 3
+    assert classifier.classify("hail damage") == 0
+    
+    classifier.classify("hail damage")
+    assert classifier.cache_info().hits == 1
+    
+    # A keyword that is a prefix of a later one still wins where both start
+    prefixed = IncidentClassifier(("other", "car", "carfire"), cache_size=8)
+    assert prefixed.classify("CARFIRE in garage") == 1
+    assert IncidentClassifier(("other", "carfire", "car"), cache_size=8).classify("carfire") == 1
+
+def test_scoring_cache_matches_engine_and_invalidates():
+    from app.scoring.cache import ScoringCache
+    from app.scoring.policy import policy_store
+    
+    cache = ScoringCache(policy_store, maxsize=2)
+    policy = policy_store.get()
+    claims = [
+        ClaimScoreRequest(
+            claim_id=f"CACHE-{i}",
+            customer_id="CUST-005",
+            amount=amount,
+            incident_type="theft",
+            history_score=history
+        )
+        for i, (amount, history) in enumerate([(1200, 30), (4800, 30), (9000, 30), (1200, 30)])
+    ]
+    
+    for claim in claims:
+        code = policy.incident_code(claim.incident_type)
+        scored = cache.score(claim, policy, code)
+        assert (scored.risk_score, scored.fraud_probability, scored.decision) == \
+            ScoringEngine.calculate_risk_score(claim, policy)
+        assert scored.template_explanation(claim.amount) == \
+            ScoringEngine.generate_template_explanation(claim, *ScoringEngine.calculate_risk_score(claim, policy), policy)
+    
+    stats = cache.stats()
+    # 1200 and 4800 share an amount band; the 9000 claim evicts nothing at maxsize=2
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 0)
+    
+    policy_store.generation += 1
+    cache.score(claims[0], policy, policy.incident_code("theft"))
+    assert cache.stats()["misses"] == 3
+    assert cache.stats()["size"] == 1
+
+def test_model_registry_process_pool_matches_inline():
+    import asyncio
+    from app.scoring.policy import get_policy
+    from app.scoring.registry import ModelRegistry
+    
+    registry = ModelRegistry(
+        "rb-v1=app.scoring.registry:RuleBasedScorer,"
+        "rb-v1-pooled=app.scoring.registry:RuleBasedScorer@process",
+        process_workers=1
+    )
+    claim = ClaimScoreRequest(
+        claim_id="TEST-006",
+        customer_id="CUST-006",
+        amount=12000,
+        incident_type="fire",
+        history_score=55
+    )
+    policy = get_policy()
+    code = policy.incident_code(claim.incident_type)
+    
+    try:
+        inline = asyncio.run(registry.score(registry.get("rb-v1"), claim, policy, code))
+        pooled = asyncio.run(registry.score(registry.get("rb-v1-pooled"), claim, policy, code))
+        assert [m["execution"] for m in registry.describe()] == ["inline", "process"]
+    finally:
+        registry.shutdown()
+    
+    assert inline == pooled
+
+def test_shadow_evaluator_writes_batches_and_drops_under_load(db_session, async_session_factory):
+    import asyncio
+    import uuid
+    from app.models import AuditLog
+    from app.scoring.shadow import ShadowEvaluator, ShadowJob
+    
+    evaluator = ShadowEvaluator(
+        [("rb-v1", None)],
+        session_factory=async_session_factory,
+        queue_size=2,
+        workers=1,
+        flush_size=10,
+        flush_interval=0.05
+    )
+    claim = ClaimScoreRequest(
+        claim_id="TEST-007",
+        customer_id="CUST-007",
+        amount=800,
+        incident_type="injury",
+        history_score=10
+    )
+    
+    async def run():
+        await evaluator.start()
+        accepted = [
+            evaluator.submit(ShadowJob(uuid.uuid4(), claim, {"decision": "APPROVE"}, "trace"))
+            for _ in range(3)
+        ]
+        await evaluator.stop()
+        return accepted
+    
+    assert asyncio.run(run()) == [True, True, False]
+    stats = evaluator.stats()
+    assert (stats["dropped"], stats["evaluated"], stats["written"]) == (1, 2, 2)
+    
+    events = db_session.query(AuditLog).filter(AuditLog.event_type == "shadow_decision").all()
+    assert len(events) == 2
+    assert all(e.event_payload["agrees"] for e in events)
+
+def test_scoring_job_resumes_from_last_committed_chunk(db_session, async_session_factory, tmp_path):
+    import asyncio
+    import csv
+    import uuid
+    from app.models import Decision, ScoringJob
+    from app.scoring.jobs import JobRunner
+    
+    input_path = tmp_path / "claims.csv"
+    with open(input_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["claim_id", "customer_id", "amount", "incident_type", "history_score"])
+        for i in range(8):
+            writer.writerow([f"JOB-{i}", "CUST-1", "not-a-number" if i == 4 else 500 + i * 1000, "theft", i * 10])
+    
+    job_id = uuid.uuid4()
+    db_session.add(ScoringJob(
+        job_id=job_id, status="queued", input_format="csv", input_path=str(input_path),
+        output_path=str(tmp_path / "out.csv"), model_version="rb-v1", policy_version="policy-v1",
+        chunk_size=3, processed_rows=0, scored_rows=0, error_count=0, output_offset=0, errors=[]
+    ))
+    db_session.commit()
+    
+    class CrashingRunner(JobRunner):
+        """Fails on the second chunk after its output is written but before it commits."""
+        chunks = 0
+        
+        async def _score(self, job, chunk, first_row, trace_id):
+            self.chunks += 1
+            result = await super()._score(job, chunk, first_row, trace_id)
+            if self.chunks == 2:
+                with open(job.output_path, "a") as f:
+                    f.write(result[2])
+                raise RuntimeError("worker lost")
+            return result
+    
+    common = dict(session_factory=async_session_factory, job_dir=str(tmp_path), process_workers=0)
+    asyncio.run(CrashingRunner(**common).run(job_id))
+    db_session.expire_all()
+    job = db_session.get(ScoringJob, job_id)
+    assert (job.status, job.processed_rows, job.total_rows) == ("failed", 3, 8)
+    
+    # A restart sees the job as still running and resumes after chunk one
+    job.status = "running"
+    db_session.commit()
+    asyncio.run(JobRunner(**common).run(job_id))
+    db_session.expire_all()
+    job = db_session.get(ScoringJob, job_id)
+    assert (job.status, job.processed_rows, job.scored_rows, job.error_count) == ("completed", 8, 7, 1)
+    assert job.errors[0]["row"] == 5
+    
+    claim_ids = sorted(d.claim_id for d in db_session.query(Decision).all())
+    assert claim_ids == [f"JOB-{i}" for i in range(8) if i != 4]
+    with open(job.output_path, newline="") as f:
+        output = list(csv.DictReader(f))
+    assert [row["claim_id"] for row in output] == claim_ids
+    assert [int(row["row"]) for row in output] == [1, 2, 3, 4, 6, 7, 8]
+
+def test_scoring_job_is_claimed_by_one_runner(db_session, async_session_factory, tmp_path):
+    import asyncio
+    import uuid
+    from datetime import timedelta
+    import pytest
+    from app.models import ScoringJob, utcnow
+    from app.scoring.jobs import JobRunner, LeaseLost
+    
+    job_id = uuid.uuid4()
+    db_session.add(ScoringJob(
+        job_id=job_id, status="queued", input_format="csv", input_path=str(tmp_path / "in.csv"),
+        output_path=str(tmp_path / "out.csv"), model_version="rb-v1", policy_version="policy-v1",
+        chunk_size=3, processed_rows=0, scored_rows=0, error_count=0, output_offset=0, errors=[]
+    ))
+    db_session.commit()
+    
+    common = dict(session_factory=async_session_factory, job_dir=str(tmp_path), process_workers=0)
+    first, second = JobRunner(**common), JobRunner(**common)
+    
+    async def claim(runner):
+        async with async_session_factory() as db:
+            return await runner._claim(db, job_id)
+    
+    async def renew(runner):
+        async with async_session_factory() as db:
+            job = await db.get(ScoringJob, job_id)
+            await runner._renew(db, job)
+            await db.commit()
+    
+    assert asyncio.run(claim(first))
+    assert not asyncio.run(claim(second))
+    # A running job on a live lease is not run again
+    asyncio.run(second.run(job_id))
+    db_session.expire_all()
+    assert db_session.get(ScoringJob, job_id).owner == first.owner
+    
+    # Once the lease lapses the job can be taken over, and the old owner loses it
+    db_session.get(ScoringJob, job_id).lease_until = utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    assert asyncio.run(claim(second))
+    with pytest.raises(LeaseLost):
+        asyncio.run(renew(first))
+    asyncio.run(renew(second))
+
+def test_job_worker_survives_a_failing_run(async_session_factory, tmp_path):
+    import asyncio
+    import uuid
+    from app.scoring.jobs import JobRunner
+    
+    class FlakyRunner(JobRunner):
+        ran = []
+        
+        async def run(self, job_id):
+            if not self.ran:
+                self.ran.append(None)
+                raise ConnectionError("database unavailable")
+            self.ran.append(job_id)
+    
+    async def run():
+        runner = FlakyRunner(session_factory=async_session_factory, job_dir=str(tmp_path), process_workers=0)
+        await runner.start()
+        job_ids = [uuid.uuid4(), uuid.uuid4()]
+        for job_id in job_ids:
+            runner.submit(job_id)
+        await asyncio.wait_for(runner._queue.join(), timeout=5)
+        await runner.stop()
+        return runner.ran[1:] == job_ids[1:]
+    
+    assert asyncio.run(run())
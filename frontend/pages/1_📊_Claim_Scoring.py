@@ -10,6 +10,20 @@ st.title("📊 Claim Scoring")
 
 backend_url = os.getenv("FRONTEND_BACKEND_URL", os.getenv("BACKEND_URL", "http://localhost:8000"))
 
+
+def iter_sse(response):
+    """Yield (event, data) pairs from a Server-Sent Events response."""
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line == "":
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
 # Input method selection
 input_method = st.radio("Input Method", ["Form", "JSON", "Upload File"])
 
@@ -69,6 +83,8 @@ else:  # Upload File
         except json.JSONDecodeError as e:
             st.error(f"Invalid JSON file: {e}")
 
+stream_llm = st.checkbox("Stream LLM explanation", value=True)
+
 # Score button
 if st.button("🎯 Score Claim", type="primary", use_container_width=True):
     if not claim_data:
@@ -109,7 +125,26 @@ if st.button("🎯 Score Claim", type="primary", use_container_width=True):
                     
                     # Explanation
                     st.subheader("📝 Explanation")
-                    st.markdown(result["explanation"])
+                    if stream_llm:
+                        placeholder = st.empty()
+                        text = ""
+                        try:
+                            with requests.get(
+                                f"{backend_url}/api/decisions/{result['decision_id']}/explanation/stream",
+                                stream=True,
+                                timeout=60
+                            ) as stream:
+                                for event, data in iter_sse(stream):
+                                    if event == "token":
+                                        text += data["text"]
+                                        placeholder.markdown(text + "▌")
+                                    elif event in ("done", "error"):
+                                        text = data["explanation"]
+                            placeholder.markdown(text or result["explanation"])
+                        except Exception:
+                            placeholder.markdown(result["explanation"])
+                    else:
+                        st.markdown(result["explanation"])
                     
                     # Business impact
                     st.subheader("💼 Business Impact")
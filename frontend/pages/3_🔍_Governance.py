@@ -2,7 +2,7 @@ import streamlit as st
 import requests
 import pandas as pd
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
 st.set_page_config(page_title="Governance", page_icon="🔍", layout="wide")
 
@@ -10,22 +10,92 @@ st.title("🔍 Governance & Audit Trail")
 
 backend_url = os.getenv("FRONTEND_BACKEND_URL", os.getenv("BACKEND_URL", "http://localhost:8000"))
 
+# Aggregate statistics (computed server-side over the whole window)
+st.subheader("📈 Decision Statistics")
+
+window_days = st.slider("Window (days)", 1, 365, 30)
+
+try:
+    stats_response = requests.get(
+        f"{backend_url}/api/decisions/stats",
+        params={"since": (datetime.utcnow() - timedelta(days=window_days)).isoformat() + "Z"},
+        timeout=10
+    )
+    if stats_response.status_code == 200:
+        stats = stats_response.json()
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Decisions", stats['total'])
+        with col2:
+            st.metric("Approved", stats['by_decision'].get('APPROVE', 0))
+        with col3:
+            st.metric("Review", stats['by_decision'].get('REVIEW', 0))
+        with col4:
+            st.metric("Rejected", stats['by_decision'].get('REJECT', 0))
+        
+        if stats['total']:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.caption("Risk score distribution")
+                histogram = pd.DataFrame(stats['risk_score_histogram'])
+                histogram['range'] = histogram.apply(lambda b: f"{b['lower']:.0f}-{b['upper']:.0f}", axis=1)
+                st.bar_chart(histogram.set_index('range')['count'])
+            with col2:
+                st.caption("Fraud probability percentiles")
+                st.table(pd.DataFrame([stats['fraud_probability_percentiles']]))
+                st.caption("By model / policy version")
+                st.dataframe(pd.DataFrame(stats['by_version']), use_container_width=True)
+        
+        # Full exports stream straight from the backend (not limited to the rows fetched below)
+        since = (datetime.utcnow() - timedelta(days=window_days)).isoformat() + "Z"
+        col1, col2 = st.columns(2)
+        with col1:
+            st.link_button("📥 Export window (CSV)", f"{backend_url}/api/decisions/export?format=csv&since={since}")
+        with col2:
+            st.link_button("📥 Export window (Parquet)", f"{backend_url}/api/decisions/export?format=parquet&since={since}")
+    else:
+        st.error(f"Stats API Error: {stats_response.status_code}")
+except Exception as e:
+    st.error(f"Stats request failed: {e}")
+
 # Fetch decisions
 st.subheader("📋 Recent Decisions")
 
 limit = st.slider("Number of records", 10, 200, 50, 10)
 
+# Filters (each is index-backed on the server)
+filter_cols = st.columns(4)
+with filter_cols[0]:
+    customer_filter = st.text_input("Customer ID")
+with filter_cols[1]:
+    decision_filter = st.multiselect("Decision", ["APPROVE", "REVIEW", "REJECT"])
+with filter_cols[2]:
+    risk_range = st.slider("Risk score", 0, 100, (0, 100))
+with filter_cols[3]:
+    search_text = st.text_input("Search explanations")
+
+params = {"limit": limit}
+if customer_filter:
+    params["customer_id"] = customer_filter.strip()
+if decision_filter:
+    params["decision"] = decision_filter
+if risk_range != (0, 100):
+    params["min_risk_score"], params["max_risk_score"] = risk_range
+if search_text:
+    params["q"] = search_text
+
 if st.button("🔄 Refresh Data", type="primary"):
     with st.spinner("Loading decisions..."):
         try:
             response = requests.get(
                 f"{backend_url}/api/decisions",
-                params={"limit": limit},
+                params=params,
                 timeout=10
             )
             
             if response.status_code == 200:
-                decisions = response.json()
+                decisions = response.json()["results"]
                 
                 if decisions:
                     # Convert to DataFrame
@@ -34,34 +104,16 @@ if st.button("🔄 Refresh Data", type="primary"):
                     # Format timestamp
                     df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
                     
-                    # Display metrics
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    with col1:
-                        st.metric("Total Decisions", len(df))
-                    
-                    with col2:
-                        approved = len(df[df['decision'] == 'APPROVE'])
-                        st.metric("Approved", approved)
-                    
-                    with col3:
-                        review = len(df[df['decision'] == 'REVIEW'])
-                        st.metric("Review", review)
-                    
-                    with col4:
-                        rejected = len(df[df['decision'] == 'REJECT'])
-                        st.metric("Rejected", rejected)
-                    
                     # Display table
                     st.dataframe(
                         df[['claim_id', 'customer_id', 'decision', 'risk_score', 'fraud_probability', 'timestamp']],
                         use_container_width=True
                     )
                     
-                    # Export button
+                    # Export button (rows shown above only; use the window export for full data)
                     csv = df.to_csv(index=False)
                     st.download_button(
-                        label="📥 Download CSV",
+                        label="📥 Download shown rows (CSV)",
                         data=csv,
                         file_name=f"decisions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                         mime="text/csv"
@@ -77,14 +129,25 @@ if st.button("🔄 Refresh Data", type="primary"):
                     )
                     
                     if selected_decision:
+                        # Revalidate previously viewed details with their ETag (304 = unchanged)
+                        seen_details = st.session_state.setdefault("decision_details", {})
+                        seen = seen_details.get(selected_decision)
                         detail_response = requests.get(
                             f"{backend_url}/api/decisions/{selected_decision}",
+                            headers={"If-None-Match": seen[0]} if seen else {},
                             timeout=10
                         )
                         
-                        if detail_response.status_code == 200:
+                        if detail_response.status_code == 304 and seen:
+                            detail = seen[1]
+                        elif detail_response.status_code == 200:
                             detail = detail_response.json()
-                            
+                            if detail_response.headers.get("ETag"):
+                                seen_details[selected_decision] = (detail_response.headers["ETag"], detail)
+                        else:
+                            detail = None
+                        
+                        if detail is not None:
                             # Decision info
                             st.json(detail['decision'])
                             